@@ -3,6 +3,7 @@ import logging
 from logging.handlers import RotatingFileHandler
 from datetime import datetime
 
+import click
 from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_caching import Cache
@@ -134,13 +135,44 @@ def create_app(config_name='development'):
         initialize_database()
         print('Base de données initialisée avec succès.')
     
-    # Commande CLI pour exécuter les tâches planifiées
-    @app.cli.command('run-tasks')
-    def run_tasks_command():
-        """Exécute les tâches planifiées."""
-        from app.tasks import scheduler
-        scheduler.start()
-        print('Tâches planifiées démarrées.')
+    # Commande CLI pour exécuter les tâches planifiées dans un processus dédié
+    @app.cli.command('run-scheduler')
+    def run_scheduler_command():
+        """Exécute les tâches planifiées au premier plan (un seul processus élu les exécute)."""
+        from app.tasks import run_scheduler
+        print('Planificateur démarré, arrêt avec Ctrl+C.')
+        run_scheduler(app)
+    
+    # Commande CLI pour exécuter les tâches mises en file
+    @app.cli.command('worker')
+    @click.option('--concurrency', type=int, help='Tâches exécutées simultanément (par défaut TASK_QUEUE_CONCURRENCY).')
+    @click.option('--burst', is_flag=True, help="S'arrêter dès que la file est vide.")
+    def worker_command(concurrency, burst):
+        """Exécute les tâches de la file durable, jusqu'à Ctrl+C ou SIGTERM."""
+        import signal
+        from app.services.task_queue import Worker
+        from app.tasks import data_collection_tasks, ma_economic_tasks  # enregistrement des tâches
+        
+        worker = Worker(app, concurrency=concurrency)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop())
+        print(f'Worker démarré ({worker.concurrency} tâches simultanées), arrêt avec Ctrl+C.')
+        worker.run(burst=burst)
+    
+    # Commandes CLI d'export des séries d'indicateurs et de maintenance des données brutes
+    from app.commands import (
+        export_indicators_command, compress_collected_data_command, cleanup_collected_data_command,
+        maintain_partitions_command, rebuild_energy_rollups_command, backfill_candles_command,
+        rebuild_positions_command, import_trades_command
+    )
+    app.cli.add_command(export_indicators_command)
+    app.cli.add_command(compress_collected_data_command)
+    app.cli.add_command(cleanup_collected_data_command)
+    app.cli.add_command(maintain_partitions_command)
+    app.cli.add_command(rebuild_energy_rollups_command)
+    app.cli.add_command(backfill_candles_command)
+    app.cli.add_command(rebuild_positions_command)
+    app.cli.add_command(import_trades_command)
     
     return app
 
@@ -254,13 +286,15 @@ def initialize_database():
         print('Utilisateur admin créé avec succès.')
 
 def initialize_scheduled_tasks(app):
-    """Initialise les tâches planifiées."""
-    from app.tasks import init_scheduler
+    """Initialise les tâches planifiées.
+    
+    En mode 'standalone' (``SCHEDULER_MODE``), les processus web ne démarrent
+    pas de planificateur : les tâches sont exécutées par ``flask run-scheduler``.
+    """
+    if app.testing or app.config.get('SCHEDULER_MODE', 'web') != 'web':
+        return
     
-    # Démarrer le planificateur de tâches
-    scheduler = init_scheduler(app)
+    from app.tasks import init_scheduler
     
-    # Démarrer le planificateur si nous ne sommes pas en mode test
-    if not app.testing:
-        scheduler.start()
-        app.logger.info('Planificateur de tâches démarré.')
\ No newline at end of file
+    # Démarrer le planificateur ; seul le processus élu exécute les tâches
+    init_scheduler(app)
\ No newline at end of file
@@ -11,7 +11,7 @@ api_bp = Blueprint('api', __name__)
 
 def init_app(app):
     """Initialise les routes API avec l'application Flask."""
-    from . import auth, economy, users  # noqa
+    from . import auth, economy, energy, trades, users  # noqa
     
     # Enregistrer les blueprints
     app.register_blueprint(api_bp, url_prefix='/api')
@@ -27,3 +27,15 @@ def status():
         'version': '1.0.0',
         'service': 'Punk Eco API'
     })
+
+@api_bp.route('/status/collectors')
+@jwt_required()
+def collectors_status():
+    """État des disjoncteurs des sources de collecte, par hôte."""
+    from app.services.resilience import circuit_states
+    
+    states = circuit_states()
+    return jsonify({
+        'status': 'degraded' if any(s['state'] != 'closed' for s in states.values()) else 'ok',
+        'circuits': states
+    })
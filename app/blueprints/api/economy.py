@@ -1,12 +1,69 @@
 """Routes API pour les données économiques."""
 
-from flask import jsonify
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from flask import Response, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required
 from app.models.ma_economy import EconomicIndicator
+from app.services.data_versions import SCOPE_ALL, SCOPE_CATEGORY, SCOPE_INDICATOR
+from app.utils.decorators import conditional_response
 from . import api_bp
 
+# Pagination de l'historique
+HISTORY_PAGE_SIZE = 100
+HISTORY_PAGE_MAX = 1000
+
+# Formats d'export en flux et leur type MIME
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+def _parse_date(value):
+    """Convertit un paramètre YYYY-MM-DD en date (None si absent)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Date invalide: {value} (format attendu: YYYY-MM-DD)")
+
+def _parse_cursor(value):
+    """Décode un curseur de pagination ``YYYY-MM-DD:id`` en couple (date, id)."""
+    if not value:
+        return None
+    try:
+        date, row_id = value.split(':')
+        return datetime.strptime(date, "%Y-%m-%d").date(), int(row_id)
+    except ValueError:
+        raise ValueError(f"Curseur invalide: {value}")
+
+def _ndjson_line(rows):
+    """Sérialise les points en NDJSON, une ligne par point."""
+    for row in rows:
+        yield json.dumps({'date': row.date.isoformat(), 'value': row.value, 'unit': row.unit}) + '\n'
+
+def _csv_lines(rows):
+    """Sérialise les points en CSV, en-tête compris."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['date', 'value', 'unit'])
+    # En-tête émis même si la série est vide
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow([row.date.isoformat(), row.value, row.unit])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
 @api_bp.route('/economy/indicators', methods=['GET'])
 @jwt_required()
+@conditional_response(SCOPE_ALL)
 def get_indicators():
     """Récupère les derniers indicateurs économiques."""
     indicators = EconomicIndicator.get_latest_indicators(limit=20)
@@ -17,20 +74,60 @@ def get_indicators():
 
 @api_bp.route('/economy/indicators/<string:indicator_id>', methods=['GET'])
 @jwt_required()
+@conditional_response(SCOPE_INDICATOR, 'indicator_id')
 def get_indicator_history(indicator_id):
-    """Récupère l'historique d'un indicateur spécifique."""
-    history = EconomicIndicator.get_indicator_history(indicator_id)
+    """Récupère l'historique d'un indicateur spécifique.
+    
+    Paramètres de requête :
+        from, to: bornes incluses au format YYYY-MM-DD (par défaut les 365 derniers jours).
+        limit: taille de page (par défaut 100, maximum 1000).
+        cursor: curseur ``next_cursor`` retourné par la page précédente.
+        format: ``json`` (paginé, par défaut), ``ndjson`` ou ``csv`` (flux complet).
+    """
+    try:
+        start = _parse_date(request.args.get('from'))
+        end = _parse_date(request.args.get('to'))
+        after = _parse_cursor(request.args.get('cursor'))
+        limit = min(int(request.args.get('limit', HISTORY_PAGE_SIZE)), HISTORY_PAGE_MAX)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    if limit < 1:
+        return jsonify({'status': 'error', 'message': 'limit doit être positif'}), 400
+    
+    if start is None and after is None:
+        start = (datetime.utcnow() - timedelta(days=365)).date()
+    
+    output_format = request.args.get('format', 'json')
+    if output_format in STREAM_FORMATS:
+        rows = EconomicIndicator.iter_history(indicator_id, start, end)
+        encode = _ndjson_line if output_format == 'ndjson' else _csv_lines
+        return Response(
+            stream_with_context(encode(rows)),
+            mimetype=STREAM_FORMATS[output_format],
+            headers={
+                'Content-Disposition': f'attachment; filename={indicator_id}.{output_format}'
+            }
+        )
+    if output_format != 'json':
+        return jsonify({'status': 'error', 'message': f'Format non pris en charge: {output_format}'}), 400
+    
+    history, next_cursor = EconomicIndicator.get_history_page(
+        indicator_id, start=start, end=end, after=after, limit=limit
+    )
     return jsonify({
         'status': 'success',
         'data': [{
             'date': item.date.isoformat(),
             'value': item.value,
             'unit': item.unit
-        } for item in history]
+        } for item in history],
+        'next_cursor': f"{next_cursor[0].isoformat()}:{next_cursor[1]}" if next_cursor else None
     }), 200
 
 @api_bp.route('/economy/categories/<string:category>', methods=['GET'])
 @jwt_required()
+@conditional_response(SCOPE_CATEGORY, 'category')
 def get_indicators_by_category(category):
     """Récupère les indicateurs d'une catégorie spécifique."""
     indicators = EconomicIndicator.get_indicators_by_category(category)
@@ -38,3 +135,68 @@ def get_indicators_by_category(category):
         'status': 'success',
         'data': [indicator.to_dict() for indicator in indicators]
     }), 200
+
+@api_bp.route('/economy/snapshot', methods=['GET'])
+@jwt_required()
+@conditional_response(SCOPE_ALL)
+def get_snapshot():
+    """Récupère la dernière valeur et la variation de chaque indicateur.
+    
+    Le paramètre optionnel ``ids`` (liste séparée par des virgules) restreint
+    les indicateurs retournés.
+    """
+    ids = request.args.get('ids')
+    indicator_ids = [i.strip() for i in ids.split(',') if i.strip()] if ids else None
+    snapshot = EconomicIndicator.latest_with_previous(indicator_ids)
+    return jsonify({
+        'status': 'success',
+        'data': [{
+            'id': indicator_id,
+            'name': latest['name'],
+            'value': latest['value'],
+            'unit': latest['unit'],
+            'date': latest['date'].isoformat(),
+            'previous_value': latest['previous_value'],
+            'previous_date': latest['previous_date'].isoformat()
+                if latest['previous_date'] else None,
+            'change': latest['change'],
+            'change_pct': latest['change_pct']
+        } for indicator_id, latest in snapshot.items()]
+    }), 200
+
+@api_bp.route('/economy/export', methods=['GET'])
+@jwt_required()
+def export_indicators():
+    """Exporte des séries d'indicateurs au format Arrow IPC ou Parquet.
+    
+    Paramètres de requête :
+        ids: indicateurs à exporter, séparés par des virgules.
+        category: catégorie à exporter.
+        from, to: bornes incluses au format YYYY-MM-DD.
+        format: ``parquet`` (par défaut) ou ``arrow``.
+    """
+    from app.services.indicator_export import EXPORT_FORMATS, stream_export
+    
+    output_format = request.args.get('format', 'parquet')
+    if output_format not in EXPORT_FORMATS:
+        return jsonify({'status': 'error', 'message': f'Format non pris en charge: {output_format}'}), 400
+    
+    try:
+        start = _parse_date(request.args.get('from'))
+        end = _parse_date(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    ids = request.args.get('ids')
+    mimetype, extension = EXPORT_FORMATS[output_format]
+    return Response(
+        stream_with_context(stream_export(
+            output_format,
+            indicator_ids=[i.strip() for i in ids.split(',') if i.strip()] if ids else None,
+            category=request.args.get('category'),
+            start=start,
+            end=end
+        )),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=indicators.{extension}'}
+    )
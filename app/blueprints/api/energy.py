@@ -0,0 +1,61 @@
+"""Routes API pour les données énergétiques."""
+
+from datetime import datetime, timedelta
+
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required
+from app.models.energy import EnergyRollup, ROLLUP_RESOLUTIONS, DEFAULT_MAX_POINTS
+from . import api_bp
+
+# Budget maximal de points accepté par requête
+SERIES_MAX_POINTS = 5000
+
+def _parse_datetime(value):
+    """Convertit un paramètre ISO 8601 (date ou date et heure) en datetime (None si absent)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Date invalide: {value} (format attendu: ISO 8601)")
+
+@api_bp.route('/energy/sources/<int:source_id>/series', methods=['GET'])
+@jwt_required()
+def get_energy_series(source_id):
+    """Récupère une série énergétique à la résolution adaptée à la fenêtre demandée.
+    
+    Paramètres de requête :
+        type: type de mesure (par défaut ``production``).
+        from, to: bornes au format ISO 8601, ``to`` exclue (par défaut les 30 derniers jours).
+        points: nombre maximal de points souhaité (par défaut 500, maximum 5000).
+        resolution: force ``raw``, ``hour``, ``day`` ou ``month``.
+    """
+    try:
+        end = _parse_datetime(request.args.get('to')) or datetime.utcnow()
+        start = _parse_datetime(request.args.get('from')) or end - timedelta(days=30)
+        max_points = min(int(request.args.get('points', DEFAULT_MAX_POINTS)), SERIES_MAX_POINTS)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    if max_points < 1:
+        return jsonify({'status': 'error', 'message': 'points doit être positif'}), 400
+    if start >= end:
+        return jsonify({'status': 'error', 'message': 'from doit précéder to'}), 400
+    
+    resolution = request.args.get('resolution')
+    if resolution and resolution != 'raw' and resolution not in ROLLUP_RESOLUTIONS:
+        return jsonify({'status': 'error', 'message': f'Résolution non prise en charge: {resolution}'}), 400
+    
+    resolution, points = EnergyRollup.series(
+        source_id,
+        request.args.get('type', 'production'),
+        start,
+        end,
+        max_points=max_points,
+        resolution=resolution
+    )
+    return jsonify({
+        'status': 'success',
+        'resolution': resolution,
+        'data': [dict(point, timestamp=point['timestamp'].isoformat()) for point in points]
+    }), 200
@@ -0,0 +1,111 @@
+"""Routes API pour les données de transactions."""
+
+from datetime import datetime
+
+from flask import current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.user import User
+from app.services.candles import CANDLE_INTERVALS, get_candles
+from app.services.portfolio import get_portfolio
+from app.services.trade_import import IMPORT_FORMATS, import_trades
+from . import api_bp
+
+# Nombre de bougies retournées
+CANDLES_LIMIT = 500
+CANDLES_LIMIT_MAX = 5000
+
+# Format d'import déduit du Content-Type
+IMPORT_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+def _parse_datetime(value):
+    """Convertit un paramètre ISO 8601 (date ou date et heure) en datetime (None si absent)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Date invalide: {value} (format attendu: ISO 8601)")
+
+@api_bp.route('/trades/candles', methods=['GET'])
+@jwt_required()
+def get_trade_candles():
+    """Récupère les bougies OHLCV d'un actif.
+    
+    Paramètres de requête :
+        asset: actif (obligatoire), ex. ``BTC``.
+        interval: ``1m``, ``5m``, ``1h`` (par défaut) ou ``1d``.
+        from, to: bornes au format ISO 8601, ``to`` exclue.
+        limit: nombre maximal de bougies, les plus récentes (par défaut 500, maximum 5000).
+    """
+    asset = request.args.get('asset')
+    if not asset:
+        return jsonify({'status': 'error', 'message': 'Le paramètre asset est obligatoire'}), 400
+    
+    interval = request.args.get('interval', '1h')
+    if interval not in CANDLE_INTERVALS:
+        return jsonify({'status': 'error', 'message': f'Intervalle non pris en charge: {interval}'}), 400
+    
+    try:
+        start = _parse_datetime(request.args.get('from'))
+        end = _parse_datetime(request.args.get('to'))
+        limit = min(int(request.args.get('limit', CANDLES_LIMIT)), CANDLES_LIMIT_MAX)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    if limit < 1:
+        return jsonify({'status': 'error', 'message': 'limit doit être positif'}), 400
+    
+    candles = get_candles(asset, interval, start=start, end=end, limit=limit)
+    return jsonify({
+        'status': 'success',
+        'asset': asset,
+        'interval': interval,
+        'data': [candle.to_dict() for candle in candles]
+    }), 200
+
+@api_bp.route('/portfolio', methods=['GET'])
+@jwt_required()
+def get_user_portfolio():
+    """Récupère les positions de l'utilisateur connecté, avec leur P&L réalisé et latent."""
+    return jsonify({
+        'status': 'success',
+        'data': get_portfolio(get_jwt_identity())
+    }), 200
+
+@api_bp.route('/trades/import', methods=['POST'])
+@jwt_required()
+def import_user_trades():
+    """Importe des transactions en masse depuis un flux CSV ou NDJSON.
+    
+    Le corps de la requête (ou le fichier ``file`` d'un formulaire multipart)
+    est lu par blocs. Colonnes : asset, side, amount, price (obligatoires),
+    timestamp, fee, status, exchange, notes ; ``total`` est toujours calculé
+    par le serveur. Les transactions sont rattachées à l'utilisateur connecté ;
+    un admin peut fournir une colonne user_id (à défaut, la sienne).
+    
+    Paramètres de requête :
+        format: ``csv`` ou ``ndjson`` (par défaut déduit du Content-Type, sinon ``csv``).
+    """
+    fmt = request.args.get('format') or IMPORT_CONTENT_TYPES.get(request.mimetype, 'csv')
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'status': 'error', 'message': f"Format d'import non pris en charge: {fmt}"}), 400
+    
+    stream = request.files['file'].stream if 'file' in request.files else request.stream
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    if current_user is None:
+        return jsonify({'status': 'error', 'message': 'Utilisateur non trouvé'}), 404
+    user_id = None if current_user.is_admin else current_user_id
+    
+    try:
+        report = import_trades(stream, fmt,
+                               chunk_size=current_app.config.get('TRADE_IMPORT_CHUNK_SIZE', 50000),
+                               user_id=user_id, default_user_id=current_user_id)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({'status': 'success', 'data': report}), 200
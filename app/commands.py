@@ -12,6 +12,14 @@ def init_app(app):
     """Initialise les commandes personnalisées pour l'application."""
     app.cli.add_command(init_db_command)
     app.cli.add_command(create_admin_command)
+    app.cli.add_command(export_indicators_command)
+    app.cli.add_command(compress_collected_data_command)
+    app.cli.add_command(cleanup_collected_data_command)
+    app.cli.add_command(maintain_partitions_command)
+    app.cli.add_command(rebuild_energy_rollups_command)
+    app.cli.add_command(backfill_candles_command)
+    app.cli.add_command(rebuild_positions_command)
+    app.cli.add_command(import_trades_command)
 
 
 @click.command('init-db')
@@ -58,3 +66,183 @@ def create_admin_command(email, password):
     db.session.commit()
     
     click.echo(f'Administrateur {email} créé avec succès.')
+
+
+@click.command('export-indicators')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(['parquet', 'arrow']), default='parquet',
+              help='Format du fichier exporté.')
+@click.option('--indicator', 'indicator_ids', multiple=True,
+              help='Indicateur à exporter (option répétable).')
+@click.option('--category', help='Catégorie à exporter.')
+@click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Date de début incluse (YYYY-MM-DD).')
+@click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Date de fin incluse (YYYY-MM-DD).')
+@with_appcontext
+def export_indicators_command(output, fmt, indicator_ids, category, start, end):
+    """Exporte des séries d'indicateurs économiques en Arrow IPC ou Parquet.
+    
+    Args:
+        output: Chemin du fichier de sortie
+    """
+    from .services.indicator_export import write_export
+    
+    count = write_export(
+        output,
+        fmt,
+        indicator_ids=list(indicator_ids) or None,
+        category=category,
+        start=start.date() if start else None,
+        end=end.date() if end else None
+    )
+    click.echo(f'{count} lignes exportées vers {output}.')
+
+
+@click.command('compress-collected-data')
+@click.option('--codec', type=click.Choice(['zlib', 'zstd']),
+              help='Algorithme de compression (par défaut COLLECTED_DATA_COMPRESSION).')
+@click.option('--batch-size', default=500, show_default=True,
+              help='Nombre de lignes compressées par transaction.')
+@with_appcontext
+def compress_collected_data_command(codec, batch_size):
+    """Compresse les données brutes JSON déjà enregistrées dans CollectedData."""
+    from .models.data_collection import CollectedData, compress_payload
+    
+    codec = codec or current_app.config.get('COLLECTED_DATA_COMPRESSION') or 'zlib'
+    total = 0
+    last_id = 0
+    while True:
+        rows = CollectedData.query.options(CollectedData.with_payload()).filter(
+            CollectedData.id > last_id,
+            CollectedData.raw_data_json.isnot(None)
+        ).order_by(CollectedData.id).limit(batch_size).all()
+        if not rows:
+            break
+        for row in rows:
+            row.raw_data_compressed = compress_payload(row.raw_data_json, codec)
+            row.raw_data_json = None
+        db.session.commit()
+        last_id = rows[-1].id
+        total += len(rows)
+    
+    click.echo(f'{total} lignes compressées ({codec}).')
+
+
+@click.command('cleanup-collected-data')
+@click.option('--days', type=int, help='Conservation par défaut en jours (par défaut COLLECTION_RETENTION_DAYS).')
+@click.option('--archive-dir', type=click.Path(file_okay=False),
+              help='Archive les lignes supprimées dans ce répertoire (.jsonl.gz).')
+@click.option('--batch-size', type=int, help='Nombre de lignes supprimées par transaction.')
+@with_appcontext
+def cleanup_collected_data_command(days, archive_dir, batch_size):
+    """Supprime par lots l'historique de collecte expiré.
+    
+    La commande peut être interrompue et relancée : elle reprend où elle s'est arrêtée.
+    """
+    from .services.retention import apply_retention
+    
+    config = current_app.config
+    stats = apply_retention(
+        default_days=days or config.get('COLLECTION_RETENTION_DAYS', 30),
+        policies=config.get('COLLECTION_RETENTION_POLICIES'),
+        batch_size=batch_size or config.get('COLLECTION_RETENTION_BATCH_SIZE', 1000),
+        pause=config.get('COLLECTION_RETENTION_BATCH_PAUSE', 0.1),
+        archive_dir=archive_dir or config.get('COLLECTION_RETENTION_ARCHIVE_DIR'),
+        progress=lambda stage, count: click.echo(f'{stage}: {count} lignes supprimées')
+    )
+    click.echo(f"{sum(stats['collected_data'].values())} données et {stats['runs']} exécutions supprimées.")
+
+
+@click.command('maintain-partitions')
+@click.option('--months-ahead', type=int,
+              help='Nombre de mois futurs à créer (par défaut PARTITION_MONTHS_AHEAD).')
+@with_appcontext
+def maintain_partitions_command(months_ahead):
+    """Crée les partitions mensuelles à venir et supprime celles de energy_data expirées."""
+    from .services.partitioning import ensure_partitions, drop_partitions_before, is_partitioned
+    
+    config = current_app.config
+    if not any(is_partitioned(table) for table in ('collected_data', 'energy_data')):
+        click.echo('Aucune table partitionnée (PostgreSQL avec TIME_PARTITIONING requis).')
+        return
+    
+    created = ensure_partitions(months_ahead or config.get('PARTITION_MONTHS_AHEAD', 3))
+    click.echo(f"{len(created)} partitions créées.")
+    
+    days = config.get('ENERGY_DATA_RETENTION_DAYS')
+    if days:
+        from datetime import datetime, timedelta
+        dropped = drop_partitions_before('energy_data', datetime.utcnow() - timedelta(days=days))
+        click.echo(f"{len(dropped)} partitions de energy_data supprimées.")
+
+
+@click.command('rebuild-energy-rollups')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Recalcule à partir du mois de cette date (YYYY-MM-DD) ; '
+                   'par défaut, à partir du premier mois des mesures conservées.')
+@with_appcontext
+def rebuild_energy_rollups_command(since):
+    """Recalcule les agrégats horaires, journaliers et mensuels de EnergyData."""
+    from .models.energy import EnergyRollup
+    
+    count = EnergyRollup.rebuild(since)
+    click.echo(f'{count} mesures agrégées.')
+
+
+@click.command('backfill-candles')
+@click.option('--asset', help='Actif à recalculer (tous par défaut).')
+@click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Date de début incluse (YYYY-MM-DD).')
+@click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Date de fin exclue (YYYY-MM-DD).')
+@with_appcontext
+def backfill_candles_command(asset, start, end):
+    """Recalcule les bougies OHLCV à partir des transactions enregistrées."""
+    from .services.candles import backfill_candles
+    
+    count = backfill_candles(asset, start, end)
+    click.echo(f'{count} transactions agrégées.')
+
+
+@click.command('rebuild-positions')
+@click.option('--user-id', type=int, help='Utilisateur à recalculer (tous par défaut).')
+@with_appcontext
+def rebuild_positions_command(user_id):
+    """Recalcule les positions de portefeuille à partir de l'historique des transactions."""
+    from .services.portfolio import rebuild_positions
+    
+    count = rebuild_positions(user_id)
+    click.echo(f'{count} positions recalculées.')
+
+
+@click.command('import-trades')
+@click.argument('file', type=click.File('rb'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Format du fichier (par défaut déduit de son extension, sinon csv).')
+@click.option('--chunk-size', type=int,
+              help='Nombre de lignes par bloc (par défaut TRADE_IMPORT_CHUNK_SIZE).')
+@click.option('--user-id', type=int,
+              help='Utilisateur de toutes les transactions importées (sinon colonne user_id obligatoire).')
+@with_appcontext
+def import_trades_command(file, fmt, chunk_size, user_id):
+    """Importe en masse des transactions depuis un fichier CSV ou NDJSON (``-`` : entrée standard)."""
+    from .services.trade_import import import_trades
+    
+    if fmt is None:
+        fmt = 'ndjson' if file.name.endswith(('.ndjson', '.jsonl')) else 'csv'
+    
+    report = import_trades(
+        file, fmt,
+        chunk_size=chunk_size or current_app.config.get('TRADE_IMPORT_CHUNK_SIZE', 50000),
+        user_id=user_id,
+        progress=lambda chunk: click.echo(
+            f"Bloc {chunk['chunk']}: {chunk['inserted']} insérées, "
+            f"{chunk['rejected']} rejetées ({chunk['seconds']}s)"
+        )
+    )
+    for chunk in report['chunks']:
+        for reject in chunk['rejects']:
+            click.echo(f"Enregistrement {reject['row']}: {reject['reason']}", err=True)
+    click.echo(f"{report['inserted']} transactions importées, {report['rejected']} rejetées "
+               f"en {report['seconds']}s ({report['rows_per_second']} lignes/s).")
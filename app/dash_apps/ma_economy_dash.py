@@ -1,21 +1,53 @@
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
-import plotly.graph_objects as go
+from dash.dependencies import Input, Output, State
 import plotly.express as px
 from flask_login import current_user
-from flask import redirect, url_for
+from flask import current_app, jsonify, redirect, request, url_for
 from datetime import datetime
 
+def current_version():
+    """Version courante de l'instantané du tableau de bord.
+    
+    La réponse porte la version en ETag. Une requête ``If-None-Match`` est
+    tenue en attente (au plus DASHBOARD_VERSION_WAIT secondes) et reçoit la
+    nouvelle version dès qu'elle change, ou un 304 sans corps à l'expiration
+    du délai ; le client relance aussitôt la requête suivante.
+    """
+    from app.services.dashboard_snapshot import wait_for_version
+    
+    config = current_app.config
+    wait = config.get('DASHBOARD_VERSION_WAIT', 25)
+    known = next(iter(request.if_none_match), None)
+    version = wait_for_version(
+        known,
+        timeout=wait if known else 0,
+        interval=config.get('DASHBOARD_VERSION_CHECK_INTERVAL', 1)
+    )
+    response = jsonify({
+        'version': version,
+        'wait': wait,
+        'retry_interval': config.get('DASHBOARD_VERSION_RETRY_INTERVAL', 30)
+    })
+    response.set_etag(version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 def init_dash(server):
     """Initialise l'application Dash."""
+    # Rafraîchit l'instantané dès que de nouveaux indicateurs sont validés
+    from app.services import dashboard_snapshot  # noqa
+    
     dash_app = dash.Dash(
         __name__,
         server=server,
         routes_pathname_prefix='/ma-economy/',
-        external_stylesheets=['/static/css/ma_economy.css']
+        external_stylesheets=['/static/css/ma_economy.css'],
+        external_scripts=['/static/js/ma_economy.js']
     )
     
+    server.add_url_rule('/ma-economy/version', 'ma_economy_version', current_version)
+    
     # Layout du tableau de bord
     dash_app.layout = html.Div([
         # En-tête
@@ -71,14 +103,35 @@ def init_dash(server):
             
         ], className='dashboard-container'),
         
-        # Actualisation automatique
+        # Actualisation : ma_economy.js attend le changement de version sur
+        # /ma-economy/version (long-poll) et renseigne window.maEconomyVersion,
+        # vérifiée côté client sans appel serveur.
+        dcc.Store(id='data-version'),
+        dcc.Store(id='rendered-version'),
         dcc.Interval(
-            id='interval-component',
-            interval=3600*1000,  # 1 heure
+            id='version-check',
+            interval=1000,  # 1 seconde
             n_intervals=0
         )
     ])
     
+    # Déclenche les callbacks serveur uniquement quand la version change
+    dash_app.clientside_callback(
+        """
+        function(n, rendered, current) {
+            var version = window.maEconomyVersion;
+            if (!version || version === rendered || version === current) {
+                return window.dash_clientside.no_update;
+            }
+            return version;
+        }
+        """,
+        Output('data-version', 'data'),
+        [Input('version-check', 'n_intervals')],
+        [State('rendered-version', 'data'),
+         State('data-version', 'data')]
+    )
+    
     # Callbacks pour la mise à jour des indicateurs
     @dash_app.callback(
         [Output('pib-value', 'children'),
@@ -88,11 +141,12 @@ def init_dash(server):
          Output('chomage-value', 'children'),
          Output('chomage-change', 'children'),
          Output('tmm-value', 'children'),
-         Output('tmm-change', 'children')],
-        [Input('interval-component', 'n_intervals')]
+         Output('tmm-change', 'children'),
+         Output('rendered-version', 'data')],
+        [Input('data-version', 'data')]
     )
     def update_indicators(n):
-        from app.models.ma_economy import EconomicIndicator
+        from app.services.dashboard_snapshot import get_snapshot
         
         indicators = {
             'hcp_pib': {'value': None, 'change': None},
@@ -101,23 +155,12 @@ def init_dash(server):
             'bam_tmm': {'value': None, 'change': None}
         }
         
-        for indicator_id in indicators.keys():
-            # Dernière valeur
-            last = EconomicIndicator.query.filter_by(
-                indicator_id=indicator_id
-            ).order_by(EconomicIndicator.date.desc()).first()
-            
-            if last:
-                indicators[indicator_id]['value'] = f"{last.value}%"
-                
-                # Calcul de la variation
-                previous = EconomicIndicator.query.filter_by(
-                    indicator_id=indicator_id
-                ).order_by(EconomicIndicator.date.desc()).offset(1).first()
-                
-                if previous and previous.value != 0:
-                    change = ((last.value - previous.value) / previous.value) * 100
-                    indicators[indicator_id]['change'] = f"{change:+.1f}%"
+        # Dernière valeur et variation lues depuis l'instantané partagé
+        snapshot = get_snapshot()
+        for indicator_id, latest in snapshot['kpis'].items():
+            indicators[indicator_id]['value'] = f"{latest['value']}%"
+            if latest['change_pct'] is not None:
+                indicators[indicator_id]['change'] = f"{latest['change_pct']:+.1f}%"
         
         return [
             indicators['hcp_pib']['value'] or 'N/A',
@@ -127,87 +170,40 @@ def init_dash(server):
             indicators['hcp_chomage']['value'] or 'N/A',
             indicators['hcp_chomage']['change'] or '',
             indicators['bam_tmm']['value'] or 'N/A',
-            indicators['bam_tmm']['change'] or ''
+            indicators['bam_tmm']['change'] or '',
+            snapshot['version']
         ]
     
     # Callback pour le graphique PIB
     @dash_app.callback(
         Output('pib-chart', 'figure'),
-        [Input('interval-component', 'n_intervals')]
+        [Input('data-version', 'data')]
     )
     def update_pib_chart(n):
-        from app.models.ma_economy import EconomicIndicator
+        from app.services.dashboard_snapshot import get_snapshot
         
-        data = EconomicIndicator.query.filter_by(indicator_id='hcp_pib')\
-            .order_by(EconomicIndicator.date).limit(24).all()
-        
-        if not data:
-            return go.Figure()
-            
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=[d.date for d in data],
-            y=[d.value for d in data],
-            mode='lines+markers',
-            name='PIB (%)',
-            line=dict(color='#2ecc71', width=3)
-        ))
-        
-        fig.update_layout(
-            title='Évolution du PIB (Taux de croissance annuel %)',
-            xaxis_title='Date',
-            yaxis_title='Taux de croissance (%)',
-            template='plotly_white',
-            hovermode='x unified'
-        )
-        
-        return fig
+        # Figure pré-calculée pour la version courante des données
+        return get_snapshot()['figures']['hcp_pib']
     
     # Callback pour le graphique d'inflation
     @dash_app.callback(
         Output('inflation-chart', 'figure'),
-        [Input('interval-component', 'n_intervals')]
+        [Input('data-version', 'data')]
     )
     def update_inflation_chart(n):
-        from app.models.ma_economy import EconomicIndicator
-        
-        inflation = EconomicIndicator.query.filter_by(indicator_id='hcp_inflation')\
-            .order_by(EconomicIndicator.date).limit(24).all()
-            
-        if not inflation:
-            return go.Figure()
-            
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=[d.date for d in inflation],
-            y=[d.value for d in inflation],
-            mode='lines+markers',
-            name='Inflation (%)',
-            line=dict(color='#e74c3c', width=3)
-        ))
-        
-        fig.update_layout(
-            title='Évolution du Taux d\'Inflation (%)',
-            xaxis_title='Date',
-            yaxis_title='Taux d\'inflation (%)',
-            template='plotly_white',
-            hovermode='x unified'
-        )
+        from app.services.dashboard_snapshot import get_snapshot
         
-        return fig
+        return get_snapshot()['figures']['hcp_inflation']
     
     # Callback pour le tableau des indicateurs
     @dash_app.callback(
         Output('indicators-table', 'children'),
-        [Input('interval-component', 'n_intervals')]
+        [Input('data-version', 'data')]
     )
     def update_indicators_table(n):
-        from app.models.ma_economy import EconomicIndicator
+        from app.services.dashboard_snapshot import get_snapshot
         
-        indicators = EconomicIndicator.query\
-            .order_by(EconomicIndicator.date.desc(), EconomicIndicator.source)\
-            .limit(50).all()
+        indicators = get_snapshot()['table']
             
         if not indicators:
             return "Aucune donnée disponible"
@@ -215,10 +211,10 @@ def init_dash(server):
         rows = []
         for i, ind in enumerate(indicators):
             rows.append(html.Tr([
-                html.Td(ind.name),
-                html.Td(f"{ind.value} {ind.unit}"),
-                html.Td(ind.date.strftime("%d/%m/%Y")),
-                html.Td(ind.source)
+                html.Td(ind['name']),
+                html.Td(f"{ind['value']} {ind['unit']}"),
+                html.Td(ind['date'].strftime("%d/%m/%Y")),
+                html.Td(ind['source'])
             ]))
             
         return html.Table([
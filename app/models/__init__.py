@@ -10,9 +10,10 @@ from .base import BaseModel
 from .user import User
 
 # Import des autres modèles
-from .energy import EnergySource, EnergyData
-from .trade import TradeData
-from .data_collection import DataCollectionRun, CollectedData
+from .energy import EnergySource, EnergyData, EnergyRollup
+from .trade import TradeData, TradeCandle, PortfolioPosition
+from .data_collection import DataCollectionRun, CollectedData, HttpValidator, SourceCursor
+from .task_queue import TaskJob
 
 # Import du modèle économique principal
 from .ma_economy import EconomicIndicator, IndicatorMetadata
@@ -35,10 +36,16 @@ def get_models():
         'User': User,
         'EnergySource': EnergySource,
         'EnergyData': EnergyData,
+        'EnergyRollup': EnergyRollup,
         'EconomicIndicator': LegacyEconomicIndicator,  # Ancien modèle
         'MAEconomicIndicator': EconomicIndicator,  # Nouveau modèle pour les indicateurs économiques du Maroc
         'IndicatorMetadata': IndicatorMetadata,
         'TradeData': TradeData,
+        'TradeCandle': TradeCandle,
+        'PortfolioPosition': PortfolioPosition,
         'DataCollectionRun': DataCollectionRun,
         'CollectedData': CollectedData,
+        'HttpValidator': HttpValidator,
+        'SourceCursor': SourceCursor,
+        'TaskJob': TaskJob,
     }
@@ -1,9 +1,61 @@
 """
 Modèle pour stocker les résultats de la collecte de données.
 """
+import hashlib
+import json
+import zlib
+
+from flask import current_app, has_app_context
+from sqlalchemy import JSON
+from sqlalchemy.orm import defer, undefer_group
+
 from ..extensions import db
 from datetime import datetime
-from sqlalchemy import JSON
+
+try:
+    import zstandard
+except ImportError:  # zstd est optionnel, zlib est toujours disponible
+    zstandard = None
+
+# En-tête d'une trame zstd (les flux zlib commencent par 0x78)
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def _canonical_json(raw_data) -> bytes:
+    """Sérialise des données JSON de façon canonique (clés triées, sans espaces)."""
+    return json.dumps(raw_data, sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False, default=str).encode('utf-8')
+
+
+def compress_payload(raw_data, codec: str = 'zlib') -> bytes:
+    """Compresse des données JSON pour la colonne ``raw_data_compressed``.
+    
+    Args:
+        raw_data: Données JSON à compresser
+        codec: 'zstd' (si le paquet zstandard est installé) ou 'zlib'
+        
+    Returns:
+        bytes: JSON canonique compressé
+    """
+    payload = _canonical_json(raw_data)
+    if codec == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=9).compress(payload)
+    return zlib.compress(payload, 9)
+
+
+def decompress_payload(blob: bytes):
+    """Décompresse des données produites par ``compress_payload``.
+    
+    Le format (zstd ou zlib) est reconnu à l'en-tête du flux.
+    """
+    blob = bytes(blob)
+    if blob.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstandard est requis pour lire ces données (pip install zstandard)")
+        payload = zstandard.ZstdDecompressor().decompress(blob)
+    else:
+        payload = zlib.decompress(blob)
+    return json.loads(payload)
 
 class DataCollectionRun(db.Model):
     """Modèle pour suivre les exécutions de collecte de données."""
@@ -12,15 +64,19 @@ class DataCollectionRun(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     source_type = db.Column(db.String(50), nullable=False)  # 'api' ou 'scraping'
     source_name = db.Column(db.String(100), nullable=False)  # Nom de la source (ex: 'electricity_map', 'insee')
-    status = db.Column(db.String(20), default='started')  # 'started', 'completed', 'failed'
+    status = db.Column(db.String(20), default='started')  # 'started', 'completed', 'unchanged', 'failed'
     parameters = db.Column(JSON)  # Paramètres de la requête
     result_count = db.Column(db.Integer, default=0)  # Nombre d'éléments collectés
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     error_message = db.Column(db.Text)
+    # Données identiques déjà enregistrées par une exécution précédente
+    reused_data_id = db.Column(db.Integer, db.ForeignKey('collected_data.id', ondelete='SET NULL'))
     
     # Relation avec les données collectées (one-to-many)
-    collected_data = db.relationship('CollectedData', backref='run', lazy=True)
+    collected_data = db.relationship('CollectedData', backref='run', lazy=True,
+                                     foreign_keys='CollectedData.run_id')
+    reused_data = db.relationship('CollectedData', foreign_keys=[reused_data_id])
     
     def __repr__(self):
         return f'<DataCollectionRun {self.source_type}/{self.source_name} - {self.status}>'
@@ -31,6 +87,12 @@ class DataCollectionRun(db.Model):
         self.result_count = count
         self.completed_at = datetime.utcnow()
     
+    def mark_unchanged(self):
+        """Marque l'exécution comme terminée sans nouvelle donnée (réponse 304)."""
+        self.status = 'unchanged'
+        self.result_count = 0
+        self.completed_at = datetime.utcnow()
+    
     def mark_failed(self, error: str):
         """Marque l'exécution comme ayant échoué."""
         self.status = 'failed'
@@ -47,28 +109,231 @@ class CollectedData(db.Model):
     data_type = db.Column(db.String(50), nullable=False)  # Type de données (ex: 'energy', 'inflation')
     source_id = db.Column(db.String(100), index=True)  # ID de la source d'origine
     collected_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    data_date = db.Column(db.DateTime, index=True)  # Date des données (peut être différente de collected_at)
-    raw_data = db.Column(JSON)  # Données brutes
+    # Date des données (peut être différente de collected_at) ; clé de
+    # partitionnement mensuel sous PostgreSQL (voir services.partitioning)
+    data_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Données brutes, en JSON ou compressées selon COLLECTED_DATA_COMPRESSION
+    # (voir la propriété raw_data). Chargées à la demande : les listes n'en
+    # paient pas le transfert.
+    raw_data_json = db.deferred(db.Column('raw_data', JSON), group='payload')
+    raw_data_compressed = db.deferred(db.Column(db.LargeBinary), group='payload')
+    content_hash = db.Column(db.String(64))  # SHA-256 de raw_data sérialisé de façon canonique
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)  # Dernière collecte de ces données
     processed = db.Column(db.Boolean, default=False)  # Indique si les données ont été traitées
     
     # Index pour les requêtes courantes
     __table_args__ = (
         db.Index('idx_collected_data_type_date', 'data_type', 'data_date'),
         db.Index('idx_collected_data_source', 'source_id', 'data_type'),
+        db.Index('idx_collected_data_content_hash', 'source_id', 'data_type', 'content_hash'),
     )
     
     def __repr__(self):
         return f'<CollectedData {self.data_type} from {self.source_id} on {self.data_date}>'
     
-    def to_dict(self):
-        """Convertit les données en dictionnaire pour la sérialisation JSON."""
-        return {
+    @property
+    def raw_data(self):
+        """Données brutes, décompressées au premier accès."""
+        if self.raw_data_compressed is None:
+            return self.raw_data_json
+        cached = self.__dict__.get('_raw_data_cache')
+        if cached is None or cached[0] is not self.raw_data_compressed:
+            cached = (self.raw_data_compressed, decompress_payload(self.raw_data_compressed))
+            self.__dict__['_raw_data_cache'] = cached
+        return cached[1]
+    
+    @raw_data.setter
+    def raw_data(self, value):
+        codec = current_app.config.get('COLLECTED_DATA_COMPRESSION') if has_app_context() else None
+        if codec and value is not None:
+            self.raw_data_compressed = compress_payload(value, codec)
+            self.raw_data_json = None
+        else:
+            self.raw_data_compressed = None
+            self.raw_data_json = value
+    
+    @staticmethod
+    def without_payload():
+        """Option de requête excluant les données brutes (listes, métadonnées)."""
+        return defer(CollectedData.raw_data_json, CollectedData.raw_data_compressed)
+    
+    @staticmethod
+    def with_payload():
+        """Option de requête chargeant les données brutes avec la ligne."""
+        return undefer_group('payload')
+    
+    def to_dict(self, include_raw: bool = True):
+        """Convertit les données en dictionnaire pour la sérialisation JSON.
+        
+        Args:
+            include_raw: Si False, les données brutes ne sont ni chargées ni décompressées
+        """
+        data = {
             'id': self.id,
             'run_id': self.run_id,
             'data_type': self.data_type,
             'source_id': self.source_id,
             'collected_at': self.collected_at.isoformat(),
             'data_date': self.data_date.isoformat() if self.data_date else None,
-            'raw_data': self.raw_data,
+            'content_hash': self.content_hash,
+            'last_seen_at': self.last_seen_at.isoformat() if self.last_seen_at else None,
             'processed': self.processed
         }
+        if include_raw:
+            data['raw_data'] = self.raw_data
+        return data
+    
+    @staticmethod
+    def hash_payload(raw_data) -> str:
+        """Calcule l'empreinte SHA-256 d'une charge utile JSON.
+        
+        La sérialisation est canonique (clés triées, sans espaces) : deux
+        charges égales ont la même empreinte quel que soit l'ordre des clés.
+        """
+        return hashlib.sha256(_canonical_json(raw_data)).hexdigest()
+    
+    @classmethod
+    def store(cls, run: DataCollectionRun, data_type: str, source_id: str, raw_data,
+              data_date: datetime = None):
+        """Enregistre une charge utile pour une exécution, une seule fois par contenu.
+        
+        Si une charge identique existe déjà pour cette source et ce type de
+        données, elle n'est pas dupliquée : l'exécution y fait référence
+        (``reused_data``) et sa date de dernière collecte est mise à jour.
+        
+        Args:
+            run: Exécution de collecte
+            data_type: Type de données
+            source_id: ID de la source d'origine
+            raw_data: Données brutes
+            data_date: Date des données (par défaut maintenant)
+            
+        Returns:
+            tuple: (CollectedData, True si une nouvelle ligne a été créée)
+        """
+        now = datetime.utcnow()
+        content_hash = cls.hash_payload(raw_data)
+        existing = cls.query.filter_by(
+            source_id=source_id, data_type=data_type, content_hash=content_hash
+        ).order_by(cls.id.desc()).first()
+        
+        if existing is not None:
+            existing.last_seen_at = now
+            run.reused_data = existing
+            return existing, False
+        
+        data = cls(
+            data_type=data_type,
+            source_id=source_id,
+            data_date=data_date or now,
+            raw_data=raw_data,
+            content_hash=content_hash,
+            last_seen_at=now
+        )
+        run.collected_data.append(data)
+        return data, True
+
+
+class HttpValidator(db.Model):
+    """Validateurs HTTP (ETag / Last-Modified) de la dernière réponse de chaque URL.
+    
+    Ils sont renvoyés dans les en-têtes ``If-None-Match`` et
+    ``If-Modified-Since`` des collectes suivantes : une réponse 304 évite le
+    téléchargement, l'analyse et l'écriture de données inchangées.
+    """
+    __tablename__ = 'http_validators'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(2048), nullable=False, unique=True)  # URL complète, paramètres inclus
+    etag = db.Column(db.String(255))
+    last_modified = db.Column(db.String(64))  # Valeur brute de l'en-tête Last-Modified
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<HttpValidator {self.url}>'
+    
+    @classmethod
+    def load(cls) -> dict:
+        """Retourne les validateurs connus, indexés par URL.
+        
+        Returns:
+            dict: Par URL, un dictionnaire avec 'etag' et 'last_modified'.
+        """
+        return {
+            row.url: {'etag': row.etag, 'last_modified': row.last_modified}
+            for row in db.session.query(cls.url, cls.etag, cls.last_modified)
+        }
+    
+    @classmethod
+    def store(cls, validators: dict):
+        """Enregistre ou met à jour des validateurs, sans valider la transaction.
+        
+        Args:
+            validators: Par URL, un dictionnaire avec 'etag' et 'last_modified'.
+        """
+        if not validators:
+            return
+        existing = {
+            row.url: row for row in cls.query.filter(cls.url.in_(list(validators)))
+        }
+        for url, values in validators.items():
+            row = existing.get(url)
+            if row is None:
+                row = cls(url=url)
+                db.session.add(row)
+            row.etag = values.get('etag')
+            row.last_modified = values.get('last_modified')
+    
+    @staticmethod
+    def changed(before: dict, after: dict) -> dict:
+        """Retourne les validateurs de ``after`` absents ou différents dans ``before``."""
+        return {url: values for url, values in after.items() if before.get(url) != values}
+
+
+class SourceCursor(db.Model):
+    """Dernière observation enregistrée (« high-water mark ») de chaque source incrémentale.
+    
+    Les collectes suivantes ne demandent que les observations à partir de
+    cette période (voir ``services.source_registry``). Le curseur est enregistré dans la
+    même transaction que les données : il n'avance jamais sans elles.
+    """
+    __tablename__ = 'source_cursors'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source_id = db.Column(db.String(255), nullable=False, unique=True)  # Voir SourceDefinition.key
+    high_water_mark = db.Column(db.String(64), nullable=False)  # Date ISO de la dernière observation
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SourceCursor {self.source_id} {self.high_water_mark}>'
+    
+    @classmethod
+    def load(cls) -> dict:
+        """Retourne les curseurs connus, indexés par source.
+        
+        Returns:
+            dict: Par source, la date de la dernière observation enregistrée.
+        """
+        return dict(db.session.query(cls.source_id, cls.high_water_mark))
+    
+    @classmethod
+    def store(cls, cursors: dict):
+        """Enregistre ou avance des curseurs, sans valider la transaction.
+        
+        Un curseur ne recule jamais : une collecte concurrente plus ancienne
+        ne peut pas faire redemander des observations déjà enregistrées.
+        
+        Args:
+            cursors: Par source, la date de la dernière observation enregistrée.
+        """
+        if not cursors:
+            return
+        existing = {
+            row.source_id: row for row in cls.query.filter(cls.source_id.in_(list(cursors)))
+        }
+        for source_id, mark in cursors.items():
+            row = existing.get(source_id)
+            if row is None:
+                db.session.add(cls(source_id=source_id, high_water_mark=mark))
+            elif mark > row.high_water_mark:
+                row.high_water_mark = mark
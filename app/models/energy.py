@@ -1,6 +1,46 @@
 """Energy-related models for the Punk Eco application."""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
 from ..extensions import db
-from datetime import datetime
+from .ma_economy import _dialect_insert
+
+# Rollup resolutions, finest first, with their approximate bucket width
+ROLLUP_RESOLUTIONS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'month': timedelta(days=30),
+}
+DEFAULT_MAX_POINTS = 500
+
+
+def bucket_start(resolution, timestamp):
+    """Truncate a timestamp to the start of its rollup bucket."""
+    if resolution == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if resolution == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == 'month':
+        return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup resolution: {resolution}")
+
+
+def choose_resolution(start, end, max_points=DEFAULT_MAX_POINTS):
+    """Pick the finest rollup resolution whose bucket count fits the point budget.
+
+    Args:
+        start: Start of the requested window.
+        end: End of the requested window.
+        max_points: Maximum number of points the caller wants back.
+
+    Returns:
+        str: 'hour', 'day' or 'month' (the coarsest one if none fits).
+    """
+    window = end - start
+    for resolution, width in ROLLUP_RESOLUTIONS.items():
+        if window / width <= max_points:
+            return resolution
+    return 'month'
 
 class EnergySource(db.Model):
     """Model representing an energy source."""
@@ -27,9 +67,236 @@ class EnergyData(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     source_id = db.Column(db.Integer, db.ForeignKey('energy_sources.id'), nullable=False)
+    # Partition key for monthly partitioning on PostgreSQL (see services.partitioning)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     value = db.Column(db.Float, nullable=False)  # in kWh
     measurement_type = db.Column(db.String(50), nullable=False)  # e.g., 'production', 'consumption'
     
     def __repr__(self):
         return f'<EnergyData {self.measurement_type} {self.value}kWh at {self.timestamp}>'
+    
+    @classmethod
+    def record_many(cls, readings):
+        """Insert raw readings and update their rollups in the same transaction.
+        
+        Args:
+            readings: Iterable of dicts with 'source_id', 'timestamp', 'value'
+                and 'measurement_type'.
+        
+        Returns:
+            int: Number of readings inserted.
+        """
+        rows = [{
+            'source_id': reading['source_id'],
+            'timestamp': reading.get('timestamp') or datetime.utcnow(),
+            'value': reading['value'],
+            'measurement_type': reading['measurement_type'],
+        } for reading in readings]
+        if not rows:
+            return 0
+        
+        try:
+            db.session.execute(db.insert(cls.__table__), rows)
+            EnergyRollup.add_readings(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(rows)
+
+
+class EnergyRollup(db.Model):
+    """Pre-aggregated EnergyData per source, measurement type and time bucket.
+    
+    Rollups are maintained incrementally by ``EnergyData.record_many``, so
+    charts over long windows read one row per bucket instead of every raw
+    reading.
+    """
+    __tablename__ = 'energy_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    resolution = db.Column(db.String(10), nullable=False)  # 'hour', 'day' or 'month'
+    source_id = db.Column(db.Integer, db.ForeignKey('energy_sources.id'), nullable=False)
+    measurement_type = db.Column(db.String(50), nullable=False)
+    bucket = db.Column(db.DateTime, nullable=False)  # Start of the bucket
+    value_sum = db.Column(db.Float, nullable=False, default=0)
+    value_count = db.Column(db.Integer, nullable=False, default=0)
+    value_min = db.Column(db.Float)
+    value_max = db.Column(db.Float)
+    
+    __table_args__ = (
+        db.UniqueConstraint('resolution', 'source_id', 'measurement_type', 'bucket',
+                            name='uq_energy_rollups_bucket'),
+    )
+    
+    def __repr__(self):
+        return f'<EnergyRollup {self.resolution} {self.measurement_type} at {self.bucket}>'
+    
+    @property
+    def value_avg(self):
+        """Average value over the bucket."""
+        return self.value_sum / self.value_count if self.value_count else None
+    
+    @staticmethod
+    def aggregate(readings):
+        """Aggregate raw readings into rollup rows for every resolution.
+        
+        Returns:
+            list[dict]: One row per (resolution, source, measurement type, bucket).
+        """
+        buckets = defaultdict(lambda: [0.0, 0, None, None])
+        for reading in readings:
+            for resolution in ROLLUP_RESOLUTIONS:
+                key = (resolution, reading['source_id'], reading['measurement_type'],
+                       bucket_start(resolution, reading['timestamp']))
+                stats = buckets[key]
+                value = reading['value']
+                stats[0] += value
+                stats[1] += 1
+                stats[2] = value if stats[2] is None else min(stats[2], value)
+                stats[3] = value if stats[3] is None else max(stats[3], value)
+        
+        return [{
+            'resolution': resolution,
+            'source_id': source_id,
+            'measurement_type': measurement_type,
+            'bucket': bucket,
+            'value_sum': value_sum,
+            'value_count': value_count,
+            'value_min': value_min,
+            'value_max': value_max,
+        } for (resolution, source_id, measurement_type, bucket),
+              (value_sum, value_count, value_min, value_max) in buckets.items()]
+    
+    @classmethod
+    def add_readings(cls, readings):
+        """Merge raw readings into the rollups, without committing.
+        
+        Args:
+            readings: Iterable of dicts with 'source_id', 'timestamp', 'value'
+                and 'measurement_type'.
+        """
+        rows = cls.aggregate(readings)
+        if not rows:
+            return
+        
+        table = cls.__table__
+        stmt = _dialect_insert(table)
+        if stmt is not None:
+            # Two-argument MIN/MAX are scalar in SQLite, PostgreSQL uses LEAST/GREATEST
+            if db.engine.dialect.name == 'postgresql':
+                least, greatest = db.func.least, db.func.greatest
+            else:
+                least, greatest = db.func.min, db.func.max
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['resolution', 'source_id', 'measurement_type', 'bucket'],
+                set_={
+                    'value_sum': table.c.value_sum + stmt.excluded.value_sum,
+                    'value_count': table.c.value_count + stmt.excluded.value_count,
+                    'value_min': least(table.c.value_min, stmt.excluded.value_min),
+                    'value_max': greatest(table.c.value_max, stmt.excluded.value_max),
+                }
+            )
+            db.session.execute(stmt, rows)
+            return
+        
+        # Other dialects: read-modify-write
+        for row in rows:
+            rollup = cls.query.filter_by(
+                resolution=row['resolution'], source_id=row['source_id'],
+                measurement_type=row['measurement_type'], bucket=row['bucket']
+            ).with_for_update().first()
+            if rollup is None:
+                db.session.add(cls(**row))
+                continue
+            rollup.value_sum += row['value_sum']
+            rollup.value_count += row['value_count']
+            rollup.value_min = min(rollup.value_min, row['value_min'])
+            rollup.value_max = max(rollup.value_max, row['value_max'])
+    
+    @classmethod
+    def rebuild(cls, since=None, chunk_size=50000):
+        """Recompute rollups from raw EnergyData.
+        
+        Only buckets covered by the remaining raw data are rebuilt: rollups
+        older than the first raw month (e.g. after expired energy_data
+        partitions were dropped) are kept as they are.
+        
+        Args:
+            since: Rebuild from the start of this month onwards (everything if None).
+            chunk_size: Number of raw readings aggregated at a time.
+        
+        Returns:
+            int: Number of raw readings processed.
+        """
+        first = db.session.scalar(db.select(db.func.min(EnergyData.timestamp)))
+        if first is None:
+            return 0
+        since = bucket_start('month', max(since, first) if since is not None else first)
+        
+        rollups = cls.query.filter(cls.bucket >= since)
+        raw = db.select(EnergyData.source_id, EnergyData.timestamp,
+                        EnergyData.value, EnergyData.measurement_type)\
+            .where(EnergyData.timestamp >= since)
+        
+        count = 0
+        try:
+            rollups.delete(synchronize_session=False)
+            result = db.session.execute(raw.execution_options(stream_results=True,
+                                                              yield_per=chunk_size))
+            for chunk in result.mappings().partitions(chunk_size):
+                cls.add_readings(chunk)
+                count += len(chunk)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return count
+    
+    @classmethod
+    def series(cls, source_id, measurement_type, start, end,
+               max_points=DEFAULT_MAX_POINTS, resolution=None):
+        """Return a time series at the resolution that fits the point budget.
+        
+        Args:
+            source_id: Energy source ID.
+            measurement_type: Measurement type (e.g. 'production').
+            start: Start of the window (inclusive).
+            end: End of the window (exclusive).
+            max_points: Point budget used to pick the resolution.
+            resolution: Force 'raw', 'hour', 'day' or 'month'.
+        
+        Returns:
+            tuple: (resolution, list of points as dicts with 'timestamp',
+                'avg', 'min', 'max', 'sum' and 'count').
+        """
+        resolution = resolution or choose_resolution(start, end, max_points)
+        
+        if resolution == 'raw':
+            rows = db.session.execute(
+                db.select(EnergyData.timestamp, EnergyData.value)
+                .where(EnergyData.source_id == source_id,
+                       EnergyData.measurement_type == measurement_type,
+                       EnergyData.timestamp >= start, EnergyData.timestamp < end)
+                .order_by(EnergyData.timestamp)
+            )
+            return resolution, [{
+                'timestamp': row.timestamp, 'avg': row.value, 'min': row.value,
+                'max': row.value, 'sum': row.value, 'count': 1,
+            } for row in rows]
+        
+        rows = db.session.execute(
+            db.select(cls.bucket, cls.value_sum, cls.value_count, cls.value_min, cls.value_max)
+            .where(cls.resolution == resolution, cls.source_id == source_id,
+                   cls.measurement_type == measurement_type,
+                   cls.bucket >= bucket_start(resolution, start), cls.bucket < end)
+            .order_by(cls.bucket)
+        )
+        return resolution, [{
+            'timestamp': row.bucket,
+            'avg': row.value_sum / row.value_count if row.value_count else None,
+            'min': row.value_min,
+            'max': row.value_max,
+            'sum': row.value_sum,
+            'count': row.value_count,
+        } for row in rows]
@@ -1,6 +1,30 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from blinker import Namespace
 from ..extensions import db
 
+_signals = Namespace()
+
+# Émis après qu'une écriture d'indicateurs a inséré ou modifié des lignes,
+# avec les arguments stats, indicator_ids, categories et committed_at
+indicators_committed = _signals.signal('indicators-committed')
+
+
+def _dialect_insert(table):
+    """Retourne un ``INSERT`` propre au dialecte courant.
+    
+    Les constructions PostgreSQL et SQLite exposent ``on_conflict_do_nothing``
+    et ``on_conflict_do_update``. Retourne None pour les autres dialectes.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(table)
+
+
 class EconomicIndicator(db.Model):
     """Modèle pour les indicateurs économiques.
     
@@ -9,106 +33,213 @@ class EconomicIndicator(db.Model):
     __tablename__ = 'economic_indicators'
     
     id = db.Column(db.Integer, primary_key=True)
-    indicator_id = db.Column(db.String(50), nullable=False, index=True)
+    indicator_id = db.Column(db.String(50), nullable=False)
     name = db.Column(db.String(200), nullable=False)
     value = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(50))
     date = db.Column(db.Date, nullable=False, index=True)
     source = db.Column(db.String(200))
-    category = db.Column(db.String(50), index=True, nullable=True)
+    category = db.Column(db.String(50), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relation avec les métadonnées
     metadata_id = db.Column(db.Integer, db.ForeignKey('indicator_metadata.id'), nullable=True)
     
+    # Index pour les requêtes courantes
+    __table_args__ = (
+        # Une seule valeur par indicateur et par date, garantie par la base
+        db.Index('uq_economic_indicators_indicator_date', indicator_id, date, unique=True),
+        # Index couvrant pour les derniers indicateurs d'une catégorie
+        db.Index('ix_economic_indicators_category_date', category, date.desc(),
+                 postgresql_include=['indicator_id', 'value']),
+    )
+    
     def __repr__(self):
         return f"<EconomicIndicator {self.indicator_id}: {self.name} = {self.value} {self.unit} ({self.date})>"
 
-
-class IndicatorMetadata(db.Model):
-    """Métadonnées pour les indicateurs économiques.
-    
-    Cette classe stocke des informations supplémentaires sur les indicateurs
-    qui ne changent pas à chaque mise à jour des données.
-    """
-    __tablename__ = 'indicator_metadata'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    indicator_id = db.Column(db.String(50), unique=True, nullable=False, index=True)
-    description = db.Column(db.Text)
-    frequency = db.Column(db.String(50))  # e.g., "daily", "monthly", "quarterly", "yearly"
-    source = db.Column(db.String(200))
-    last_updated = db.Column(db.DateTime)
-    
-    # Relation avec les indicateurs
-    indicators = db.relationship('EconomicIndicator', backref='metadata_ref', lazy=True)
-    
-    def __repr__(self):
-        return f"<IndicatorMetadata {self.indicator_id}: {self.description[:50]}...>"
-    
     @classmethod
     def save_from_dict(cls, data: dict):
         """Sauvegarde les indicateurs à partir d'un dictionnaire.
         
+        Les indicateurs déjà présents pour la même date sont ignorés.
+        
         Args:
             data (dict): Dictionnaire contenant les données des indicateurs à sauvegarder.
                 Doit contenir les clés 'date' et 'indicators'.
                 La clé 'source' est optionnelle (par défaut: 'unknown').
                 Chaque entrée dans 'indicators' doit avoir une clé d'identifiant
                 et une valeur contenant au moins 'value'.
+                
+        Returns:
+            dict: Nombre de lignes insérées, mises à jour et ignorées.
         """
-        if not data or 'date' not in data or 'indicators' not in data:
-            return
+        return cls.bulk_save_from_dicts([data], update_existing=False)
+    
+    @classmethod
+    def bulk_save_from_dicts(cls, payloads, update_existing=True, batch_size=500):
+        """Sauvegarde en masse plusieurs charges utiles datées.
+        
+        Chaque lot est traité de manière ensembliste : une requête pour résoudre
+        les métadonnées, une pour les couples (indicator_id, date) existants,
+        puis un unique ``INSERT ... ON CONFLICT (indicator_id, date)`` qui
+        s'appuie sur la contrainte d'unicité de la table.
+        
+        Args:
+            payloads (Iterable[dict]): Charges utiles au format de ``save_from_dict``.
+            update_existing (bool, optional): Met à jour la valeur des lignes
+                existantes si elle a changé. Par défaut True.
+            batch_size (int, optional): Nombre de lignes par lot. Par défaut 500.
             
-        date = datetime.strptime(data['date'], "%Y-%m-%d").date()
-        source = data.get('source', 'unknown')
+        Returns:
+            dict: Nombre de lignes insérées ('inserted'), mises à jour ('updated')
+                et ignorées ('skipped').
+        """
+        stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        rows, metadata_specs = cls._rows_from_payloads(payloads)
+        if not rows:
+            return stats
+        
+        written = []
+        for start in range(0, len(rows), batch_size):
+            written.extend(cls._write_batch(rows[start:start + batch_size], metadata_specs,
+                                            update_existing, stats))
+        
+        db.session.commit()
+        if written:
+            indicators_committed.send(
+                cls,
+                stats=stats,
+                indicator_ids={row['indicator_id'] for row in written},
+                categories={row['category'] for row in written},
+                committed_at=datetime.utcnow()
+            )
+        return stats
+    
+    @classmethod
+    def _rows_from_payloads(cls, payloads):
+        """Aplatit les charges utiles en lignes, dédoublonnées par (indicator_id, date).
         
-        for indicator_id, details in data['indicators'].items():
-            full_indicator_id = f"{source.lower()}_{indicator_id}"
+        Returns:
+            tuple: Liste des lignes et dictionnaire des métadonnées à créer,
+                indexé par indicator_id.
+        """
+        rows = {}
+        metadata_specs = {}
+        
+        for data in payloads:
+            if not data or 'date' not in data or 'indicators' not in data:
+                continue
             
-            # Vérifier si l'indicateur existe déjà pour cette date
-            exists = cls.query.filter_by(
-                indicator_id=full_indicator_id,
-                date=date
-            ).first()
+            date = datetime.strptime(data['date'], "%Y-%m-%d").date()
+            source = data.get('source') or 'unknown'
             
-            if not exists:
-                # Vérifier s'il existe des métadonnées pour cet indicateur
-                metadata = IndicatorMetadata.query.filter_by(
-                    indicator_id=full_indicator_id
-                ).first()
-                
-                # Créer les métadonnées si elles n'existent pas
-                if not metadata and 'description' in details:
-                    metadata = IndicatorMetadata(
-                        indicator_id=full_indicator_id,
-                        description=details.get('description', ''),
-                        frequency=details.get('frequency', 'unknown'),
-                        source=source,
-                        last_updated=datetime.utcnow()
-                    )
-                    db.session.add(metadata)
-                    db.session.flush()  # Pour obtenir l'ID de la nouvelle métadonnée
+            for indicator_id, details in data['indicators'].items():
+                full_indicator_id = f"{source.lower()}_{indicator_id}"
+                rows[(full_indicator_id, date)] = {
+                    'indicator_id': full_indicator_id,
+                    'name': details.get('name', details.get('description', indicator_id)),
+                    'value': details['value'],
+                    'unit': details.get('unit', ''),
+                    'date': date,
+                    'source': source,
+                    'category': details.get('category', 'general'),
+                }
                 
-                # Créer l'indicateur
-                indicator = cls(
-                    indicator_id=full_indicator_id,
-                    name=details.get('name', details.get('description', indicator_id)),
-                    value=details['value'],
-                    unit=details.get('unit', ''),
-                    date=date,
-                    source=source,
-                    category=details.get('category', 'general'),
-                    metadata_id=metadata.id if metadata else None
+                if 'description' in details and full_indicator_id not in metadata_specs:
+                    metadata_specs[full_indicator_id] = {
+                        'indicator_id': full_indicator_id,
+                        'description': details.get('description', ''),
+                        'frequency': details.get('frequency', 'unknown'),
+                        'source': source,
+                    }
+        
+        return list(rows.values()), metadata_specs
+    
+    @classmethod
+    def _write_batch(cls, batch, metadata_specs, update_existing, stats):
+        """Écrit un lot de lignes et met à jour les compteurs ``stats``.
+        
+        Returns:
+            list[dict]: Lignes insérées ou mises à jour.
+        """
+        now = datetime.utcnow()
+        table = cls.__table__
+        indicator_ids = {row['indicator_id'] for row in batch}
+        
+        # Résolution des métadonnées en une requête (plus une pour les créations)
+        metadata_ids = IndicatorMetadata.resolve_ids(indicator_ids, metadata_specs, now)
+        
+        # Couples (indicator_id, date) déjà présents
+        existing = {
+            (r.indicator_id, r.date): r
+            for r in db.session.query(
+                cls.id, cls.indicator_id, cls.date, cls.value, cls.unit, cls.name
+            ).filter(
+                db.tuple_(cls.indicator_id, cls.date).in_(
+                    [(row['indicator_id'], row['date']) for row in batch]
                 )
-                db.session.add(indicator)
-                
-                # Mettre à jour la date de dernière mise à jour des métadonnées
-                if metadata:
-                    metadata.last_updated = datetime.utcnow()
+            )
+        }
         
-        db.session.commit()
+        to_insert = []
+        to_update = []
+        for row in batch:
+            row['metadata_id'] = metadata_ids.get(row['indicator_id'])
+            current = existing.get((row['indicator_id'], row['date']))
+            
+            if current is None:
+                to_insert.append(dict(row, created_at=now, updated_at=now))
+            elif update_existing and (current.value, current.unit, current.name) != \
+                    (row['value'], row['unit'], row['name']):
+                to_update.append(dict(row, created_at=now, updated_at=now))
+            else:
+                stats['skipped'] += 1
+        
+        if not to_insert and not to_update:
+            return []
+        
+        stmt = _dialect_insert(table)
+        if stmt is not None:
+            # L'unicité (indicator_id, date) est garantie par la base : une
+            # collecte concurrente ne peut pas créer de doublon.
+            if update_existing:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['indicator_id', 'date'],
+                    set_={
+                        'value': stmt.excluded.value,
+                        'unit': stmt.excluded.unit,
+                        'name': stmt.excluded.name,
+                        'metadata_id': stmt.excluded.metadata_id,
+                        'updated_at': stmt.excluded.updated_at,
+                    }
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=['indicator_id', 'date'])
+            db.session.execute(stmt.values(to_insert + to_update))
+        else:
+            if to_insert:
+                db.session.execute(table.insert().values(to_insert))
+            for row in to_update:
+                db.session.execute(
+                    table.update()
+                    .where(table.c.indicator_id == row['indicator_id'], table.c.date == row['date'])
+                    .values(value=row['value'], unit=row['unit'], name=row['name'],
+                            metadata_id=row['metadata_id'], updated_at=row['updated_at'])
+                )
+        
+        stats['inserted'] += len(to_insert)
+        stats['updated'] += len(to_update)
+        
+        touched = {row['indicator_id'] for row in to_insert + to_update}
+        if touched:
+            db.session.execute(
+                IndicatorMetadata.__table__.update()
+                .where(IndicatorMetadata.__table__.c.indicator_id.in_(touched))
+                .values(last_updated=now)
+            )
+        
+        return to_insert + to_update
     
     def to_dict(self):
         """Convertit l'objet en dictionnaire pour la sérialisation JSON.
@@ -134,6 +265,23 @@ class IndicatorMetadata(db.Model):
             } if self.metadata_ref or self.metadata_id else None
         }
         
+    @classmethod
+    def _query_options(cls, include_metadata=False):
+        """Options de chargement communes aux requêtes de lecture.
+        
+        Args:
+            include_metadata (bool, optional): Charger les métadonnées par jointure.
+            
+        Returns:
+            list: Options à passer à ``Query.options``.
+        """
+        if include_metadata:
+            return [db.joinedload(cls.metadata_ref)]
+        return [db.load_only(
+            cls.id, cls.indicator_id, cls.name, cls.value, cls.unit, cls.date,
+            cls.source, cls.category, cls.metadata_id, cls.created_at, cls.updated_at
+        )]
+    
     @classmethod
     def get_latest_indicators(cls, limit=10, include_metadata=False):
         """Récupère les derniers indicateurs économiques par date.
@@ -145,20 +293,16 @@ class IndicatorMetadata(db.Model):
         Returns:
             list[EconomicIndicator]: Liste des indicateurs triés par date décroissante.
         """
-        query = cls.query.options(
-            db.joinedload(cls.metadata_ref)
-        ).order_by(cls.date.desc(), cls.indicator_id).limit(limit)
-        
-        if include_metadata:
-            return query.all()
-        return query.options(db.load_only(
-            'id', 'indicator_id', 'name', 'value', 'unit', 'date', 'source', 'category'
-        )).all()
+        return cls.query.options(*cls._query_options(include_metadata))\
+            .order_by(cls.date.desc(), cls.indicator_id).limit(limit).all()
     
     @classmethod
     def get_indicators_by_category(cls, category, limit=10, include_metadata=False):
         """Récupère les derniers indicateurs d'une catégorie spécifique.
         
+        Parcourt l'index ``(category, date DESC)`` dans l'ordre ; ``indicator_id``
+        départage les indicateurs d'une même date, pour un résultat stable.
+        
         Args:
             category (str): Catégorie des indicateurs à récupérer.
             limit (int, optional): Nombre maximum d'indicateurs à retourner. Par défaut 10.
@@ -167,20 +311,16 @@ class IndicatorMetadata(db.Model):
         Returns:
             list[EconomicIndicator]: Liste des indicateurs de la catégorie triés par date décroissante.
         """
-        query = cls.query.filter_by(category=category).options(
-            db.joinedload(cls.metadata_ref)
-        ).order_by(cls.date.desc(), cls.indicator_id).limit(limit)
-        
-        if include_metadata:
-            return query.all()
-        return query.options(db.load_only(
-            'id', 'indicator_id', 'name', 'value', 'unit', 'date', 'source', 'category'
-        )).all()
+        return cls.query.filter(cls.category == category)\
+            .options(*cls._query_options(include_metadata))\
+            .order_by(cls.date.desc(), cls.indicator_id).limit(limit).all()
     
     @classmethod
     def get_indicator_history(cls, indicator_id, days=365, include_metadata=False):
         """Récupère l'historique d'un indicateur spécifique.
         
+        Parcourt l'index unique ``(indicator_id, date)`` sur l'intervalle demandé.
+        
         Args:
             indicator_id (str): ID de l'indicateur.
             days (int, optional): Nombre de jours d'historique à récupérer. Par défaut 365.
@@ -189,21 +329,123 @@ class IndicatorMetadata(db.Model):
         Returns:
             list[EconomicIndicator]: Liste des valeurs historiques de l'indicateur.
         """
-        from datetime import datetime, timedelta
-        
-        date_limit = datetime.utcnow() - timedelta(days=days)
-        query = cls.query.filter(
+        date_limit = (datetime.utcnow() - timedelta(days=days)).date()
+        return cls.query.filter(
             cls.indicator_id == indicator_id,
             cls.date >= date_limit
-        ).options(
-            db.joinedload(cls.metadata_ref)
-        ).order_by(cls.date.asc())
+        ).options(*cls._query_options(include_metadata))\
+            .order_by(cls.date.asc()).all()
+    
+    @classmethod
+    def _history_query(cls, indicator_id, start=None, end=None):
+        """Requête des points d'un indicateur, triés par (date, id).
         
-        if include_metadata:
-            return query.all()
-        return query.options(db.load_only(
-            'id', 'indicator_id', 'name', 'value', 'unit', 'date', 'source', 'category'
-        )).all()
+        Ne charge que les colonnes utiles, sans hydrater d'objets ORM.
+        """
+        query = db.session.query(cls.id, cls.date, cls.value, cls.unit)\
+            .filter(cls.indicator_id == indicator_id)
+        if start is not None:
+            query = query.filter(cls.date >= start)
+        if end is not None:
+            query = query.filter(cls.date <= end)
+        return query.order_by(cls.date.asc(), cls.id.asc())
+    
+    @classmethod
+    def get_history_page(cls, indicator_id, start=None, end=None, after=None, limit=100):
+        """Récupère une page de l'historique d'un indicateur (pagination par clé).
+        
+        Args:
+            indicator_id (str): ID de l'indicateur.
+            start (date, optional): Date de début incluse.
+            end (date, optional): Date de fin incluse.
+            after (tuple, optional): Curseur (date, id) du dernier point déjà reçu.
+            limit (int, optional): Nombre maximum de points. Par défaut 100.
+            
+        Returns:
+            tuple: Liste des points (id, date, value, unit) et curseur (date, id)
+                de la page suivante, ou None s'il s'agit de la dernière page.
+        """
+        query = cls._history_query(indicator_id, start, end)
+        if after is not None:
+            query = query.filter(db.tuple_(cls.date, cls.id) > db.tuple_(*after))
+        
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            return rows[:limit], (last.date, last.id)
+        return rows, None
+    
+    @classmethod
+    def iter_history(cls, indicator_id, start=None, end=None, chunk_size=1000):
+        """Parcourt l'historique d'un indicateur avec un curseur côté serveur.
+        
+        Les lignes sont lues par blocs de ``chunk_size`` : la mémoire utilisée
+        reste constante quelle que soit la longueur de la série.
+        
+        Args:
+            indicator_id (str): ID de l'indicateur.
+            start (date, optional): Date de début incluse.
+            end (date, optional): Date de fin incluse.
+            chunk_size (int, optional): Taille des blocs lus. Par défaut 1000.
+            
+        Yields:
+            Row: Points (id, date, value, unit) dans l'ordre chronologique.
+        """
+        yield from cls._history_query(indicator_id, start, end).yield_per(chunk_size)
+    
+    @classmethod
+    def latest_with_previous(cls, indicator_ids=None):
+        """Récupère la dernière et l'avant-dernière valeur de chaque indicateur.
+        
+        Une seule requête avec ``ROW_NUMBER() OVER (PARTITION BY indicator_id
+        ORDER BY date DESC)``, quel que soit le nombre d'indicateurs demandés.
+        
+        Args:
+            indicator_ids (Iterable[str], optional): IDs des indicateurs. Par défaut
+                tous les indicateurs.
+            
+        Returns:
+            dict: Par indicator_id, un dictionnaire avec 'name', 'value', 'unit',
+                'date', 'previous_value', 'previous_date', 'change' (écart absolu)
+                et 'change_pct' (variation relative en %, None si non calculable).
+        """
+        rank = db.func.row_number().over(
+            partition_by=cls.indicator_id,
+            order_by=cls.date.desc()
+        ).label('rank')
+        ranked = db.session.query(
+            cls.indicator_id, cls.name, cls.value, cls.unit, cls.date, rank
+        )
+        if indicator_ids is not None:
+            ranked = ranked.filter(cls.indicator_id.in_(list(indicator_ids)))
+        ranked = ranked.subquery()
+        
+        rows = db.session.query(ranked).filter(ranked.c.rank <= 2)\
+            .order_by(ranked.c.indicator_id, ranked.c.rank)
+        
+        snapshot = {}
+        for row in rows:
+            if row.rank == 1:
+                snapshot[row.indicator_id] = {
+                    'name': row.name,
+                    'value': row.value,
+                    'unit': row.unit,
+                    'date': row.date,
+                    'previous_value': None,
+                    'previous_date': None,
+                    'change': None,
+                    'change_pct': None,
+                }
+                continue
+            
+            latest = snapshot[row.indicator_id]
+            latest['previous_value'] = row.value
+            latest['previous_date'] = row.date
+            latest['change'] = latest['value'] - row.value
+            if row.value:
+                latest['change_pct'] = (latest['change'] / row.value) * 100
+        
+        return snapshot
     
     @classmethod
     def get_indicator_metadata(cls, indicator_id):
@@ -227,4 +469,65 @@ class IndicatorMetadata(db.Model):
         categories = db.session.query(
             cls.category.distinct().label('category')
         ).filter(cls.category.isnot(None)).order_by('category').all()
-        return [c.category for c in categories]
\ No newline at end of file
+        return [c.category for c in categories]
+
+
+class IndicatorMetadata(db.Model):
+    """Métadonnées pour les indicateurs économiques.
+    
+    Cette classe stocke des informations supplémentaires sur les indicateurs
+    qui ne changent pas à chaque mise à jour des données.
+    """
+    __tablename__ = 'indicator_metadata'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    indicator_id = db.Column(db.String(50), unique=True, nullable=False, index=True)
+    description = db.Column(db.Text)
+    frequency = db.Column(db.String(50))  # e.g., "daily", "monthly", "quarterly", "yearly"
+    source = db.Column(db.String(200))
+    last_updated = db.Column(db.DateTime)
+    
+    # Relation avec les indicateurs
+    indicators = db.relationship('EconomicIndicator', backref='metadata_ref', lazy=True)
+    
+    def __repr__(self):
+        return f"<IndicatorMetadata {self.indicator_id}: {self.description[:50]}...>"
+    
+    @classmethod
+    def resolve_ids(cls, indicator_ids, specs=None, now=None):
+        """Résout les IDs de métadonnées pour un ensemble d'indicateurs.
+        
+        Les métadonnées manquantes décrites dans ``specs`` sont créées en un
+        seul ``INSERT``.
+        
+        Args:
+            indicator_ids (Iterable[str]): IDs des indicateurs.
+            specs (dict, optional): Métadonnées à créer, indexées par indicator_id.
+            now (datetime, optional): Horodatage de création.
+            
+        Returns:
+            dict: Correspondance indicator_id -> id des métadonnées.
+        """
+        indicator_ids = set(indicator_ids)
+        resolved = dict(
+            db.session.query(cls.indicator_id, cls.id)
+            .filter(cls.indicator_id.in_(indicator_ids))
+        )
+        
+        missing = [
+            dict(specs[i], last_updated=now or datetime.utcnow())
+            for i in indicator_ids - set(resolved) if specs and i in specs
+        ]
+        if missing:
+            stmt = _dialect_insert(cls.__table__)
+            if stmt is not None:
+                stmt = stmt.on_conflict_do_nothing(index_elements=['indicator_id'])
+            else:
+                stmt = cls.__table__.insert()
+            db.session.execute(stmt.values(missing))
+            resolved.update(
+                db.session.query(cls.indicator_id, cls.id)
+                .filter(cls.indicator_id.in_([m['indicator_id'] for m in missing]))
+            )
+        
+        return resolved
@@ -0,0 +1,60 @@
+"""
+Modèle de la file de tâches durable (exécutées par ``flask worker``).
+"""
+from datetime import datetime
+
+from sqlalchemy import JSON
+
+from ..extensions import db
+
+
+class TaskJob(db.Model):
+    """Tâche en file d'attente.
+
+    Une tâche 'queued' devient 'running' quand un worker la réserve, jusqu'à
+    ``locked_until`` (délai de visibilité) : passé ce délai, une tâche dont le
+    worker a disparu est de nouveau disponible. Après un échec, elle revient
+    en 'queued' avec un délai exponentiel, jusqu'à ``max_attempts`` essais ;
+    elle finit alors en 'failed'.
+    """
+    __tablename__ = 'task_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # Nom de la tâche enregistrée
+    args = db.Column(JSON, default=list)
+    kwargs = db.Column(JSON, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'succeeded', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Pas d'exécution avant
+    locked_until = db.Column(db.DateTime)  # Fin de la réservation par un worker
+    locked_by = db.Column(db.String(100))  # Identifiant du worker
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_task_jobs_status_available', 'status', 'available_at'),
+    )
+
+    def __repr__(self):
+        return f'<TaskJob {self.name} {self.status}>'
+
+    def to_dict(self):
+        """Convertit l'objet en dictionnaire."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'args': self.args,
+            'kwargs': self.kwargs,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'available_at': self.available_at.isoformat() if self.available_at else None,
+            'locked_by': self.locked_by,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -24,6 +24,11 @@ class TradeData(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Candle backfills read trades by asset and time range
+    __table_args__ = (
+        db.Index('ix_trade_data_asset_timestamp', 'asset', 'timestamp'),
+    )
+    
     def __repr__(self):
         return f'<TradeData {self.side} {self.amount} {self.asset} @ {self.price} on {self.timestamp}>'
     
@@ -44,3 +49,105 @@ class TradeData(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
+
+
+class TradeCandle(db.Model):
+    """OHLCV candle of completed trades for one asset and interval.
+    
+    ``first_trade_at`` and ``last_trade_at`` let partial candles be merged
+    incrementally: the open comes from the earliest trade, the close from the
+    latest one (see ``services.candles``).
+    """
+    __tablename__ = 'trade_candles'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    asset = db.Column(db.String(50), nullable=False)
+    interval = db.Column(db.String(5), nullable=False)  # '1m', '5m', '1h' or '1d'
+    timestamp = db.Column(db.DateTime, nullable=False)  # Start of the candle
+    open = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.Float, nullable=False, default=0.0)  # Sum of traded amounts
+    trade_count = db.Column(db.Integer, nullable=False, default=0)
+    first_trade_at = db.Column(db.DateTime, nullable=False)
+    last_trade_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('asset', 'interval', 'timestamp', name='uq_trade_candles_asset_interval_timestamp'),
+    )
+    
+    def __repr__(self):
+        return f'<TradeCandle {self.asset} {self.interval} at {self.timestamp}>'
+    
+    def to_dict(self):
+        """Convert the candle to dictionary for JSON serialization."""
+        return {
+            'timestamp': self.timestamp.isoformat(),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'trade_count': self.trade_count
+        }
+
+
+class PortfolioPosition(db.Model):
+    """Materialized position of a user in one asset.
+    
+    Maintained incrementally from completed trades (see ``services.portfolio``),
+    so portfolio reads touch one row per asset instead of replaying every
+    trade. Realized P&L is tracked with both the average-cost and the FIFO
+    methods; ``fifo_lots`` holds the open FIFO lots as ``[amount, unit_cost]``.
+    """
+    __tablename__ = 'portfolio_positions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    asset = db.Column(db.String(50), nullable=False)
+    quantity = db.Column(db.Float, nullable=False, default=0.0)
+    cost_basis = db.Column(db.Float, nullable=False, default=0.0)  # Average-cost basis of the quantity held
+    realized_pnl_avg = db.Column(db.Float, nullable=False, default=0.0)  # Realized P&L, average cost
+    realized_pnl_fifo = db.Column(db.Float, nullable=False, default=0.0)  # Realized P&L, FIFO
+    fees = db.Column(db.Float, nullable=False, default=0.0)  # Total fees paid
+    fifo_lots = db.Column(db.JSON, nullable=False, default=list)
+    trade_count = db.Column(db.Integer, nullable=False, default=0)
+    last_trade_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'asset', name='uq_portfolio_positions_user_asset'),
+    )
+    
+    def __repr__(self):
+        return f'<PortfolioPosition user={self.user_id} {self.quantity} {self.asset}>'
+    
+    @property
+    def average_price(self):
+        """Average cost per unit of the quantity held."""
+        return self.cost_basis / self.quantity if self.quantity else None
+    
+    def to_dict(self, last_price=None):
+        """Convert the position to dictionary for JSON serialization.
+        
+        Args:
+            last_price: Latest market price, used for the unrealized P&L.
+        """
+        fifo_cost = sum(amount * unit_cost for amount, unit_cost in self.fifo_lots or [])
+        return {
+            'asset': self.asset,
+            'quantity': self.quantity,
+            'average_price': self.average_price,
+            'cost_basis': self.cost_basis,
+            'realized_pnl_avg': self.realized_pnl_avg,
+            'realized_pnl_fifo': self.realized_pnl_fifo,
+            'unrealized_pnl_avg': self.quantity * last_price - self.cost_basis
+                if last_price is not None else None,
+            'unrealized_pnl_fifo': self.quantity * last_price - fifo_cost
+                if last_price is not None else None,
+            'last_price': last_price,
+            'fees': self.fees,
+            'trade_count': self.trade_count,
+            'last_trade_at': self.last_trade_at.isoformat() if self.last_trade_at else None
+        }
@@ -0,0 +1,239 @@
+"""
+Agrégation des transactions (TradeData) en bougies OHLCV.
+
+Les bougies (1m, 5m, 1h, 1d) sont stockées dans ``trade_candles`` et
+maintenues de deux façons :
+
+- en continu : chaque transaction 'completed' insérée via la session est
+  fusionnée dans ses bougies lors du flush, dans la même transaction ;
+- par rattrapage (``backfill_candles``) : les transactions sont lues par
+  blocs et agrégées de façon vectorisée avec pandas, puis fusionnées.
+
+La fusion est commutative : une bougie partielle est combinée avec la bougie
+existante (plus haut, plus bas, volume, nombre de transactions), l'ouverture
+et la clôture étant celles des transactions les plus anciennes et les plus
+récentes. Les modifications ou suppressions de transactions existantes ne
+sont pas suivies : un rattrapage sur la période les prend en compte.
+"""
+import logging
+
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models.ma_economy import _dialect_insert
+from ..models.trade import TradeData, TradeCandle
+
+logger = logging.getLogger(__name__)
+
+# Intervalles des bougies et fréquence pandas correspondante
+CANDLE_INTERVALS = {
+    '1m': '1min',
+    '5m': '5min',
+    '1h': '1h',
+    '1d': '1D',
+}
+BACKFILL_CHUNK_SIZE = 100000
+
+_CANDLE_COLUMNS = ['asset', 'interval', 'timestamp', 'open', 'high', 'low', 'close',
+                   'volume', 'trade_count', 'first_trade_at', 'last_trade_at']
+
+
+def compute_candles(trades, intervals=tuple(CANDLE_INTERVALS)):
+    """Agrège des transactions en bougies OHLCV partielles.
+
+    Args:
+        trades (pandas.DataFrame): Colonnes 'asset', 'timestamp', 'price' et 'amount'.
+        intervals (Iterable[str], optional): Intervalles à calculer.
+
+    Returns:
+        list[dict]: Une bougie par (actif, intervalle, début de période).
+    """
+    if trades.empty:
+        return []
+
+    trades = trades.sort_values('timestamp', kind='stable')
+    frames = []
+    for interval in intervals:
+        bucket = trades['timestamp'].dt.floor(CANDLE_INTERVALS[interval])
+        candles = trades.groupby(['asset', bucket], sort=False).agg(
+            open=('price', 'first'),
+            high=('price', 'max'),
+            low=('price', 'min'),
+            close=('price', 'last'),
+            volume=('amount', 'sum'),
+            trade_count=('price', 'size'),
+            first_trade_at=('timestamp', 'min'),
+            last_trade_at=('timestamp', 'max'),
+        ).reset_index()
+        candles['interval'] = interval
+        frames.append(candles)
+
+    candles = pd.concat(frames, ignore_index=True)[_CANDLE_COLUMNS]
+    return [{
+        **row,
+        'timestamp': row['timestamp'].to_pydatetime(),
+        'first_trade_at': row['first_trade_at'].to_pydatetime(),
+        'last_trade_at': row['last_trade_at'].to_pydatetime(),
+        'trade_count': int(row['trade_count']),
+    } for row in candles.to_dict('records')]
+
+
+def merge_candles(candles, connection=None):
+    """Fusionne des bougies partielles dans ``trade_candles``, sans valider.
+
+    Args:
+        candles (list[dict]): Bougies produites par ``compute_candles``.
+        connection (optional): Connexion à utiliser (par défaut la session).
+    """
+    if not candles:
+        return
+    execute = (connection or db.session).execute
+
+    table = TradeCandle.__table__
+    stmt = _dialect_insert(table)
+    if stmt is not None:
+        # MIN/MAX à deux arguments sont scalaires sous SQLite ; PostgreSQL
+        # utilise LEAST/GREATEST
+        if db.engine.dialect.name == 'postgresql':
+            least, greatest = db.func.least, db.func.greatest
+        else:
+            least, greatest = db.func.min, db.func.max
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['asset', 'interval', 'timestamp'],
+            set_={
+                'open': db.case(
+                    (stmt.excluded.first_trade_at < table.c.first_trade_at, stmt.excluded.open),
+                    else_=table.c.open
+                ),
+                'close': db.case(
+                    (stmt.excluded.last_trade_at >= table.c.last_trade_at, stmt.excluded.close),
+                    else_=table.c.close
+                ),
+                'high': greatest(table.c.high, stmt.excluded.high),
+                'low': least(table.c.low, stmt.excluded.low),
+                'volume': table.c.volume + stmt.excluded.volume,
+                'trade_count': table.c.trade_count + stmt.excluded.trade_count,
+                'first_trade_at': least(table.c.first_trade_at, stmt.excluded.first_trade_at),
+                'last_trade_at': greatest(table.c.last_trade_at, stmt.excluded.last_trade_at),
+            }
+        )
+        execute(stmt, candles)
+        return
+
+    # Autres dialectes : lecture puis écriture
+    for candle in candles:
+        existing = execute(
+            db.select(table).where(
+                table.c.asset == candle['asset'],
+                table.c.interval == candle['interval'],
+                table.c.timestamp == candle['timestamp']
+            ).with_for_update()
+        ).mappings().first()
+        if existing is None:
+            execute(table.insert(), candle)
+            continue
+        execute(table.update().where(table.c.id == existing['id']).values(
+            open=candle['open'] if candle['first_trade_at'] < existing['first_trade_at']
+            else existing['open'],
+            close=candle['close'] if candle['last_trade_at'] >= existing['last_trade_at']
+            else existing['close'],
+            high=max(existing['high'], candle['high']),
+            low=min(existing['low'], candle['low']),
+            volume=existing['volume'] + candle['volume'],
+            trade_count=existing['trade_count'] + candle['trade_count'],
+            first_trade_at=min(existing['first_trade_at'], candle['first_trade_at']),
+            last_trade_at=max(existing['last_trade_at'], candle['last_trade_at'])
+        ))
+
+
+def trades_frame(trades):
+    """Construit le DataFrame attendu par ``compute_candles`` à partir de transactions."""
+    return pd.DataFrame(
+        [(t.asset, t.timestamp, t.price, t.amount) for t in trades],
+        columns=['asset', 'timestamp', 'price', 'amount']
+    )
+
+
+def backfill_candles(asset=None, start=None, end=None, chunk_size=BACKFILL_CHUNK_SIZE):
+    """Recalcule les bougies à partir des transactions enregistrées.
+
+    Les bougies de la période (alignée sur le jour) sont supprimées puis
+    reconstruites, bloc de transactions par bloc de transactions.
+
+    Args:
+        asset (str, optional): Actif à recalculer (tous par défaut).
+        start (datetime, optional): Début de la période.
+        end (datetime, optional): Fin de la période (exclue).
+        chunk_size (int, optional): Nombre de transactions lues par bloc.
+
+    Returns:
+        int: Nombre de transactions agrégées.
+    """
+    if start is not None:
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if end is not None and end != end.replace(hour=0, minute=0, second=0, microsecond=0):
+        # Une bougie journalière ne doit pas être reconstruite à moitié
+        end = end.replace(hour=0, minute=0, second=0, microsecond=0) + pd.Timedelta(days=1)
+
+    trades = db.select(TradeData.asset, TradeData.timestamp, TradeData.price, TradeData.amount)\
+        .where(TradeData.status == 'completed')
+    candles = TradeCandle.query
+    if asset:
+        trades = trades.where(TradeData.asset == asset)
+        candles = candles.filter(TradeCandle.asset == asset)
+    if start is not None:
+        trades = trades.where(TradeData.timestamp >= start)
+        candles = candles.filter(TradeCandle.timestamp >= start)
+    if end is not None:
+        trades = trades.where(TradeData.timestamp < end)
+        candles = candles.filter(TradeCandle.timestamp < end)
+
+    count = 0
+    try:
+        candles.delete(synchronize_session=False)
+        result = db.session.execute(trades.execution_options(stream_results=True,
+                                                             yield_per=chunk_size))
+        for rows in result.partitions(chunk_size):
+            frame = pd.DataFrame(rows, columns=['asset', 'timestamp', 'price', 'amount'])
+            merge_candles(compute_candles(frame))
+            count += len(rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"Bougies recalculées à partir de {count} transactions")
+    return count
+
+
+def get_candles(asset, interval, start=None, end=None, limit=500):
+    """Retourne les bougies d'un actif, les plus récentes en dernier.
+
+    Args:
+        asset (str): Actif.
+        interval (str): Intervalle ('1m', '5m', '1h' ou '1d').
+        start (datetime, optional): Début de la période.
+        end (datetime, optional): Fin de la période (exclue).
+        limit (int, optional): Nombre maximal de bougies (les plus récentes).
+
+    Returns:
+        list[TradeCandle]: Bougies dans l'ordre chronologique.
+    """
+    query = TradeCandle.query.filter_by(asset=asset, interval=interval)
+    if start is not None:
+        query = query.filter(TradeCandle.timestamp >= start)
+    if end is not None:
+        query = query.filter(TradeCandle.timestamp < end)
+    candles = query.order_by(TradeCandle.timestamp.desc()).limit(limit).all()
+    return list(reversed(candles))
+
+
+@event.listens_for(Session, 'after_flush')
+def _merge_new_trades(session, flush_context):
+    """Fusionne dans les bougies les transactions insérées par ce flush."""
+    trades = [obj for obj in session.new
+              if isinstance(obj, TradeData) and obj.status == 'completed' and obj.timestamp]
+    if trades:
+        merge_candles(compute_candles(trades_frame(trades)), connection=session.connection())
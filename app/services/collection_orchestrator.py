@@ -0,0 +1,287 @@
+"""
+Orchestration concurrente des collectes de données.
+
+Toutes les sources (collecteurs marocains de ``COLLECTORS`` et sources du
+``DataCollector``) sont interrogées en parallèle sur un pool de threads
+borné, chacune avec son propre délai maximal. Les threads ne font que des
+appels réseau : toutes les écritures (exécutions, données brutes,
+indicateurs) sont faites ensuite dans le thread appelant et validées en une
+seule transaction. La durée d'un rafraîchissement complet est ainsi proche
+de celle de la source la plus lente, et non de la somme des sources.
+
+Les requêtes HTTP sont conditionnelles : les validateurs (ETag,
+Last-Modified) de chaque URL sont lus avant la collecte ; chaque source en
+reçoit sa propre copie, et seuls ceux des sources dont les données ont été
+enregistrées le sont, dans la même transaction. Un thread dont le délai est
+dépassé ne peut donc rien modifier de partagé. Une source qui répond 304 est
+enregistrée comme 'unchanged', sans analyse ni écriture de données.
+
+Les sources du registre déclaratif (``services.source_registry``) sont
+incrémentales : seules les observations à partir de la période de leur
+curseur sont demandées, et le curseur avance dans la même transaction que les données.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+
+from flask import current_app, has_app_context
+
+from ..extensions import db
+from ..models.data_collection import DataCollectionRun, CollectedData, HttpValidator, SourceCursor
+from ..models.ma_economy import EconomicIndicator
+from .data_collector import DataCollector, NOT_MODIFIED
+from .ma_data_collectors import COLLECTORS, get_collector
+from .source_registry import get_source
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_SOURCE_TIMEOUT = 60  # secondes
+
+
+class CollectionSource:
+    """Source de données à interroger par l'orchestrateur.
+
+    Attributes:
+        name: Nom de la source (utilisé dans les journaux et les résultats)
+        fetch: Fonction sans argument effectuant la collecte (sans accès à la base)
+        kind: 'indicators' pour une charge utile ``save_from_dict``,
+            'raw' pour des données brutes stockées dans ``CollectedData``
+        source_type: Type de source ('api' ou 'scraping') pour les sources brutes
+        data_type: Type de données pour les sources brutes
+        source_id: ID de la source d'origine pour les sources brutes
+        parameters: Paramètres enregistrés dans ``DataCollectionRun``
+        timeout: Délai maximal de la collecte, en secondes
+        cursor: (``SourceDefinition``, clé du curseur) pour une source
+            incrémentale, dont le curseur avance après l'enregistrement
+        validators: Validateurs HTTP propres à la source, mis à jour par ``fetch``
+    """
+
+    def __init__(self, name, fetch, kind='raw', source_type='api', data_type=None,
+                 source_id=None, parameters=None, timeout=None, cursor=None,
+                 validators=None):
+        self.name = name
+        self.fetch = fetch
+        self.kind = kind
+        self.source_type = source_type
+        self.data_type = data_type or name
+        self.source_id = source_id or name
+        self.parameters = parameters or {}
+        self.timeout = timeout
+        self.cursor = cursor
+        self.validators = validators
+
+    def __repr__(self):
+        return f'<CollectionSource {self.name} ({self.kind})>'
+
+
+def default_sources(config, simulation_mode=True, validators=None, cursors=None):
+    """Construit la liste de toutes les sources enregistrées.
+
+    Args:
+        config: Configuration de l'application (clés d'API)
+        simulation_mode: Mode simulation du ``DataCollector``
+        validators: Validateurs HTTP connus par URL, copiés pour chaque source
+        cursors: Curseurs des sources incrémentales (voir ``SourceCursor.load``)
+
+    Returns:
+        list[CollectionSource]: Sources marocaines puis sources du ``DataCollector``.
+    """
+    def make_collector():
+        # Un collecteur par source : les validateurs ne sont pas partagés entre threads
+        return DataCollector(
+            config={
+                'ELECTRICITY_MAP_API_KEY': config.get('ELECTRICITY_MAP_API_KEY', ''),
+                'EMPLOI_STORE_TOKEN': config.get('EMPLOI_STORE_TOKEN', ''),
+                'HTML_PARSER_BACKEND': config.get('HTML_PARSER_BACKEND'),
+            },
+            simulation_mode=simulation_mode,
+            validators=dict(validators or {}),
+            cursors=cursors
+        )
+
+    sources = [
+        CollectionSource(
+            name=key,
+            fetch=lambda key=key: get_collector(key).collect(),
+            kind='indicators'
+        )
+        for key in COLLECTORS
+    ]
+
+    collector = make_collector()
+    sources.append(CollectionSource(
+        name='electricity_map',
+        fetch=lambda collector=collector: collector.collect_energy_data('electricity_map', zone='FR'),
+        data_type='energy_production',
+        source_id='electricity_map_FR',
+        parameters={'zone': 'FR', 'data_type': 'energy_production'},
+        validators=collector.validators
+    ))
+
+    unemployment = get_source('unemployment_france')
+    for indicator_id, country in (('inflation', 'france'), ('unemployment', 'france')):
+        collector = make_collector()
+        sources.append(CollectionSource(
+            name=indicator_id,
+            fetch=lambda i=indicator_id, c=country, collector=collector:
+                collector.collect_economic_data(i, country=c),
+            source_type='scraping' if indicator_id == 'inflation' else 'api',
+            data_type=f'economic_{indicator_id}',
+            source_id=f'{indicator_id}_{country}',
+            parameters={'country': country, 'indicator': indicator_id},
+            cursor=(unemployment, unemployment.key()) if indicator_id == 'unemployment' else None,
+            validators=collector.validators
+        ))
+
+    return sources
+
+
+def _in_app_context(app, fetch):
+    """Exécute ``fetch`` dans le contexte de l'application (configuration, cache)."""
+    if app is None:
+        return fetch()
+    with app.app_context():
+        return fetch()
+
+
+def fetch_all(sources, max_workers=DEFAULT_MAX_WORKERS, default_timeout=DEFAULT_SOURCE_TIMEOUT):
+    """Interroge toutes les sources en parallèle.
+
+    Chaque source est exécutée dans le contexte de l'application appelante :
+    les paramètres de résilience de la configuration s'appliquent et l'état
+    des disjoncteurs est publié dans le cache partagé.
+
+    Le délai de chaque source court à partir de la soumission au pool. Un
+    thread dont le délai est dépassé n'est pas interrompu, mais son résultat
+    est ignoré et le pool est libéré sans l'attendre.
+
+    Args:
+        sources (list[CollectionSource]): Sources à interroger.
+        max_workers (int, optional): Nombre maximal de threads.
+        default_timeout (float, optional): Délai des sources qui n'en définissent pas.
+
+    Returns:
+        dict: Par nom de source, un dictionnaire avec 'status' ('completed',
+            'unchanged', 'empty', 'failed' ou 'timeout'), 'data', 'error' et 'duration'.
+    """
+    results = {}
+    if not sources:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(sources)),
+                                  thread_name_prefix='collect')
+    started = time.monotonic()
+    app = current_app._get_current_object() if has_app_context() else None
+    futures = [(source, executor.submit(_in_app_context, app, source.fetch)) for source in sources]
+
+    try:
+        for source, future in sorted(
+                futures, key=lambda item: item[0].timeout or default_timeout):
+            deadline = started + (source.timeout or default_timeout)
+            result = {'status': 'completed', 'data': None, 'error': None}
+            try:
+                result['data'] = future.result(timeout=max(0, deadline - time.monotonic()))
+                if result['data'] is NOT_MODIFIED:
+                    result['status'] = 'unchanged'
+                    result['data'] = None
+                elif not result['data']:
+                    result['status'] = 'empty'
+            except FutureTimeoutError:
+                future.cancel()
+                result['status'] = 'timeout'
+                result['error'] = f"Délai de {source.timeout or default_timeout}s dépassé"
+            except Exception as e:
+                result['status'] = 'failed'
+                result['error'] = str(e)
+            result['duration'] = time.monotonic() - started
+            results[source.name] = result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+
+def run_collection(sources, max_workers=DEFAULT_MAX_WORKERS,
+                   default_timeout=DEFAULT_SOURCE_TIMEOUT, validators=None, cursors=None):
+    """Collecte toutes les sources en parallèle puis enregistre les résultats.
+
+    Les exécutions ``DataCollectionRun``, les données ``CollectedData``, les
+    validateurs HTTP, les curseurs et les indicateurs sont écrits dans une
+    seule transaction.
+
+    Args:
+        sources (list[CollectionSource]): Sources à collecter.
+        max_workers (int, optional): Nombre maximal de threads.
+        default_timeout (float, optional): Délai par défaut de chaque source.
+        validators (dict, optional): Validateurs HTTP connus ; les nouvelles
+            valeurs des sources enregistrées (``CollectionSource.validators``)
+            sont enregistrées.
+        cursors (dict, optional): Curseurs passés aux sources, avancés pour
+            les sources incrémentales enregistrées.
+
+    Returns:
+        dict: Résultats par source ('sources') et statistiques d'écriture des
+            indicateurs ('indicators').
+    """
+    started_at = datetime.utcnow()
+    known_validators = dict(validators or {})
+    results = fetch_all(sources, max_workers, default_timeout)
+
+    known_cursors = cursors or {}
+    advanced = {}
+    fresh_validators = {}
+    payloads = []
+    for source in sources:
+        result = results[source.name]
+
+        if source.kind == 'indicators':
+            if result['status'] == 'completed':
+                payloads.append(result['data'])
+            elif result['status'] != 'unchanged':
+                logger.warning(f"Collecte {source.name}: {result['status']} {result['error'] or ''}")
+            continue
+
+        run = DataCollectionRun(
+            source_type=source.source_type,
+            source_name=source.name,
+            status='started',
+            parameters=source.parameters,
+            started_at=started_at
+        )
+        if result['status'] == 'completed':
+            CollectedData.store(run, source.data_type, source.source_id, result['data'])
+            run.mark_completed(count=1)
+            # Le thread de la source est terminé : sa copie n'est plus modifiée
+            if source.validators:
+                fresh_validators.update(HttpValidator.changed(known_validators, source.validators))
+            if source.cursor:
+                definition, key = source.cursor
+                mark = definition.high_water_mark(result['data'], known_cursors.get(key))
+                if mark and mark != known_cursors.get(key):
+                    advanced[key] = mark
+        elif result['status'] == 'unchanged':
+            run.mark_unchanged()
+        else:
+            run.mark_failed(result['error'] or "Aucune donnée retournée")
+            logger.warning(f"Collecte {source.name}: {result['status']} {result['error'] or ''}")
+        db.session.add(run)
+
+    HttpValidator.store(fresh_validators)
+    SourceCursor.store(advanced)
+
+    try:
+        # bulk_save_from_dicts valide aussi les exécutions ajoutées ci-dessus ;
+        # le second commit ne fait rien, sauf s'il n'y avait aucun indicateur.
+        stats = EconomicIndicator.bulk_save_from_dicts(payloads)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(
+        f"Collecte terminée en {(datetime.utcnow() - started_at).total_seconds():.1f}s: "
+        + ', '.join(f"{name}={r['status']}" for name, r in results.items())
+    )
+    return {'sources': results, 'indicators': stats}
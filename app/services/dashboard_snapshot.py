@@ -0,0 +1,246 @@
+"""
+Instantané partagé du tableau de bord de l'économie marocaine.
+
+Toutes les données affichées par le tableau de bord Dash (indicateurs clés,
+séries des graphiques et tableau détaillé) sont construites en une fois et
+stockées dans le backend Flask-Caching configuré (Redis en production).
+L'instantané est versionné par le jeton de ``services.data_versions``, dérivé
+de la base : tous les processus (web, worker) calculent la même version, quel
+que soit le backend de cache, et tous les callbacks lisent la même copie,
+quel que soit le nombre de navigateurs connectés.
+
+L'instantané est reconstruit dès qu'une écriture d'indicateurs est validée
+(signal ``indicators_committed``). Les navigateurs attendent le changement de
+version sur un point d'accès conditionnel (ETag) en attente bornée
+(« long-poll ») : la réponse part dès que la version change, sinon un 304
+sans corps à l'expiration du délai (voir ``wait_for_version``).
+
+Les figures Plotly sont sérialisées une fois par version, lors de la
+construction de l'instantané : les callbacks retournent directement leur
+JSON, sans reconstruire ni valider de ``go.Figure``.
+"""
+import json
+import logging
+import time
+from datetime import datetime
+
+import plotly.graph_objects as go
+from flask import current_app
+
+from app import cache
+from app.extensions import db
+from app.models.ma_economy import indicators_committed
+from app.services import data_versions
+
+logger = logging.getLogger(__name__)
+
+# Indicateurs affichés dans les cartes du tableau de bord
+KPI_INDICATORS = ('hcp_pib', 'hcp_inflation', 'hcp_chomage', 'bam_tmm')
+
+# Graphiques du tableau de bord, indexés par indicateur tracé
+CHARTS = {
+    'hcp_pib': {
+        'name': 'PIB (%)',
+        'color': '#2ecc71',
+        'title': 'Évolution du PIB (Taux de croissance annuel %)',
+        'yaxis_title': 'Taux de croissance (%)',
+    },
+    'hcp_inflation': {
+        'name': 'Inflation (%)',
+        'color': '#e74c3c',
+        'title': 'Évolution du Taux d\'Inflation (%)',
+        'yaxis_title': 'Taux d\'inflation (%)',
+    },
+}
+CHART_POINTS = 24
+
+# Nombre de lignes du tableau détaillé
+TABLE_ROWS = 50
+
+LATEST_KEY = 'ma_economy:snapshot:latest'
+BUILD_LOCK_TIMEOUT = 30  # secondes
+
+
+def _snapshot_key(version):
+    return f'ma_economy:snapshot:{version}'
+
+
+def _timeout():
+    return current_app.config.get('DASHBOARD_CACHE_TIMEOUT', 24 * 3600)
+
+
+def get_version():
+    """Retourne la version courante des données du tableau de bord.
+
+    Returns:
+        str: Jeton de version (voir ``data_versions.get_version``).
+    """
+    return data_versions.get_version(data_versions.SCOPE_ALL)['token']
+
+
+def invalidate_snapshot():
+    """Invalide l'instantané après l'écriture de nouvelles données.
+
+    Returns:
+        str: Nouveau jeton de version.
+    """
+    data_versions.invalidate_versions()
+    version = get_version()
+    logger.info(f"Instantané du tableau de bord invalidé (version {version})")
+    return version
+
+
+def wait_for_version(known, timeout, interval=1):
+    """Attend que la version diffère de ``known``, au plus ``timeout`` secondes.
+
+    La session est libérée entre deux vérifications : aucune connexion à la
+    base n'est retenue pendant l'attente.
+
+    Args:
+        known (str): Dernière version connue du client (ou None).
+        timeout (float): Durée maximale de l'attente, en secondes.
+        interval (float, optional): Délai entre deux vérifications, en secondes.
+
+    Returns:
+        str: Version courante (égale à ``known`` si le délai a expiré).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        version = get_version()
+        db.session.remove()
+        remaining = deadline - time.monotonic()
+        if version != known or remaining <= 0:
+            return version
+        time.sleep(min(interval, remaining))
+
+
+def build_snapshot(version=None):
+    """Construit l'instantané à partir de la base de données.
+
+    Args:
+        version (str, optional): Version à associer à l'instantané.
+
+    Returns:
+        dict: Instantané avec les clés 'version', 'generated_at', 'kpis',
+            'series', 'figures' et 'table'.
+    """
+    from app.models.ma_economy import EconomicIndicator
+
+    kpis = EconomicIndicator.latest_with_previous(KPI_INDICATORS)
+
+    series = {}
+    for indicator_id in CHARTS:
+        rows = EconomicIndicator.query.with_entities(
+            EconomicIndicator.date, EconomicIndicator.value
+        ).filter_by(indicator_id=indicator_id)\
+            .order_by(EconomicIndicator.date.desc()).limit(CHART_POINTS).all()
+        # Les N derniers points, dans l'ordre chronologique
+        series[indicator_id] = [(row.date, row.value) for row in reversed(rows)]
+
+    table = [{
+        'name': row.name,
+        'value': row.value,
+        'unit': row.unit,
+        'date': row.date,
+        'source': row.source,
+    } for row in EconomicIndicator.query.with_entities(
+        EconomicIndicator.name, EconomicIndicator.value, EconomicIndicator.unit,
+        EconomicIndicator.date, EconomicIndicator.source
+    ).order_by(EconomicIndicator.date.desc(), EconomicIndicator.source).limit(TABLE_ROWS)]
+
+    return {
+        'version': version,
+        'generated_at': datetime.utcnow(),
+        'kpis': kpis,
+        'series': series,
+        'figures': {
+            indicator_id: build_figure(indicator_id, points)
+            for indicator_id, points in series.items()
+        },
+        'table': table,
+    }
+
+
+def build_figure(indicator_id, points):
+    """Construit la figure d'un graphique et la sérialise.
+
+    Args:
+        indicator_id (str): Indicateur tracé (clé de ``CHARTS``).
+        points (list[tuple]): Couples (date, valeur) dans l'ordre chronologique.
+
+    Returns:
+        dict: Figure Plotly au format JSON, prête à être retournée par un callback.
+    """
+    fig = go.Figure()
+
+    if points:
+        chart = CHARTS[indicator_id]
+        fig.add_trace(go.Scatter(
+            x=[date for date, value in points],
+            y=[value for date, value in points],
+            mode='lines+markers',
+            name=chart['name'],
+            line=dict(color=chart['color'], width=3)
+        ))
+
+        fig.update_layout(
+            title=chart['title'],
+            xaxis_title='Date',
+            yaxis_title=chart['yaxis_title'],
+            template='plotly_white',
+            hovermode='x unified'
+        )
+
+    return json.loads(fig.to_json())
+
+
+def refresh_snapshot():
+    """Invalide puis reconstruit l'instantané et ses figures.
+
+    Appelée juste après qu'une collecte a validé de nouvelles lignes, afin que
+    les callbacks ne paient jamais la construction des figures.
+
+    Returns:
+        dict: Nouvel instantané.
+    """
+    version = invalidate_snapshot()
+    snapshot = build_snapshot(version)
+    cache.set(_snapshot_key(version), snapshot, timeout=_timeout())
+    cache.set(LATEST_KEY, snapshot, timeout=_timeout())
+    return snapshot
+
+
+def get_snapshot():
+    """Retourne l'instantané courant, construit au plus une fois par version.
+
+    Si un autre processus est déjà en train de construire la nouvelle version,
+    l'instantané précédent est servi plutôt que d'interroger la base.
+
+    Returns:
+        dict: Instantané du tableau de bord (voir ``build_snapshot``).
+    """
+    version = get_version()
+    snapshot = cache.get(_snapshot_key(version))
+    if snapshot is not None:
+        return snapshot
+
+    if not cache.add(f'{_snapshot_key(version)}:lock', True, timeout=BUILD_LOCK_TIMEOUT):
+        stale = cache.get(LATEST_KEY)
+        if stale is not None:
+            return stale
+
+    snapshot = build_snapshot(version)
+    cache.set(_snapshot_key(version), snapshot, timeout=_timeout())
+    cache.set(LATEST_KEY, snapshot, timeout=_timeout())
+    return snapshot
+
+
+@indicators_committed.connect
+def _on_indicators_committed(sender, stats=None, **kwargs):
+    """Reconstruit l'instantané après l'écriture de nouveaux indicateurs."""
+    try:
+        refresh_snapshot()
+    except Exception as e:
+        # L'ingestion est déjà validée : un cache indisponible ne doit pas la faire échouer
+        logger.error(f"Erreur lors du rafraîchissement de l'instantané: {e}", exc_info=True)
+
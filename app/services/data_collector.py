@@ -3,15 +3,18 @@ Service de collecte de données pour Punk Eco.
 Combine les appels API et le web scraping pour collecter des données.
 """
 import requests
-from bs4 import BeautifulSoup
 import json
 import logging
 from datetime import datetime, timedelta
-import os
 import random
 from typing import Dict, List, Any, Optional, Union
 from urllib.parse import urljoin
 
+from .html_extract import get_extractor
+from .http_client import CONNECT_TIMEOUT, get_session
+from .resilience import ResilienceError, call as resilient_call
+from .source_registry import get_source
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,29 +34,43 @@ class MockResponse:
             raise requests.exceptions.HTTPError(f"HTTP Error {self.status_code}")
         return None
 
+# Valeur retournée quand la source répond 304 Not Modified : les données
+# déjà enregistrées sont à jour, il n'y a rien à analyser ni à écrire
+NOT_MODIFIED = object()
+
 class DataCollector:
     """Classe principale pour la collecte de données."""
     
-    def __init__(self, db_session=None, simulation_mode=False, config=None):
+    def __init__(self, db_session=None, simulation_mode=False, config=None, validators=None,
+                 cursors=None):
         """Initialise le collecteur de données.
         
         Args:
             db_session: Session SQLAlchemy pour la base de données
             simulation_mode: Si True, utilise des données simulées au lieu d'appels API réels
             config: Dictionnaire de configuration (optionnel)
+            validators: Validateurs HTTP par URL (voir ``HttpValidator.load``), mis à
+                jour sur place après chaque réponse complète (optionnel)
+            cursors: Dernière observation connue par source incrémentale (voir
+                ``SourceCursor.load``) ; seules les observations à partir de
+                cette période sont demandées (optionnel)
         """
         self.db_session = db_session
         self.simulation_mode = simulation_mode
         self.config = config or {}
+        self.validators = validators if validators is not None else {}
+        self.cursors = cursors or {}
         
         if not simulation_mode:
-            self.session = requests.Session()
-            # Configuration des en-têtes par défaut
-            self.session.headers.update({
+            # Session partagée du processus : les connexions sont réutilisées
+            # d'une exécution à l'autre
+            self.session = get_session()
+            # En-têtes propres à ce collecteur, ajoutés à chaque requête
+            self.headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Accept': 'application/json, text/html, application/xhtml+xml, application/xml;q=0.9, image/webp,*/*;q=0.8',
                 'Accept-Language': 'en-US,en;q=0.5',
-            })
+            }
         else:
             self.session = None
             logger.info("Mode simulation activé - utilisation de données simulées")
@@ -71,44 +88,141 @@ class DataCollector:
                 return {"status": "success", "data": [{"simulated": True, "url": url}]}
         
         try:
-            response = self.session.get(url, params=params, headers=headers, timeout=30)
-            response.raise_for_status()
+            response = self._conditional_get(url, params=params, headers=headers, timeout=30)
+            if response is NOT_MODIFIED:
+                return NOT_MODIFIED
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ResilienceError) as e:
             logger.error(f"Erreur lors de l'appel à l'API {url}: {e}")
             return None
     
-    def scrape_website(self, url: str, selectors: Dict[str, str]) -> Dict:
+    def _conditional_get(self, url: str, params: Optional[Dict] = None,
+                         headers: Optional[Dict] = None, timeout: int = 30):
+        """Effectue une requête GET conditionnelle à partir des validateurs connus.
+        
+        La requête passe par la couche de résilience : nouvels essais, limitation
+        de débit et disjoncteur par hôte (voir ``services.resilience``).
+        
+        Args:
+            url: URL demandée
+            params: Paramètres de la requête
+            headers: En-têtes supplémentaires
+            timeout: Délai de lecture maximal, en secondes
+            
+        Returns:
+            La réponse HTTP, ou NOT_MODIFIED si la ressource n'a pas changé
+            
+        Raises:
+            requests.exceptions.RequestException: En cas d'erreur HTTP ou réseau
+            ResilienceError: Si l'appel n'est pas tenté (circuit ouvert, hôte saturé)
+        """
+        key = requests.Request('GET', url, params=params).prepare().url
+        headers = {**self.headers, **(headers or {})}
+        known = self.validators.get(key) or {}
+        if known.get('etag'):
+            headers['If-None-Match'] = known['etag']
+        if known.get('last_modified'):
+            headers['If-Modified-Since'] = known['last_modified']
+        
+        response = resilient_call(url, lambda: self.session.get(
+            url, params=params, headers=headers, timeout=(CONNECT_TIMEOUT, timeout)
+        ))
+        if response.status_code == 304:
+            logger.info(f"Ressource inchangée depuis la dernière collecte: {key}")
+            return NOT_MODIFIED
+        response.raise_for_status()
+        
+        fresh = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        if fresh['etag'] or fresh['last_modified']:
+            self.validators[key] = fresh
+        return response
+    
+    def scrape_website(self, url: str, selectors: Dict[str, str],
+                       rows: Optional[tuple] = None) -> Dict:
         """
         Récupère le contenu d'une page web et extrait les données en utilisant des sélecteurs CSS.
         
+        La page est analysée une seule fois (moteur ``HTML_PARSER_BACKEND``,
+        lxml par défaut) avec les sélecteurs compilés de la source (voir
+        ``services.html_extract``).
+        
         Args:
             url: URL de la page à scraper
-            selectors: Dictionnaire de sélecteurs CSS pour extraire les données
+            selectors: Dictionnaire de sélecteurs CSS (ou XPath) pour extraire les données
+            rows: (sélecteur des lignes, {clé: sélecteur relatif}) pour extraire
+                une liste d'enregistrements dans ``result['rows']``
             
         Returns:
-            Dict contenant les données extraites
+            Dict contenant les données extraites, ou NOT_MODIFIED si la page
+            n'a pas changé depuis la dernière collecte
         """
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            result = {}
-            for key, selector in selectors.items():
-                elements = soup.select(selector)
-                if elements:
-                    if len(elements) == 1:
-                        result[key] = elements[0].get_text(strip=True)
-                    else:
-                        result[key] = [el.get_text(strip=True) for el in elements]
-            
-            return result
+            response = self._conditional_get(url, timeout=10)
+            if response is NOT_MODIFIED:
+                return NOT_MODIFIED
+            extractor = get_extractor(selectors, rows, self.config.get('HTML_PARSER_BACKEND'))
+            return extractor.extract(response.content)
             
         except Exception as e:
             logger.error(f"Erreur lors du scraping de {url}: {e}")
             return {}
     
+    def collect_source(self, name: str, **kwargs) -> List[Dict]:
+        """Collecte les nouvelles observations d'une source du registre déclaratif.
+        
+        Seules les observations à partir de la période du curseur de la source
+        sont demandées (voir ``SourceDefinition.start``), page par page si
+        l'API pagine. Le curseur n'est pas avancé
+        ici : l'appelant l'enregistre avec les données (voir
+        ``SourceDefinition.high_water_mark``).
+        
+        Args:
+            name: Nom de la source (voir ``services.source_registry``)
+            **kwargs: Arguments de la collecte (gabarits des paramètres, analyseur)
+            
+        Returns:
+            Les observations de la fenêtre, NOT_MODIFIED s'il n'y en a aucune,
+            ou une liste vide en cas d'erreur
+        """
+        definition = get_source(name)
+        mark = self.cursors.get(definition.key(**kwargs))
+        if not definition.is_due(mark):
+            logger.info(f"Aucune nouvelle observation attendue pour {name} après {mark}")
+            return NOT_MODIFIED
+        
+        try:
+            params, headers = definition.request(self.config, definition.start(mark), **kwargs)
+        except ValueError as e:
+            logger.error(str(e))
+            return []
+        
+        records = []
+        offset = 0
+        while True:
+            page_params = dict(params)
+            if definition.page_size:
+                offset_param, length_param = definition.paging
+                page_params.update({offset_param: offset, length_param: definition.page_size})
+            payload = self._make_api_call(definition.url, params=page_params, headers=headers)
+            if payload is NOT_MODIFIED and not records:
+                return NOT_MODIFIED
+            if payload is None or payload is NOT_MODIFIED:
+                # Page manquante : ne rien retourner plutôt qu'un historique troué
+                return []
+            page = definition.parser(payload, **kwargs)
+            records.extend(page)
+            if not definition.page_size or len(page) < definition.page_size:
+                break
+            offset += definition.page_size
+        
+        window = definition.in_window(records, mark)
+        if mark and not window:
+            return NOT_MODIFIED
+        return window
+    
     def collect_energy_data(self, source: str, **kwargs) -> Dict:
         """Collecte les données énergétiques depuis différentes sources."""
         if source == 'electricity_map':
@@ -142,19 +256,14 @@ class DataCollector:
         }
         return self._make_api_call(url, params=params, headers=headers)
     
-    def _collect_from_eia(self, series_id: str) -> Dict:
-        """Collecte des données depuis l'API de l'EIA (US Energy Information Administration)."""
-        url = "https://api.eia.gov/v2/electricity/rto/daily-fuel-type-data/data/"
-        params = {
-            'api_key': self.config.get('EIA_API_KEY', ''),
-            'frequency': 'daily',
-            'data[0]': 'value',
-            'facets[type][]': series_id,
-            'sort[0][column]': 'period',
-            'sort[0][direction]': 'desc',
-            'length': 1
-        }
-        return self._make_api_call(url, params=params)
+    def _collect_from_eia(self, series_id: str) -> List[Dict]:
+        """Collecte des données depuis l'API de l'EIA (US Energy Information Administration).
+        
+        Retourne les observations journalières à partir de la dernière
+        enregistrée pour ce type de combustible (et de la veille, où des
+        opérateurs publient en retard).
+        """
+        return self.collect_source('eia_daily_fuel_type', series_id=series_id)
     
     def _collect_inflation_data(self, country: str = 'france') -> List[Dict]:
         """Collecte les données d'inflation."""
@@ -183,27 +292,24 @@ class DataCollector:
         # Code original pour le scraping de l'INSEE
         url = "https://www.insee.fr/fr/statistiques/serie/010599691"
         
-        # Scraping de la page
-        soup = self.scrape_website(url, {
+        # Scraping de la page : en-tête et lignes du tableau en une seule analyse
+        page = self.scrape_website(url, {
             'title': 'h1.titre',
             'last_update': '.mise-a-jour',
-            'values': '.donnees-ligne .valeur',
-            'dates': '.donnees-ligne .periode',
-        })
-        if not soup:
+        }, rows=('.tableau-nicerow', {'date': '.date', 'value': '.valeur'}))
+        if page is NOT_MODIFIED:
+            return NOT_MODIFIED
+        if not page:
             return []
         
         try:
             # Exemple de sélecteur (à adapter selon la structure réelle de la page)
             data_points = []
-            for row in soup.select('.tableau-nicerow'):
-                date_elem = row.select_one('.date')
-                value_elem = row.select_one('.valeur')
-                
-                if date_elem and value_elem:
+            for row in page.get('rows', []):
+                if row['date'] and row['value']:
                     data_points.append({
-                        'date': date_elem.text.strip(),
-                        'value': float(value_elem.text.strip().replace(',', '.')),
+                        'date': row['date'],
+                        'value': float(row['value'].replace(',', '.')),
                         'country': country,
                         'source': 'insee',
                         'indicator': 'inflation',
@@ -216,18 +322,21 @@ class DataCollector:
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction des données d'inflation: {e}")
             return []
-            selectors = {
-                'title': 'h1.titre',
-                'last_update': '.mise-a-jour',
-                'values': '.donnees-ligne .valeur',
-                'dates': '.donnees-ligne .periode',
-            }
-            return self.scrape_website(url, selectors)
-        return {}
     
     def _collect_unemployment_data(self, country: str = 'france') -> List[Dict]:
-        """Collecte les données de chômage."""
+        """Collecte les données de chômage.
+        
+        Les données de la France viennent de l'API emploi-store (source
+        ``unemployment_france`` du registre) : seuls les mois postérieurs au
+        dernier enregistré sont demandés.
+        """
         if self.simulation_mode:
+            # Le curseur s'applique aussi aux données simulées
+            definition = get_source('unemployment_france')
+            mark = self.cursors.get(definition.key())
+            if not definition.is_due(mark):
+                return NOT_MODIFIED
+            
             # Génération de données simulées pour le chômage
             today = datetime.now()
             data_points = []
@@ -247,53 +356,10 @@ class DataCollector:
                     'frequency': 'monthly'
                 })
             
-            return data_points
+            return definition.in_window(data_points, mark) or (NOT_MODIFIED if mark else [])
             
         if country.lower() == 'france':
-            # Exemple d'API pour les données de chômage
-            url = "https://api.emploi-store.fr/partenaire/indicateur-mensuel/v1/indicateurs"
-            
-            # Paramètres de la requête
-            params = {
-                'codeZoneGeographique': 'FRANCE',
-                'codeIndicateur': 'T3',  # Taux de chômage au sens du BIT
-                'dateDebut': '2010-01-01',
-                'dateFin': datetime.now().strftime('%Y-%m-%d')
-            }
-            
-            # Récupération du token depuis la config ou les variables d'environnement
-            token = self.config.get('EMPLOI_STORE_TOKEN') or os.getenv('EMPLOI_STORE_TOKEN')
-            
-            if not token:
-                logger.error("Token d'authentification pour l'API emploi-store manquant")
-                return []
-            
-            # En-têtes avec le token d'authentification
-            headers = {
-                'Authorization': f'Bearer {token}'
-            }
-            
-            # Appel API
-            data = self._make_api_call(url, params=params, headers=headers)
-            
-            if not data or not isinstance(data, list):
-                return []
-                
-            # Traitement des données (à adapter selon la structure de la réponse)
-            results = []
-            for item in data:
-                if 'date' in item and 'valeur' in item:
-                    results.append({
-                        'date': item['date'],
-                        'value': item['valeur'],
-                        'unit': '%',
-                        'country': country,
-                        'indicator': 'unemployment_rate',
-                        'source': 'emploi_store',
-                        'frequency': 'monthly'
-                    })
-                    
-            return results
+            return self.collect_source('unemployment_france')
             
         return []
 
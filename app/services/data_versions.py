@@ -0,0 +1,89 @@
+"""
+Versions des données économiques pour les requêtes HTTP conditionnelles.
+
+Chaque portée (tous les indicateurs, un indicateur, une catégorie) possède
+un jeton de version et une date de dernière modification, dérivés de la
+base : date de mise à jour la plus récente et nombre de lignes de la
+portée. Tous les processus (web, worker, planificateur) calculent donc le
+même jeton, quel que soit le backend de cache.
+
+Le résultat est conservé ``DATA_VERSION_CACHE_TIMEOUT`` secondes dans le
+cache pour épargner la base ; les écritures d'indicateurs l'effacent via le
+signal ``indicators_committed``. Avec un cache propre au processus, un
+autre processus voit donc la nouvelle version au plus tard à l'expiration.
+"""
+import hashlib
+import logging
+
+from flask import current_app
+
+from app import cache
+from ..extensions import db
+from ..models.ma_economy import EconomicIndicator, indicators_committed
+
+logger = logging.getLogger(__name__)
+
+SCOPE_ALL = 'all'
+SCOPE_INDICATOR = 'indicator'
+SCOPE_CATEGORY = 'category'
+
+
+def _version_key(scope, key=None):
+    return f'economy:version:{scope}:{key or "*"}'
+
+
+def _compute_version(scope, key=None):
+    """Calcule la version d'une portée à partir de la base."""
+    query = db.session.query(db.func.max(EconomicIndicator.updated_at), db.func.count())
+    if scope == SCOPE_INDICATOR:
+        query = query.filter(EconomicIndicator.indicator_id == key)
+    elif scope == SCOPE_CATEGORY:
+        query = query.filter(EconomicIndicator.category == key)
+    last_modified, count = query.one()
+    return {
+        'token': hashlib.sha1(f'{scope}:{key}:{last_modified}:{count}'.encode()).hexdigest(),
+        'last_modified': last_modified,
+    }
+
+
+def get_version(scope, key=None):
+    """Retourne la version courante d'une portée.
+
+    Args:
+        scope (str): SCOPE_ALL, SCOPE_INDICATOR ou SCOPE_CATEGORY.
+        key (str, optional): ID de l'indicateur ou nom de la catégorie.
+
+    Returns:
+        dict: Jeton ('token') et date de dernière modification ('last_modified',
+            éventuellement None).
+    """
+    timeout = current_app.config.get('DATA_VERSION_CACHE_TIMEOUT', 5)
+    if not timeout:
+        return _compute_version(scope, key)
+    version = cache.get(_version_key(scope, key))
+    if version is None:
+        version = _compute_version(scope, key)
+        cache.set(_version_key(scope, key), version, timeout=timeout)
+    return version
+
+
+def invalidate_versions(indicator_ids=(), categories=()):
+    """Efface les versions mises en cache des portées touchées par une écriture.
+
+    Args:
+        indicator_ids (Iterable[str]): Indicateurs modifiés.
+        categories (Iterable[str]): Catégories modifiées.
+    """
+    keys = [_version_key(SCOPE_ALL)]
+    keys += [_version_key(SCOPE_INDICATOR, i) for i in indicator_ids]
+    keys += [_version_key(SCOPE_CATEGORY, c) for c in categories if c]
+    cache.delete_many(*keys)
+
+
+@indicators_committed.connect
+def _on_indicators_committed(sender, indicator_ids=(), categories=(), **kwargs):
+    """Efface les versions en cache après l'écriture de nouveaux indicateurs."""
+    try:
+        invalidate_versions(indicator_ids, categories)
+    except Exception as e:
+        logger.error(f"Erreur lors de la mise à jour des versions de données: {e}", exc_info=True)
@@ -0,0 +1,220 @@
+"""
+Extraction de données de pages HTML par sélecteurs CSS ou XPath.
+
+Deux moteurs d'analyse sont disponibles :
+
+- 'lxml' (par défaut) : analyseur HTML en C ; les sélecteurs CSS sont
+  traduits en XPath (paquet ``cssselect``) et compilés une seule fois ;
+- 'bs4' : BeautifulSoup avec ``html.parser`` (pur Python), sélecteurs CSS
+  compilés par soupsieve.
+
+Un ``Extractor`` regroupe les sélecteurs d'une source ; il est compilé à la
+première utilisation puis mis en cache (``get_extractor``). Chaque document
+n'est analysé qu'une fois, quel que soit le nombre de sélecteurs.
+
+Les sélecteurs commençant par ``/``, ``./`` ou ``(`` sont des expressions
+XPath (moteur lxml uniquement), les autres des sélecteurs CSS.
+
+``iter_table_rows`` lit les lignes d'un grand tableau au fil de l'analyse,
+sans construire l'arbre complet du document.
+"""
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'lxml'
+
+
+def _is_xpath(selector):
+    return selector.startswith(('/', './', '('))
+
+
+class LxmlBackend:
+    """Moteur lxml : analyse en C et sélecteurs compilés en XPath."""
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html  # noqa
+        from lxml import etree
+        self._etree = etree
+
+    def parse(self, html):
+        import lxml.html
+        if isinstance(html, str):
+            # lxml refuse les chaînes qui déclarent leur encodage
+            html = html.encode('utf-8')
+        return lxml.html.fromstring(html)
+
+    def compile(self, selector, relative=False):
+        if _is_xpath(selector):
+            return self._etree.XPath(selector)
+        try:
+            from cssselect import HTMLTranslator
+        except ImportError:
+            raise ImportError("cssselect est requis pour les sélecteurs CSS avec lxml "
+                              "(pip install cssselect)")
+        # Sélection relative : descendants de l'élément, comme soupsieve
+        prefix = 'descendant::' if relative else 'descendant-or-self::'
+        return self._etree.XPath(HTMLTranslator().css_to_xpath(selector, prefix=prefix))
+
+    def select(self, node, compiled):
+        return compiled(node)
+
+    def text(self, element):
+        # Même résultat que BeautifulSoup get_text(strip=True)
+        if isinstance(element, str):
+            return element.strip()
+        return ''.join(part.strip() for part in element.itertext())
+
+
+class SoupBackend:
+    """Moteur BeautifulSoup (``html.parser``), sélecteurs CSS compilés par soupsieve."""
+    name = 'bs4'
+
+    def parse(self, html):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser')
+
+    def compile(self, selector, relative=False):
+        if _is_xpath(selector):
+            raise ValueError(f"Sélecteur XPath non pris en charge par bs4: {selector}")
+        import soupsieve
+        return soupsieve.compile(selector)
+
+    def select(self, node, compiled):
+        return compiled.select(node)
+
+    def text(self, element):
+        return element.get_text(strip=True)
+
+
+BACKENDS = {
+    'lxml': LxmlBackend,
+    'bs4': SoupBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=None):
+    """Retourne le moteur d'analyse demandé (instance partagée).
+
+    Args:
+        name (str, optional): 'lxml' ou 'bs4' (par défaut ``DEFAULT_BACKEND``).
+    """
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Moteur d'analyse HTML inconnu: {name}")
+    return BACKENDS[name]()
+
+
+class Extractor:
+    """Sélecteurs compilés d'une source.
+
+    Args:
+        selectors (dict): Par clé du résultat, un sélecteur CSS ou XPath.
+        rows (tuple, optional): (sélecteur des lignes, {clé: sélecteur relatif})
+            pour extraire une liste d'enregistrements dans ``result['rows']``.
+        backend (str, optional): Moteur d'analyse ('lxml' ou 'bs4').
+    """
+
+    def __init__(self, selectors, rows=None, backend=None):
+        self.backend = get_backend(backend)
+        self.selectors = {key: self.backend.compile(selector) for key, selector in selectors.items()}
+        self.rows = None
+        if rows:
+            row_selector, fields = rows
+            self.rows = (
+                self.backend.compile(row_selector),
+                {key: self.backend.compile(selector, relative=True) for key, selector in fields.items()}
+            )
+
+    def extract(self, html):
+        """Analyse un document une fois et applique tous les sélecteurs.
+
+        Args:
+            html (str | bytes): Contenu de la page.
+
+        Returns:
+            dict: Texte de l'élément trouvé (ou liste des textes s'il y en a
+                plusieurs) par clé ; les clés sans correspondance sont absentes.
+                Avec ``rows``, 'rows' contient un dictionnaire par ligne (None
+                pour les champs absents).
+        """
+        backend = self.backend
+        document = backend.parse(html)
+
+        result = {}
+        for key, compiled in self.selectors.items():
+            elements = backend.select(document, compiled)
+            if len(elements) == 1:
+                result[key] = backend.text(elements[0])
+            elif elements:
+                result[key] = [backend.text(element) for element in elements]
+
+        if self.rows:
+            row_selector, fields = self.rows
+            records = []
+            for row in backend.select(document, row_selector):
+                record = {}
+                for key, compiled in fields.items():
+                    found = backend.select(row, compiled)
+                    record[key] = backend.text(found[0]) if found else None
+                records.append(record)
+            result['rows'] = records
+        return result
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=256)
+def _cached_extractor(selectors, rows, backend):
+    return Extractor(dict(selectors), (rows[0], dict(rows[1])) if rows else None, backend)
+
+
+def get_extractor(selectors, rows=None, backend=None):
+    """Retourne l'extracteur compilé d'une définition de source (mis en cache).
+
+    Args:
+        selectors (dict): Voir ``Extractor``.
+        rows (tuple, optional): Voir ``Extractor``.
+        backend (str, optional): Moteur d'analyse ('lxml' ou 'bs4').
+
+    Returns:
+        Extractor: Extracteur partagé par toutes les collectes de la source.
+    """
+    return _cached_extractor(_freeze(selectors), _freeze(rows), backend or DEFAULT_BACKEND)
+
+
+def iter_table_rows(source, row_tag='tr', cell_tags=('td', 'th')):
+    """Lit les lignes de tableau d'un document HTML au fil de l'analyse.
+
+    Chaque ligne est libérée dès qu'elle a été lue : la mémoire utilisée
+    reste bornée quelle que soit la taille du tableau.
+
+    Args:
+        source: Fichier ou flux binaire (par exemple ``response.raw``), ou chemin.
+        row_tag (str, optional): Balise des lignes.
+        cell_tags (Iterable[str], optional): Balises des cellules.
+
+    Yields:
+        list[str]: Textes des cellules de chaque ligne.
+    """
+    from lxml import etree
+
+    cell_tags = set(cell_tags)
+    for _, row in etree.iterparse(source, events=('end',), tag=row_tag, html=True,
+                                  recover=True):
+        yield [''.join(part.strip() for part in cell.itertext())
+               for cell in row if cell.tag in cell_tags]
+        # Libérer la ligne et les lignes précédentes déjà lues
+        row.clear()
+        parent = row.getparent()
+        while parent is not None and row.getprevious() is not None:
+            del parent[0]
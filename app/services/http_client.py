@@ -0,0 +1,199 @@
+"""
+Clients HTTP partagés par les collecteurs de données.
+
+Les collecteurs sont recréés à chaque exécution des tâches : s'ils créaient
+chacun leur propre session, aucune connexion TCP/TLS ne serait réutilisée.
+Ce module fournit donc des clients à l'échelle du processus :
+
+- ``get_session()`` : une ``requests.Session`` partagée par les collecteurs
+  synchrones, avec un pool de connexions persistantes par hôte ;
+- ``get_async_client()`` : un ``httpx.AsyncClient`` par boucle d'événements,
+  avec keep-alive, HTTP/2 si le paquet ``h2`` est installé, et une limite de
+  connexions simultanées par hôte.
+
+``request`` et ``async_request`` passent par la couche de résilience
+(nouvels essais, limitation de débit et disjoncteur par hôte, voir
+``resilience``).
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import resilience
+
+logger = logging.getLogger(__name__)
+
+# En-têtes par défaut des requêtes des collecteurs
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json, text/html, application/xhtml+xml',
+}
+
+# Limites des pools de connexions
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+MAX_CONNECTIONS_PER_HOST = 6
+KEEPALIVE_EXPIRY = 30  # secondes
+DEFAULT_TIMEOUT = 30  # secondes
+CONNECT_TIMEOUT = 5  # secondes : un hôte injoignable est détecté rapidement
+
+_session = None
+_session_lock = threading.Lock()
+
+# Boucle d'événements de fond partagée par les appelants synchrones
+_loop = None
+_loop_lock = threading.Lock()
+
+# Un client et des sémaphores par boucle d'événements (un client httpx ne
+# peut pas être partagé entre boucles)
+_async_clients = weakref.WeakKeyDictionary()
+_host_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_session():
+    """Retourne la session HTTP synchrone partagée du processus.
+
+    Returns:
+        requests.Session: Session avec connexions persistantes.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    pool_maxsize=MAX_CONNECTIONS_PER_HOST
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                _session = session
+    return _session
+
+
+def request(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Effectue une requête avec la session partagée et la couche de résilience.
+
+    Args:
+        method (str): Méthode HTTP.
+        url (str): URL demandée.
+        timeout (float, optional): Délai de lecture, en secondes.
+        **kwargs: Arguments transmis à ``requests.Session.request``.
+
+    Returns:
+        requests.Response: Réponse HTTP (429 ou 5xx si tous les essais ont échoué).
+
+    Raises:
+        resilience.ResilienceError: Si l'appel n'est pas tenté (circuit ouvert, hôte saturé).
+        requests.exceptions.RequestException: Erreur réseau du dernier essai.
+    """
+    session = get_session()
+    return resilience.call(
+        url, lambda: session.request(method, url, timeout=(CONNECT_TIMEOUT, timeout), **kwargs)
+    )
+
+
+def http2_available():
+    """Indique si HTTP/2 est disponible (paquet ``h2`` installé)."""
+    try:
+        import h2  # noqa
+    except ImportError:
+        return False
+    return True
+
+
+def get_async_client():
+    """Retourne le client HTTP asynchrone de la boucle d'événements courante.
+
+    Returns:
+        httpx.AsyncClient: Client avec pool de connexions persistantes.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=http2_available(),
+            headers=DEFAULT_HEADERS,
+            timeout=DEFAULT_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def _host_semaphore(url):
+    """Sémaphore limitant les requêtes simultanées vers un même hôte."""
+    loop = asyncio.get_running_loop()
+    semaphores = _host_semaphores.setdefault(loop, {})
+    host = urlsplit(url).netloc
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+    return semaphores[host]
+
+
+async def async_request(method, url, **kwargs):
+    """Effectue une requête avec le client partagé, dans la limite par hôte et
+    avec la couche de résilience.
+
+    Args:
+        method (str): Méthode HTTP.
+        url (str): URL demandée.
+        **kwargs: Arguments transmis à ``httpx.AsyncClient.request``.
+
+    Returns:
+        httpx.Response: Réponse HTTP (429 ou 5xx si tous les essais ont échoué).
+    """
+    async with _host_semaphore(url):
+        return await resilience.call_async(
+            url, lambda: get_async_client().request(method, url, **kwargs)
+        )
+
+
+def _background_loop():
+    """Retourne la boucle d'événements de fond du processus, démarrée à la demande."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='http-client-loop',
+                                          daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    """Exécute une coroutine sur la boucle de fond et attend son résultat.
+
+    Tous les appelants synchrones partagent ainsi la même boucle, donc le même
+    client asynchrone et ses connexions persistantes.
+
+    Args:
+        coro: Coroutine à exécuter.
+        timeout (float, optional): Délai maximal d'attente, en secondes.
+
+    Returns:
+        Le résultat de la coroutine.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result(timeout)
+
+
+async def close_async_client():
+    """Ferme le client asynchrone de la boucle d'événements courante."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,171 @@
+"""
+Export en colonnes des séries d'indicateurs économiques (Arrow IPC / Parquet).
+
+Les lignes sont lues par blocs directement depuis le curseur de la base
+(curseur côté serveur sous PostgreSQL) et converties colonne par colonne en
+``RecordBatch`` Arrow, sans construire de dictionnaire par ligne.
+"""
+import io
+import logging
+
+from ..extensions import db
+from ..models.ma_economy import EconomicIndicator
+
+logger = logging.getLogger(__name__)
+
+# Formats disponibles : type MIME et extension de fichier
+EXPORT_FORMATS = {
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Nombre de lignes lues et écrites par bloc
+EXPORT_CHUNK_SIZE = 50000
+
+
+def _pyarrow():
+    """Importe pyarrow à la demande."""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa
+    except ImportError:
+        raise RuntimeError("pyarrow est requis pour l'export Arrow/Parquet (pip install pyarrow)")
+    return pyarrow
+
+
+def export_schema():
+    """Retourne le schéma Arrow des exports d'indicateurs."""
+    pa = _pyarrow()
+    return pa.schema([
+        ('indicator_id', pa.string()),
+        ('date', pa.date32()),
+        ('value', pa.float64()),
+        ('unit', pa.string()),
+        ('source', pa.string()),
+        ('category', pa.string()),
+    ])
+
+
+def iter_record_batches(indicator_ids=None, category=None, start=None, end=None,
+                        chunk_size=EXPORT_CHUNK_SIZE):
+    """Lit les séries filtrées par blocs et les convertit en ``RecordBatch``.
+
+    Args:
+        indicator_ids (list[str], optional): Indicateurs à exporter.
+        category (str, optional): Catégorie à exporter.
+        start (date, optional): Date de début incluse.
+        end (date, optional): Date de fin incluse.
+        chunk_size (int, optional): Nombre de lignes par bloc.
+
+    Yields:
+        pyarrow.RecordBatch: Blocs triés par (indicator_id, date).
+    """
+    pa = _pyarrow()
+    schema = export_schema()
+    table = EconomicIndicator.__table__
+
+    query = db.select(
+        table.c.indicator_id, table.c.date, table.c.value,
+        table.c.unit, table.c.source, table.c.category
+    )
+    if indicator_ids:
+        query = query.where(table.c.indicator_id.in_(indicator_ids))
+    if category:
+        query = query.where(table.c.category == category)
+    if start is not None:
+        query = query.where(table.c.date >= start)
+    if end is not None:
+        query = query.where(table.c.date <= end)
+    query = query.order_by(table.c.indicator_id, table.c.date)
+
+    result = db.session.execute(query.execution_options(stream_results=True,
+                                                        yield_per=chunk_size))
+    for rows in result.partitions(chunk_size):
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        )
+
+
+def _open_writer(sink, fmt, schema):
+    """Ouvre l'écrivain Arrow IPC ou Parquet correspondant au format."""
+    pa = _pyarrow()
+    if fmt == 'arrow':
+        return pa.ipc.new_stream(sink, schema)
+    if fmt == 'parquet':
+        return pa.parquet.ParquetWriter(sink, schema, compression='zstd')
+    raise ValueError(f"Format d'export non pris en charge: {fmt}")
+
+
+def write_export(sink, fmt='parquet', **filters):
+    """Écrit un export complet dans un fichier ou un flux binaire.
+
+    Args:
+        sink: Chemin ou objet fichier binaire de destination.
+        fmt (str, optional): 'arrow' ou 'parquet'. Par défaut 'parquet'.
+        **filters: Filtres transmis à ``iter_record_batches``.
+
+    Returns:
+        int: Nombre de lignes exportées.
+    """
+    count = 0
+    with _open_writer(sink, fmt, export_schema()) as writer:
+        for batch in iter_record_batches(**filters):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    logger.info(f"Export {fmt}: {count} lignes écrites")
+    return count
+
+
+class _StreamSink(io.RawIOBase):
+    """Tampon d'écriture vidé au fil de l'eau pour les réponses HTTP en flux.
+
+    ``tell()`` reste monotone, comme l'exige l'écrivain Parquet pour calculer
+    les positions des colonnes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_export(fmt='parquet', **filters):
+    """Génère un export par morceaux, à envoyer dans une réponse HTTP en flux.
+
+    Args:
+        fmt (str, optional): 'arrow' ou 'parquet'. Par défaut 'parquet'.
+        **filters: Filtres transmis à ``iter_record_batches``.
+
+    Yields:
+        bytes: Morceaux successifs du fichier exporté.
+    """
+    sink = _StreamSink()
+    writer = _open_writer(sink, fmt, export_schema())
+    try:
+        for batch in iter_record_batches(**filters):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
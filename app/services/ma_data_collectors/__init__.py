@@ -6,10 +6,14 @@ Ce module fournit des classes pour collecter des données économiques
 auprès de différentes sources officielles marocaines comme le HCP et Bank Al-Maghrib.
 """
 
+from .base_collector import AsyncBaseCollector, SyncCollectorAdapter, as_async, gather_collectors
 from .hcp_collector import HCPCollector
 from .bam_collector import BAMCollector
 
-__all__ = ['HCPCollector', 'BAMCollector']
+__all__ = [
+    'HCPCollector', 'BAMCollector',
+    'AsyncBaseCollector', 'SyncCollectorAdapter', 'as_async', 'gather_collectors'
+]
 
 # Dictionnaire des collecteurs disponibles
 COLLECTORS = {
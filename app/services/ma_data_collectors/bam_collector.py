@@ -1,9 +1,9 @@
 import logging
 from datetime import datetime
 from typing import Dict, Optional
-import requests
 from bs4 import BeautifulSoup
 from .base_collector import BaseCollector
+from ..http_client import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -18,13 +18,13 @@ class BAMCollector(BaseCollector):
         """
         super().__init__(use_cache)
         self.base_url = "https://www.bam.ma"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json, text/html, application/xhtml+xml',
+        # Session partagée du processus : les connexions sont réutilisées
+        # d'une exécution à l'autre
+        self.session = get_session()
+        self.headers = {
             'Accept-Language': 'fr,fr-FR;q=0.9,en;q=0.8,ar;q=0.7',
             'Referer': self.base_url,
-        })
+        }
 
     def get_indicators(self) -> Dict:
         """Récupère les principaux indicateurs de la BAM."""
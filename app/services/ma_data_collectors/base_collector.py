@@ -5,8 +5,11 @@ Cette classe définit l'interface commune que tous les collecteurs doivent impl
 """
 from abc import ABC, abstractmethod
 from typing import Dict, Optional
+import asyncio
 import logging
 
+from ..http_client import async_request, request, run_sync
+
 logger = logging.getLogger(__name__)
 
 class BaseCollector(ABC):
@@ -74,7 +77,131 @@ class BaseCollector(ABC):
     def clear_cache(self) -> None:
         """Vide le cache du collecteur."""
         self.cache.clear()
+    
+    def fetch(self, url: str, **kwargs):
+        """Effectue une requête GET avec la session partagée.
+        
+        Les en-têtes du collecteur (``self.headers``) sont ajoutés ; la
+        requête est réessayée, limitée en débit et protégée par le
+        disjoncteur de l'hôte (voir ``services.resilience``).
+        
+        Args:
+            url: URL de la ressource
+            **kwargs: Arguments transmis à ``requests.Session.request``
+            
+        Returns:
+            La réponse HTTP
+            
+        Raises:
+            requests.exceptions.RequestException: En cas d'erreur HTTP ou réseau
+            ResilienceError: Si l'appel n'est pas tenté (circuit ouvert, hôte saturé)
+        """
+        headers = {**getattr(self, 'headers', {}), **kwargs.pop('headers', {})}
+        response = request('GET', url, headers=headers, **kwargs)
+        response.raise_for_status()
+        return response
         
     def __str__(self) -> str:
         """Représentation en chaîne du collecteur."""
         return f"{self.__class__.__name__}(use_cache={self.use_cache})"
+
+
+class AsyncBaseCollector(BaseCollector):
+    """Classe de base des collecteurs asynchrones.
+    
+    Les requêtes passent par le client HTTP asynchrone partagé du processus
+    (connexions persistantes, HTTP/2 si disponible, limite par hôte) : de
+    nombreuses sources peuvent être interrogées depuis une seule boucle
+    d'événements, sans un thread ni une poignée de main TLS par requête.
+    """
+    
+    @abstractmethod
+    async def collect_async(self) -> Dict:
+        """Collecte les données depuis la source (voir ``BaseCollector.collect``)."""
+        pass
+    
+    def collect(self) -> Dict:
+        """Collecte les données de manière synchrone, sur la boucle partagée."""
+        return run_sync(self.collect_async())
+    
+    async def fetch_json(self, url: str, **kwargs) -> Dict:
+        """Récupère une ressource JSON avec le client partagé.
+        
+        Args:
+            url: URL de la ressource
+            **kwargs: Arguments transmis à ``httpx.AsyncClient.request``
+            
+        Returns:
+            Le contenu JSON décodé
+        """
+        response = await async_request('GET', url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+    
+    async def fetch_text(self, url: str, **kwargs) -> str:
+        """Récupère une ressource texte (HTML) avec le client partagé.
+        
+        Args:
+            url: URL de la ressource
+            **kwargs: Arguments transmis à ``httpx.AsyncClient.request``
+            
+        Returns:
+            Le contenu texte de la réponse
+        """
+        response = await async_request('GET', url, **kwargs)
+        response.raise_for_status()
+        return response.text
+
+
+class SyncCollectorAdapter(AsyncBaseCollector):
+    """Adapte un collecteur synchrone à l'interface asynchrone.
+    
+    La collecte synchrone est exécutée dans le pool de threads de la boucle,
+    sans bloquer les autres sources.
+    """
+    
+    def __init__(self, collector: BaseCollector):
+        """Initialise l'adaptateur.
+        
+        Args:
+            collector: Collecteur synchrone à adapter
+        """
+        super().__init__(collector.use_cache)
+        self.collector = collector
+    
+    async def collect_async(self) -> Dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.collector.collect)
+    
+    def collect(self) -> Dict:
+        return self.collector.collect()
+    
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({self.collector})"
+
+
+def as_async(collector: BaseCollector) -> AsyncBaseCollector:
+    """Retourne une version asynchrone d'un collecteur quelconque."""
+    if isinstance(collector, AsyncBaseCollector):
+        return collector
+    return SyncCollectorAdapter(collector)
+
+
+async def gather_collectors(collectors: Dict[str, BaseCollector],
+                            timeout: Optional[float] = None) -> Dict[str, Dict]:
+    """Exécute plusieurs collecteurs simultanément sur la boucle courante.
+    
+    Args:
+        collectors: Collecteurs indexés par nom de source
+        timeout: Délai maximal de chaque collecteur, en secondes
+        
+    Returns:
+        Par nom de source, les données collectées ou l'exception levée
+    """
+    names = list(collectors)
+    results = await asyncio.gather(
+        *(asyncio.wait_for(as_async(collectors[name]).collect_async(), timeout)
+          for name in names),
+        return_exceptions=True
+    )
+    return dict(zip(names, results))
@@ -0,0 +1,159 @@
+"""
+Partitionnement mensuel des tables de séries temporelles sous PostgreSQL.
+
+Quand ``TIME_PARTITIONING`` est activé, la migration ``b6f0c2d8e413``
+convertit ``collected_data`` (clé ``data_date``) et ``energy_data`` (clé
+``timestamp``) en tables partitionnées par intervalle mensuel. Les requêtes
+filtrées sur ces colonnes n'examinent alors que les partitions concernées,
+et la rétention supprime des partitions entières au lieu de lignes.
+
+Les partitions futures sont créées à l'avance par ``ensure_partitions``
+(commande ``flask maintain-partitions``). Les lignes hors de toute partition
+mensuelle tombent dans la partition par défaut. Sous SQLite, ou si le
+partitionnement n'est pas activé, toutes ces fonctions sont sans effet et
+les tables restent simples.
+"""
+import logging
+import re
+from datetime import date, datetime
+
+from ..extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Tables partitionnées et leur clé de partitionnement
+PARTITIONED_TABLES = {
+    'collected_data': 'data_date',
+    'energy_data': 'timestamp',
+}
+DEFAULT_MONTHS_AHEAD = 3
+
+# Date de dernière utilisation d'une ligne, quand elle diffère de la clé de
+# partitionnement : une donnée dédoublonnée garde sa ``data_date`` d'origine
+# mais ``last_seen_at`` avance à chaque collecte identique
+LAST_USED = {
+    'collected_data': 'COALESCE(last_seen_at, collected_at)',
+}
+
+
+def _month_start(value, offset=0):
+    """Premier jour du mois de ``value`` décalé de ``offset`` mois."""
+    index = value.year * 12 + value.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    """Nom de la partition d'une table pour un mois donné (ex. energy_data_p202610)."""
+    return f'{table}_p{month:%Y%m}'
+
+
+def is_partitioned(table):
+    """Indique si une table est partitionnée (toujours False hors PostgreSQL)."""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return db.session.execute(db.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+    ), {'table': table}).scalar()
+
+
+def list_partitions(table):
+    """Retourne les partitions mensuelles d'une table.
+
+    Returns:
+        list[tuple]: Couples (nom de la partition, premier jour du mois), triés par mois.
+    """
+    names = db.session.execute(db.text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+    ), {'table': table}).scalars()
+    pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})(\d{{2}})$')
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def ensure_partitions(months_ahead=DEFAULT_MONTHS_AHEAD, now=None):
+    """Crée les partitions du mois courant et des mois suivants.
+
+    Args:
+        months_ahead (int, optional): Nombre de mois futurs à créer à l'avance.
+        now (datetime, optional): Date de référence (par défaut maintenant).
+
+    Returns:
+        list[str]: Noms des partitions créées.
+    """
+    now = now or datetime.utcnow()
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(table):
+            continue
+        existing = {name for name, month in list_partitions(table)}
+        for offset in range(months_ahead + 1):
+            month = _month_start(now, offset)
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            # Note : si la partition par défaut contient déjà des lignes de ce
+            # mois, PostgreSQL refuse la création ; elles doivent être déplacées
+            db.session.execute(db.text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month}') TO ('{_month_start(month, 1)}')"
+            ))
+            created.append(name)
+    db.session.commit()
+    if created:
+        logger.info(f"Partitions créées: {', '.join(created)}")
+    return created
+
+
+def drop_partitions_before(table, cutoff):
+    """Supprime les partitions mensuelles entièrement antérieures à une date.
+
+    Pour les tables de ``LAST_USED``, une partition n'est supprimée que si
+    aucune de ses lignes n'a été utilisée depuis ``cutoff`` : ses lignes
+    encore vivantes restent, et la purge par lots traitera les autres.
+
+    Args:
+        table (str): Table partitionnée.
+        cutoff (datetime): Seules les partitions dont le mois se termine avant
+            cette date sont supprimées.
+
+    Returns:
+        list[str]: Noms des partitions supprimées.
+    """
+    if not is_partitioned(table):
+        return []
+
+    dropped = []
+    for name, month in list_partitions(table):
+        if _month_start(month, 1) > cutoff.date():
+            break
+        if table in LAST_USED and db.session.execute(db.text(
+            f"SELECT EXISTS (SELECT 1 FROM {name} WHERE {LAST_USED[table]} >= :cutoff)"
+        ), {'cutoff': cutoff}).scalar():
+            logger.info(f"Partition {name} conservée : elle contient des données encore utilisées")
+            continue
+        try:
+            if table == 'collected_data':
+                # La référence des exécutions n'est pas une clé étrangère sur
+                # une table partitionnée : elle est remise à NULL explicitement
+                db.session.execute(db.text(
+                    f"UPDATE data_collection_runs SET reused_data_id = NULL "
+                    f"WHERE reused_data_id IN (SELECT id FROM {name})"
+                ))
+            db.session.execute(db.text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            db.session.execute(db.text(f"DROP TABLE {name}"))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        dropped.append(name)
+        logger.info(f"Partition {name} supprimée")
+    return dropped
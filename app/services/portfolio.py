@@ -0,0 +1,307 @@
+"""
+Positions de portefeuille matérialisées à partir des transactions (TradeData).
+
+Chaque couple (utilisateur, actif) a une ligne ``portfolio_positions`` mise à
+jour lors du flush qui insère des transactions 'completed', dans la même
+transaction. Les lectures du portefeuille ne parcourent donc qu'une ligne
+par actif.
+
+Le P&L réalisé est calculé selon deux méthodes :
+
+- coût moyen : une vente réalise ``quantité × (prix − coût moyen)`` ;
+- FIFO : une vente consomme les lots d'achat les plus anciens.
+
+Les frais d'achat sont inclus dans le coût, les frais de vente déduits du
+P&L réalisé. Les positions sont uniquement longues : la part d'une vente
+qui dépasse la quantité détenue est ignorée.
+
+Une transaction antérieure à la dernière transaction connue de la position
+déclenche le recalcul complet de ce couple, pour que le FIFO reste exact.
+Les modifications ou suppressions de transactions existantes ne sont pas
+suivies : ``flask rebuild-positions`` recalcule tout l'historique.
+"""
+import logging
+from collections import defaultdict, deque
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models.ma_economy import _dialect_insert
+from ..models.trade import TradeData, TradeCandle, PortfolioPosition
+
+logger = logging.getLogger(__name__)
+
+# Tolérance des comparaisons de quantités
+EPSILON = 1e-9
+
+_TRADE_COLUMNS = ['user_id', 'asset', 'timestamp', 'id', 'side', 'amount', 'price', 'fee']
+
+
+def empty_position():
+    """Retourne l'état d'une position sans transaction."""
+    return {
+        'quantity': 0.0,
+        'cost_basis': 0.0,
+        'realized_pnl_avg': 0.0,
+        'realized_pnl_fifo': 0.0,
+        'fees': 0.0,
+        'fifo_lots': [],
+        'trade_count': 0,
+        'last_trade_at': None,
+    }
+
+
+def apply_trades(position, sides, amounts, prices, fees, timestamps):
+    """Rejoue des transactions, dans l'ordre chronologique, sur une position.
+
+    Args:
+        position (dict): État de départ (voir ``empty_position``).
+        sides, amounts, prices, fees, timestamps: Séquences alignées (listes
+            ou tableaux numpy) décrivant les transactions.
+
+    Returns:
+        dict: Nouvel état de la position.
+    """
+    quantity = position['quantity']
+    cost_basis = position['cost_basis']
+    realized_avg = position['realized_pnl_avg']
+    realized_fifo = position['realized_pnl_fifo']
+    total_fees = position['fees']
+    lots = deque(list(lot) for lot in position['fifo_lots'])
+    last_trade_at = position['last_trade_at']
+
+    for side, amount, price, fee, timestamp in zip(sides, amounts, prices, fees, timestamps):
+        fee = float(fee or 0.0)
+        if side == 'buy':
+            quantity += amount
+            cost_basis += amount * price + fee
+            lots.append([amount, price + fee / amount if amount else price])
+        else:
+            matched = min(amount, quantity)
+            if amount - matched > EPSILON:
+                logger.debug(f"Vente de {amount} supérieure à la position détenue ({quantity})")
+            if quantity > EPSILON:
+                average = cost_basis / quantity
+                realized_avg += matched * (price - average)
+                cost_basis -= matched * average
+            quantity -= matched
+
+            remaining, fifo_cost = matched, 0.0
+            while remaining > EPSILON and lots:
+                lot = lots[0]
+                taken = min(lot[0], remaining)
+                fifo_cost += taken * lot[1]
+                remaining -= taken
+                lot[0] -= taken
+                if lot[0] <= EPSILON:
+                    lots.popleft()
+            realized_fifo += matched * price - fifo_cost
+            realized_avg -= fee
+            realized_fifo -= fee
+
+        total_fees += fee
+        if last_trade_at is None or timestamp > last_trade_at:
+            last_trade_at = timestamp
+
+    if quantity <= EPSILON:
+        # Position soldée : pas de reliquat dû aux arrondis
+        quantity, cost_basis, lots = 0.0, 0.0, deque()
+
+    return {
+        'quantity': quantity,
+        'cost_basis': cost_basis,
+        'realized_pnl_avg': realized_avg,
+        'realized_pnl_fifo': realized_fifo,
+        'fees': total_fees,
+        'fifo_lots': [list(lot) for lot in lots],
+        'trade_count': position['trade_count'] + len(sides),
+        'last_trade_at': last_trade_at,
+    }
+
+
+def _replay_frame(frame):
+    """Rejoue un DataFrame de transactions trié, par couple (utilisateur, actif)."""
+    positions = []
+    for (user_id, asset), trades in frame.groupby(['user_id', 'asset'], sort=False):
+        state = apply_trades(
+            empty_position(),
+            trades['side'].to_numpy(),
+            trades['amount'].to_numpy(dtype=float),
+            trades['price'].to_numpy(dtype=float),
+            trades['fee'].fillna(0.0).to_numpy(dtype=float),
+            [ts.to_pydatetime() for ts in trades['timestamp']]
+        )
+        positions.append(dict(state, user_id=int(user_id), asset=asset))
+    return positions
+
+
+def _completed_trades(user_id=None, asset=None):
+    """Requête des transactions d'utilisateurs terminées, dans l'ordre de rejeu."""
+    query = db.select(
+        TradeData.user_id, TradeData.asset, TradeData.timestamp, TradeData.id,
+        TradeData.side, TradeData.amount, TradeData.price, TradeData.fee
+    ).where(TradeData.status == 'completed', TradeData.user_id.isnot(None))
+    if user_id is not None:
+        query = query.where(TradeData.user_id == user_id)
+    if asset is not None:
+        query = query.where(TradeData.asset == asset)
+    return query.order_by(TradeData.user_id, TradeData.asset, TradeData.timestamp, TradeData.id)
+
+
+def rebuild_positions(user_id=None):
+    """Recalcule les positions à partir de tout l'historique des transactions.
+
+    Les transactions sont chargées et triées en un seul passage, puis
+    regroupées par couple (utilisateur, actif) avec pandas ; chaque groupe
+    est rejoué une fois sur des tableaux numpy.
+
+    Args:
+        user_id (int, optional): Utilisateur à recalculer (tous par défaut).
+
+    Returns:
+        int: Nombre de positions écrites.
+    """
+    rows = db.session.execute(_completed_trades(user_id)).all()
+    frame = pd.DataFrame(rows, columns=_TRADE_COLUMNS)
+    positions = _replay_frame(frame) if not frame.empty else []
+
+    try:
+        deleted = PortfolioPosition.query
+        if user_id is not None:
+            deleted = deleted.filter_by(user_id=user_id)
+        deleted.delete(synchronize_session=False)
+        if positions:
+            db.session.execute(db.insert(PortfolioPosition.__table__), [
+                dict(position, updated_at=datetime.utcnow()) for position in positions
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"Positions recalculées: {len(positions)} à partir de {len(frame)} transactions")
+    return len(positions)
+
+
+def refresh_positions(pairs):
+    """Recalcule et valide les positions de couples (utilisateur, actif) donnés.
+
+    Utilisé après un chargement qui ne passe pas par la session (``COPY``),
+    où le calcul incrémental lors du flush n'a pas lieu.
+
+    Args:
+        pairs (Iterable[tuple]): Couples (utilisateur, actif).
+
+    Returns:
+        int: Nombre de positions écrites.
+    """
+    table = PortfolioPosition.__table__
+    count = 0
+    try:
+        for user_id, asset in sorted(set(pairs)):
+            frame = pd.DataFrame(db.session.execute(_completed_trades(user_id, asset)).all(),
+                                 columns=_TRADE_COLUMNS)
+            db.session.execute(table.delete().where(
+                table.c.user_id == user_id, table.c.asset == asset))
+            if frame.empty:
+                continue
+            db.session.execute(db.insert(table), [
+                dict(position, updated_at=datetime.utcnow()) for position in _replay_frame(frame)
+            ])
+            count += 1
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"Positions recalculées: {count}")
+    return count
+
+
+def _update_position(connection, user_id, asset, trades):
+    """Applique de nouvelles transactions à une position, verrouillée pendant la mise à jour."""
+    table = PortfolioPosition.__table__
+    select_position = db.select(table).where(
+        table.c.user_id == user_id, table.c.asset == asset
+    ).with_for_update()
+
+    row = connection.execute(select_position).mappings().first()
+    if row is None:
+        stmt = _dialect_insert(table)
+        values = dict(empty_position(), user_id=user_id, asset=asset, updated_at=datetime.utcnow())
+        if stmt is not None:
+            # Deux transactions concurrentes peuvent créer la même position
+            connection.execute(stmt.values(**values).on_conflict_do_nothing(
+                index_elements=['user_id', 'asset']))
+        else:
+            connection.execute(table.insert().values(**values))
+        row = connection.execute(select_position).mappings().first()
+
+    trades = sorted(trades, key=lambda t: (t.timestamp, t.id))
+    if row['last_trade_at'] is not None and trades[0].timestamp < row['last_trade_at']:
+        # Transaction insérée dans le passé : le FIFO doit être rejoué en entier
+        frame = pd.DataFrame(connection.execute(_completed_trades(user_id, asset)).all(),
+                             columns=_TRADE_COLUMNS)
+        state = _replay_frame(frame)[0]
+        del state['user_id'], state['asset']
+    else:
+        state = apply_trades(
+            {key: row[key] for key in empty_position()},
+            [t.side for t in trades], [t.amount for t in trades], [t.price for t in trades],
+            [t.fee for t in trades], [t.timestamp for t in trades]
+        )
+
+    connection.execute(table.update().where(table.c.id == row['id']).values(
+        updated_at=datetime.utcnow(), **state
+    ))
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_new_trades(session, flush_context):
+    """Met à jour les positions touchées par les transactions insérées par ce flush."""
+    trades = defaultdict(list)
+    for obj in session.new:
+        if (isinstance(obj, TradeData) and obj.status == 'completed'
+                and obj.user_id is not None and obj.timestamp):
+            trades[(obj.user_id, obj.asset)].append(obj)
+
+    if trades:
+        connection = session.connection()
+        for (user_id, asset), new_trades in trades.items():
+            _update_position(connection, user_id, asset, new_trades)
+
+
+def get_portfolio(user_id):
+    """Retourne les positions d'un utilisateur avec leur P&L latent.
+
+    Le dernier prix de chaque actif est la clôture de sa bougie journalière
+    la plus récente.
+
+    Args:
+        user_id (int): Utilisateur.
+
+    Returns:
+        list[dict]: Positions (voir ``PortfolioPosition.to_dict``).
+    """
+    positions = PortfolioPosition.query.filter_by(user_id=user_id)\
+        .order_by(PortfolioPosition.asset).all()
+    if not positions:
+        return []
+
+    latest = db.select(
+        TradeCandle.asset, db.func.max(TradeCandle.timestamp).label('timestamp')
+    ).where(
+        TradeCandle.interval == '1d',
+        TradeCandle.asset.in_([position.asset for position in positions])
+    ).group_by(TradeCandle.asset).subquery()
+    prices = dict(db.session.execute(
+        db.select(TradeCandle.asset, TradeCandle.close).join(
+            latest,
+            db.and_(TradeCandle.asset == latest.c.asset, TradeCandle.timestamp == latest.c.timestamp)
+        ).where(TradeCandle.interval == '1d')
+    ).all())
+
+    return [position.to_dict(last_price=prices.get(position.asset)) for position in positions]
@@ -0,0 +1,385 @@
+"""
+Résilience des appels HTTP des collecteurs : nouvel essai, limitation de débit
+et disjoncteur, par hôte.
+
+Chaque hôte interrogé a son ``HostGuard`` (partagé par tout le processus) :
+
+- ``TokenBucket`` : seau à jetons qui espace les requêtes vers l'hôte ;
+- ``CircuitBreaker`` : après ``failure_threshold`` échecs consécutifs, le
+  circuit s'ouvre et les appels échouent immédiatement (``CircuitOpenError``)
+  pendant ``recovery_timeout`` secondes ; un seul appel d'essai est ensuite
+  autorisé, qui referme le circuit s'il réussit ;
+- une limite d'appels simultanés : au-delà, les appels échouent immédiatement
+  au lieu d'attendre, ce qui borne le nombre de threads bloqués sur une
+  source lente.
+
+Les erreurs réseau, les délais dépassés et les réponses 429 ou 5xx sont
+réessayés avec un délai exponentiel aléatoire (« full jitter ») ; les autres
+réponses sont retournées telles quelles à l'appelant.
+
+L'état des disjoncteurs est publié dans le cache partagé pour la supervision
+(voir ``circuit_states``).
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Nouvel essai
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BACKOFF = 0.5  # secondes, doublé à chaque essai
+DEFAULT_BACKOFF_MAX = 8  # secondes
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Limitation par hôte
+DEFAULT_RATE = 5.0  # requêtes par seconde
+DEFAULT_BURST = 5  # requêtes consécutives sans attente
+DEFAULT_MAX_RATE_WAIT = 30  # attente maximale d'un jeton (secondes)
+DEFAULT_MAX_CONCURRENT = 6  # appels simultanés par hôte
+
+# Disjoncteur
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 60  # secondes
+
+CIRCUITS_CACHE_KEY = 'collector_circuits'
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+class ResilienceError(Exception):
+    """Appel refusé sans être tenté."""
+
+
+class CircuitOpenError(ResilienceError):
+    """Le disjoncteur de l'hôte est ouvert : l'appel n'est pas tenté."""
+
+
+class HostBusyError(ResilienceError):
+    """Trop d'appels simultanés ou d'attente de débit vers l'hôte."""
+
+
+class RetryableStatusError(Exception):
+    """Réponse HTTP 429 ou 5xx, réessayée puis retournée après le dernier essai."""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF, maximum=DEFAULT_BACKOFF_MAX):
+    """Délai aléatoire avant l'essai suivant (« full jitter »), en secondes."""
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe.
+
+    Args:
+        rate (float): Jetons ajoutés par seconde.
+        capacity (int): Nombre maximal de jetons accumulés.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Réserve un jeton et retourne l'attente nécessaire avant de l'utiliser, en secondes."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def cancel(self):
+        """Rend un jeton réservé mais non utilisé."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class CircuitBreaker:
+    """Disjoncteur à trois états : 'closed', 'open' et 'half_open'.
+
+    Args:
+        name (str): Nom (hôte) du disjoncteur.
+        failure_threshold (int): Échecs consécutifs qui ouvrent le circuit.
+        recovery_timeout (float): Durée d'ouverture avant un appel d'essai, en secondes.
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout=DEFAULT_RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Autorise un appel ou lève ``CircuitOpenError``."""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self._transition('half_open')
+            if self.state == 'half_open' and not self._trial_running:
+                # Un seul appel d'essai à la fois
+                self._trial_running = True
+                return
+            raise CircuitOpenError(f"Circuit ouvert pour {self.name}: {self.last_error}")
+
+    def record_success(self):
+        """Enregistre un appel réussi (le circuit se referme)."""
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            if self.state != 'closed':
+                self._transition('closed')
+
+    def record_failure(self, error):
+        """Enregistre un échec ; ouvre le circuit au seuil ou si l'appel d'essai échoue."""
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            self._trial_running = False
+            if self.state == 'half_open' or (
+                    self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition('open')
+
+    def record_neutral(self):
+        """Termine un appel sans conclusion sur l'état de l'hôte (erreur locale, appel annulé)."""
+        with self._lock:
+            self._trial_running = False
+
+    def snapshot(self):
+        """État du disjoncteur pour la supervision."""
+        retry_in = None
+        if self.state == 'open':
+            retry_in = max(0.0, round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1))
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'retry_in': retry_in,
+            'updated_at': datetime.utcnow().isoformat(),
+        }
+
+    def _transition(self, state):
+        self.state = state
+        log = logger.warning if state == 'open' else logger.info
+        log(f"Disjoncteur {self.name}: {state}")
+        _publish(self.name, self.snapshot())
+
+
+class HostGuard:
+    """Protections d'un hôte : débit, disjoncteur et appels simultanés."""
+
+    def __init__(self, host, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout=DEFAULT_RECOVERY_TIMEOUT, max_rate_wait=DEFAULT_MAX_RATE_WAIT):
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(host, failure_threshold, recovery_timeout)
+        self.max_rate_wait = max_rate_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def acquire(self):
+        """Réserve une place d'appel ; retourne l'attente de débit à respecter.
+
+        Raises:
+            CircuitOpenError: Si le circuit est ouvert.
+            HostBusyError: Si toutes les places sont prises ou l'attente trop longue.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HostBusyError(f"Trop d'appels simultanés vers {self.host}")
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._slots.release()
+            raise
+        delay = self.bucket.reserve()
+        if delay > self.max_rate_wait:
+            self.bucket.cancel()
+            self.breaker.record_neutral()
+            self._slots.release()
+            raise HostBusyError(f"Débit maximal atteint pour {self.host}")
+        return delay
+
+    def release(self):
+        """Libère la place réservée par ``acquire``."""
+        self._slots.release()
+
+
+def _settings():
+    """Paramètres de résilience de la configuration (valeurs par défaut hors application).
+
+    Les threads de collecte s'exécutent dans le contexte de l'application
+    (voir ``collection_orchestrator.fetch_all``).
+    """
+    config = current_app.config if has_app_context() else {}
+    return {
+        'attempts': config.get('COLLECTOR_RETRY_ATTEMPTS', DEFAULT_ATTEMPTS),
+        'backoff': config.get('COLLECTOR_RETRY_BACKOFF', DEFAULT_BACKOFF),
+        'backoff_max': config.get('COLLECTOR_RETRY_BACKOFF_MAX', DEFAULT_BACKOFF_MAX),
+        'rate_limits': config.get('COLLECTOR_RATE_LIMITS', {}),
+        'rate': config.get('COLLECTOR_RATE_LIMIT', DEFAULT_RATE),
+        'max_concurrent': config.get('COLLECTOR_MAX_CONCURRENT_PER_HOST', DEFAULT_MAX_CONCURRENT),
+        'failure_threshold': config.get('COLLECTOR_CIRCUIT_FAILURES', DEFAULT_FAILURE_THRESHOLD),
+        'recovery_timeout': config.get('COLLECTOR_CIRCUIT_RECOVERY', DEFAULT_RECOVERY_TIMEOUT),
+    }
+
+
+def get_guard(url):
+    """Retourne les protections de l'hôte d'une URL, créées à la première utilisation."""
+    host = urlsplit(url).netloc
+    guard = _guards.get(host)
+    if guard is None:
+        settings = _settings()
+        with _guards_lock:
+            guard = _guards.get(host)
+            if guard is None:
+                rate = settings['rate_limits'].get(host, settings['rate'])
+                guard = HostGuard(
+                    host, rate=rate, burst=max(1, int(rate)),
+                    max_concurrent=settings['max_concurrent'],
+                    failure_threshold=settings['failure_threshold'],
+                    recovery_timeout=settings['recovery_timeout']
+                )
+                _guards[host] = guard
+                logger.info(
+                    f"Protections de {host}: {rate} requêtes/s, "
+                    f"{settings['max_concurrent']} appels simultanés, "
+                    f"circuit ouvert après {settings['failure_threshold']} échecs"
+                )
+    return guard
+
+
+def _is_retryable(error):
+    """Erreurs transitoires : réseau, délai dépassé, 429 ou 5xx."""
+    if isinstance(error, (RetryableStatusError, requests.exceptions.ConnectionError,
+                          requests.exceptions.Timeout)):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(error, httpx.TransportError)
+
+
+def _check_status(response):
+    if response.status_code in RETRY_STATUS_CODES:
+        raise RetryableStatusError(response)
+    return response
+
+
+def call(url, func):
+    """Exécute un appel HTTP synchrone avec nouvels essais, débit et disjoncteur.
+
+    Args:
+        url (str): URL appelée (détermine l'hôte).
+        func (callable): Appel sans argument qui retourne une réponse HTTP.
+
+    Returns:
+        La réponse HTTP (éventuellement 429 ou 5xx après le dernier essai).
+
+    Raises:
+        ResilienceError: Si l'appel n'est pas tenté (circuit ouvert, hôte saturé).
+        requests.exceptions.RequestException: Erreur du dernier essai.
+    """
+    guard, settings = get_guard(url), _settings()
+    for attempt in range(settings['attempts']):
+        time.sleep(guard.acquire())
+        try:
+            response = _check_status(func())
+        except Exception as e:
+            if _is_retryable(e):
+                guard.breaker.record_failure(e)
+            else:
+                guard.breaker.record_neutral()
+            if not _is_retryable(e) or attempt + 1 >= settings['attempts']:
+                if isinstance(e, RetryableStatusError):
+                    return e.response
+                raise
+            logger.info(f"Nouvel essai pour {url} après l'erreur: {e}")
+        else:
+            guard.breaker.record_success()
+            return response
+        finally:
+            guard.release()
+        time.sleep(backoff_delay(attempt, settings['backoff'], settings['backoff_max']))
+
+
+async def call_async(url, func):
+    """Équivalent asynchrone de ``call`` (``func`` retourne une coroutine)."""
+    guard, settings = get_guard(url), _settings()
+    for attempt in range(settings['attempts']):
+        await asyncio.sleep(guard.acquire())
+        try:
+            response = _check_status(await func())
+        except Exception as e:
+            if _is_retryable(e):
+                guard.breaker.record_failure(e)
+            else:
+                guard.breaker.record_neutral()
+            if not _is_retryable(e) or attempt + 1 >= settings['attempts']:
+                if isinstance(e, RetryableStatusError):
+                    return e.response
+                raise
+            logger.info(f"Nouvel essai pour {url} après l'erreur: {e}")
+        else:
+            guard.breaker.record_success()
+            return response
+        finally:
+            guard.release()
+        await asyncio.sleep(backoff_delay(attempt, settings['backoff'], settings['backoff_max']))
+
+
+def _publish(host, snapshot):
+    """Publie l'état d'un disjoncteur dans le cache partagé (si une application est active)."""
+    if not has_app_context():
+        return
+    try:
+        from app import cache
+        states = cache.get(CIRCUITS_CACHE_KEY) or {}
+        states[host] = snapshot
+        cache.set(CIRCUITS_CACHE_KEY, states, timeout=0)
+    except Exception as e:
+        logger.debug(f"Publication de l'état du disjoncteur impossible: {e}")
+
+
+def circuit_states():
+    """État des disjoncteurs, par hôte.
+
+    Combine les états publiés dans le cache par tous les processus (workers
+    de collecte) et ceux du processus courant, plus récents.
+
+    Returns:
+        dict: Par hôte, voir ``CircuitBreaker.snapshot``.
+    """
+    states = {}
+    if has_app_context():
+        try:
+            from app import cache
+            states.update(cache.get(CIRCUITS_CACHE_KEY) or {})
+        except Exception as e:
+            logger.debug(f"Lecture de l'état des disjoncteurs impossible: {e}")
+    states.update({host: guard.breaker.snapshot() for host, guard in list(_guards.items())})
+    return states
@@ -0,0 +1,207 @@
+"""
+Rétention de l'historique de collecte (CollectedData et DataCollectionRun).
+
+Les lignes expirées sont supprimées par lots bornés de clés primaires, chaque
+lot dans sa propre transaction, avec une pause entre les lots : les verrous
+restent courts et le volume de WAL par transaction est limité. La durée de
+conservation peut être définie par type de données ; les lignes expirées
+peuvent être archivées dans des fichiers JSON Lines compressés (gzip) avant
+leur suppression.
+
+Sous PostgreSQL, si ``collected_data`` est partitionnée par mois (voir
+``partitioning``), les mois entièrement expirés pour tous les types sont
+d'abord supprimés par ``DROP`` de partition ; la suppression par lots ne
+traite plus que le reste (ou tout, si les lignes doivent être archivées).
+
+Le traitement est reprenable : la sélection ne dépend que des dates, donc
+une exécution interrompue reprend simplement là où la précédente s'est
+arrêtée. Chaque lot est archivé dans un fichier nommé d'après sa plage de
+clés primaires, écrit puis renommé atomiquement ; si la suppression du lot
+échoue, la reprise réécrit le fichier du même lot au lieu d'archiver ses
+lignes une seconde fois.
+"""
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from ..extensions import db
+from ..models.data_collection import DataCollectionRun, CollectedData
+from .partitioning import drop_partitions_before
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_PAUSE = 0.1  # secondes
+
+
+def _expired_ids(criteria, batch_size):
+    """IDs d'un lot de données expirées, par ordre de clé primaire."""
+    return [row.id for row in db.session.query(CollectedData.id)
+            .filter(*criteria).order_by(CollectedData.id).limit(batch_size)]
+
+
+def _archive_batch(archive_dir, data_type, ids):
+    """Archive un lot de données dans un fichier gzip propre à sa plage d'IDs.
+
+    Le fichier d'un lot dont la suppression a échoué est remplacé lors de la
+    reprise (même premier ID), jamais complété : une ligne n'est archivée
+    qu'une fois.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    prefix = os.path.join(archive_dir, f"collected_data-{data_type}-{ids[0]:012d}-")
+    path = f"{prefix}{ids[-1]:012d}.jsonl.gz"
+    rows = CollectedData.query.options(CollectedData.with_payload())\
+        .filter(CollectedData.id.in_(ids)).order_by(CollectedData.id)
+    # Écriture dans un fichier temporaire puis renommage : une interruption
+    # ne laisse jamais de fichier partiel
+    with gzip.open(f"{path}.tmp", 'wt', encoding='utf-8') as archive:
+        for row in rows:
+            archive.write(json.dumps(row.to_dict(), ensure_ascii=False, default=str) + '\n')
+    os.replace(f"{path}.tmp", path)
+    # Un lot repris a pu s'étendre au-delà de la plage précédente
+    for previous in glob.glob(f"{glob.escape(prefix)}*.jsonl.gz"):
+        if previous != path:
+            os.remove(previous)
+    return path
+
+
+def purge_collected_data(data_type, cutoff, batch_size=DEFAULT_BATCH_SIZE,
+                         pause=DEFAULT_BATCH_PAUSE, archive_dir=None,
+                         exclude_types=(), progress=None):
+    """Supprime par lots les données collectées expirées d'un type.
+
+    Args:
+        data_type (str): Type de données, ou None pour tous les types sauf
+            ``exclude_types``.
+        cutoff (datetime): Les données non revues depuis cette date sont supprimées.
+        batch_size (int, optional): Nombre de lignes par lot.
+        pause (float, optional): Pause entre deux lots, en secondes.
+        archive_dir (str, optional): Répertoire d'archive ; aucune archive si None.
+        exclude_types (Iterable[str], optional): Types ignorés quand ``data_type`` est None.
+        progress (callable, optional): Appelée après chaque lot avec
+            (étape, nombre de lignes supprimées depuis le début).
+
+    Returns:
+        int: Nombre de lignes supprimées.
+    """
+    criteria = [db.func.coalesce(CollectedData.last_seen_at, CollectedData.collected_at) < cutoff]
+    if data_type is not None:
+        criteria.append(CollectedData.data_type == data_type)
+    elif exclude_types:
+        criteria.append(CollectedData.data_type.notin_(list(exclude_types)))
+    label = data_type or 'default'
+
+    deleted = 0
+    while True:
+        ids = _expired_ids(criteria, batch_size)
+        if not ids:
+            break
+        try:
+            if archive_dir:
+                _archive_batch(archive_dir, label, ids)
+            # Les exécutions qui réutilisaient ces données n'y font plus référence
+            DataCollectionRun.query.filter(DataCollectionRun.reused_data_id.in_(ids))\
+                .update({DataCollectionRun.reused_data_id: None}, synchronize_session=False)
+            deleted += CollectedData.query.filter(CollectedData.id.in_(ids))\
+                .delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        logger.info(f"Rétention {label}: {deleted} données supprimées")
+        if progress:
+            progress(f'collected_data:{label}', deleted)
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return deleted
+
+
+def purge_runs(cutoff, batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_BATCH_PAUSE, progress=None):
+    """Supprime par lots les exécutions terminées qui ne possèdent plus de données.
+
+    Args:
+        cutoff (datetime): Les exécutions terminées avant cette date sont supprimées.
+        batch_size (int, optional): Nombre de lignes par lot.
+        pause (float, optional): Pause entre deux lots, en secondes.
+        progress (callable, optional): Voir ``purge_collected_data``.
+
+    Returns:
+        int: Nombre d'exécutions supprimées.
+    """
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.session.query(DataCollectionRun.id).filter(
+            DataCollectionRun.completed_at < cutoff,
+            ~db.exists().where(CollectedData.run_id == DataCollectionRun.id)
+        ).order_by(DataCollectionRun.id).limit(batch_size)]
+        if not ids:
+            break
+        try:
+            deleted += DataCollectionRun.query.filter(DataCollectionRun.id.in_(ids))\
+                .delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        logger.info(f"Rétention: {deleted} exécutions supprimées")
+        if progress:
+            progress('data_collection_runs', deleted)
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return deleted
+
+
+def apply_retention(default_days=DEFAULT_RETENTION_DAYS, policies=None,
+                    batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_BATCH_PAUSE,
+                    archive_dir=None, progress=None, now=None):
+    """Applique les politiques de rétention à tout l'historique de collecte.
+
+    Args:
+        default_days (int, optional): Conservation des types sans politique, en jours.
+        policies (dict, optional): Conservation en jours par type de données.
+        batch_size (int, optional): Nombre de lignes par lot.
+        pause (float, optional): Pause entre deux lots, en secondes.
+        archive_dir (str, optional): Répertoire d'archive des lignes supprimées.
+        progress (callable, optional): Voir ``purge_collected_data``.
+        now (datetime, optional): Date de référence (par défaut maintenant).
+
+    Returns:
+        dict: Nombre de données supprimées par type ('collected_data'),
+            partitions supprimées ('partitions') et nombre d'exécutions
+            supprimées ('runs').
+    """
+    now = now or datetime.utcnow()
+    policies = policies or {}
+    stats = {'collected_data': {}, 'partitions': [], 'runs': 0}
+
+    # Les mois expirés pour tous les types sont supprimés en bloc (sauf si
+    # les lignes doivent être archivées, ce qui impose de les lire par lots)
+    if not archive_dir:
+        longest = max([default_days, *policies.values()])
+        stats['partitions'] = drop_partitions_before('collected_data', now - timedelta(days=longest))
+    if stats['partitions'] and progress:
+        progress('collected_data:partitions', len(stats['partitions']))
+
+    for data_type, days in policies.items():
+        stats['collected_data'][data_type] = purge_collected_data(
+            data_type, now - timedelta(days=days), batch_size, pause, archive_dir,
+            progress=progress
+        )
+    stats['collected_data']['default'] = purge_collected_data(
+        None, now - timedelta(days=default_days), batch_size, pause, archive_dir,
+        exclude_types=policies, progress=progress
+    )
+
+    # Une exécution n'est supprimée qu'une fois toutes ses données expirées
+    stats['runs'] = purge_runs(now - timedelta(days=min([default_days, *policies.values()])),
+                               batch_size, pause, progress=progress)
+    return stats
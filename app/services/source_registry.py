@@ -0,0 +1,264 @@
+"""
+Registre déclaratif des sources d'API collectées de façon incrémentale.
+
+Chaque source est décrite par une ``SourceDefinition`` : URL, paramètres,
+authentification, analyseur de la réponse, fréquence des observations et
+champ servant de curseur. Après chaque collecte enregistrée, la date de la
+dernière observation (« high-water mark ») est conservée par source dans
+``SourceCursor`` ; les collectes suivantes ne demandent que les
+observations à partir de cette dernière période (incluse, plus ``lookback``
+périodes) : les lignes publiées en retard pour une période déjà collectée
+sont ainsi reprises, et les charges identiques sont dédoublonnées par
+``CollectedData.store``. Le volume téléchargé, le temps d'analyse et les
+écritures en base suivent les nouvelles données, et non l'historique.
+
+Les valeurs des paramètres peuvent contenir les champs ``{since}`` (début de
+la fenêtre demandée), ``{today}`` et les arguments de la collecte (par
+exemple ``{series_id}``).
+"""
+import logging
+import os
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+logger = logging.getLogger(__name__)
+
+# Intervalle entre deux observations, par fréquence
+FREQUENCIES = {
+    'daily': relativedelta(days=1),
+    'weekly': relativedelta(weeks=1),
+    'monthly': relativedelta(months=1),
+    'quarterly': relativedelta(months=3),
+    'yearly': relativedelta(years=1),
+}
+
+
+def _parse_date(value):
+    """Convertit une période ISO ('2024', '2024-05', '2024-05-31...') en date."""
+    value = str(value)[:10]
+    if len(value) == 4:
+        value += '-01-01'
+    elif len(value) == 7:
+        value += '-01'
+    return date.fromisoformat(value)
+
+
+class SourceDefinition:
+    """Description déclarative d'une source d'API incrémentale.
+
+    Attributes:
+        name: Nom de la source dans le registre
+        url: URL de l'API
+        params: Paramètres de la requête (gabarits ``str.format``)
+        auth: Authentification : {'config_key': clé de configuration, puis
+            'param': nom du paramètre, ou 'header' et 'scheme' optionnel}
+        parser: Fonction ``parser(payload, **kwargs)`` retournant la liste des
+            observations d'une réponse
+        cursor_field: Champ des observations portant leur date
+        frequency: Fréquence des observations (voir ``FREQUENCIES``)
+        initial: Début de la première collecte : date ISO, ou ``timedelta``
+            avant aujourd'hui
+        page_size: Nombre d'observations par page ; None si l'API ne pagine pas
+        paging: Noms des paramètres (décalage, taille de page)
+        lookback: Nombre de périodes antérieures au curseur collectées à
+            nouveau, en plus de la période du curseur
+    """
+
+    def __init__(self, name, url, params=None, auth=None, parser=None, cursor_field='date',
+                 frequency='daily', initial=None, page_size=None, paging=('offset', 'length'),
+                 lookback=0):
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Fréquence inconnue pour la source {name}: {frequency}")
+        self.name = name
+        self.url = url
+        self.params = params or {}
+        self.auth = auth
+        self.parser = parser or (lambda payload, **kwargs: payload or [])
+        self.cursor_field = cursor_field
+        self.frequency = frequency
+        self.initial = initial
+        self.page_size = page_size
+        self.paging = paging
+        self.lookback = lookback
+
+    def __repr__(self):
+        return f'<SourceDefinition {self.name} ({self.frequency})>'
+
+    def key(self, **kwargs):
+        """Identifiant du curseur : nom de la source et arguments de la collecte."""
+        return ':'.join([self.name] + [str(kwargs[name]) for name in sorted(kwargs)])
+
+    def start(self, high_water_mark=None, today=None):
+        """Début de la fenêtre à demander.
+
+        La période du curseur (et les ``lookback`` précédentes) est collectée
+        à nouveau : une période peut compter plusieurs lignes publiées à des
+        moments différents. Sans curseur, la fenêtre part de ``initial``.
+        """
+        if high_water_mark:
+            try:
+                start = _parse_date(high_water_mark)
+            except ValueError:
+                return str(high_water_mark)[:10]
+            return (start - FREQUENCIES[self.frequency] * self.lookback).isoformat()
+        today = today or date.today()
+        if isinstance(self.initial, timedelta):
+            return (today - self.initial).isoformat()
+        return self.initial or today.isoformat()
+
+    def is_due(self, high_water_mark, today=None):
+        """Indique si une observation postérieure au curseur peut être publiée."""
+        if not high_water_mark:
+            return True
+        try:
+            expected = _parse_date(high_water_mark) + FREQUENCIES[self.frequency]
+        except ValueError:
+            return True
+        return (today or date.today()) >= expected
+
+    def request(self, config, since, **kwargs):
+        """Construit les paramètres et en-têtes d'une requête.
+
+        Args:
+            config: Configuration contenant les identifiants (à défaut, variables
+                d'environnement du même nom)
+            since: Début de la fenêtre demandée
+            **kwargs: Arguments de la collecte, disponibles dans les gabarits
+
+        Returns:
+            tuple: (paramètres, en-têtes)
+
+        Raises:
+            ValueError: Si l'identifiant requis est absent de la configuration
+        """
+        fields = {'since': since, 'today': date.today().isoformat(), **kwargs}
+        params = {
+            name: value.format(**fields) if isinstance(value, str) else value
+            for name, value in self.params.items()
+        }
+        headers = {}
+        if self.auth:
+            credential = config.get(self.auth['config_key']) or os.getenv(self.auth['config_key'])
+            if not credential:
+                raise ValueError(f"Identifiant {self.auth['config_key']} manquant pour la source {self.name}")
+            if 'param' in self.auth:
+                params[self.auth['param']] = credential
+            else:
+                scheme = self.auth.get('scheme')
+                headers[self.auth['header']] = f'{scheme} {credential}' if scheme else credential
+        return params, headers
+
+    def in_window(self, records, high_water_mark=None):
+        """Observations de la fenêtre demandée (voir ``start``)."""
+        if not high_water_mark:
+            return list(records)
+        start = _parse_date(self.start(high_water_mark))
+        window = []
+        for record in records:
+            try:
+                if _parse_date(record.get(self.cursor_field) or '') >= start:
+                    window.append(record)
+            except ValueError:
+                continue
+        return window
+
+    def high_water_mark(self, records, current=None):
+        """Nouvelle valeur du curseur après l'enregistrement de ``records``."""
+        marks = [str(record[self.cursor_field]) for record in records
+                 if record.get(self.cursor_field)]
+        if current:
+            marks.append(current)
+        return max(marks) if marks else None
+
+
+# Analyseurs des réponses
+
+def parse_eia(payload, series_id=None):
+    """Observations d'une réponse de l'API v2 de l'EIA."""
+    if not isinstance(payload, dict):
+        return []
+    return list((payload.get('response') or {}).get('data') or [])
+
+
+def parse_emploi_store(payload, country='france'):
+    """Taux de chômage retournés par l'API emploi-store."""
+    if not isinstance(payload, list):
+        return []
+    return [
+        {
+            'date': item['date'],
+            'value': item['valeur'],
+            'unit': '%',
+            'country': country,
+            'indicator': 'unemployment_rate',
+            'source': 'emploi_store',
+            'frequency': 'monthly'
+        }
+        for item in payload
+        if 'date' in item and 'valeur' in item
+    ]
+
+
+SOURCES = {}
+
+
+def register_source(definition):
+    """Enregistre une source dans le registre.
+
+    Args:
+        definition (SourceDefinition): Source à enregistrer.
+
+    Returns:
+        SourceDefinition: La source enregistrée.
+    """
+    SOURCES[definition.name] = definition
+    return definition
+
+
+def get_source(name):
+    """Retourne la définition d'une source enregistrée.
+
+    Raises:
+        ValueError: Si la source n'est pas enregistrée
+    """
+    definition = SOURCES.get(name)
+    if definition is None:
+        raise ValueError(f"Source incrémentale inconnue: {name}")
+    return definition
+
+
+register_source(SourceDefinition(
+    name='eia_daily_fuel_type',
+    url='https://api.eia.gov/v2/electricity/rto/daily-fuel-type-data/data/',
+    params={
+        'frequency': 'daily',
+        'data[0]': 'value',
+        'facets[type][]': '{series_id}',
+        'start': '{since}',
+        'sort[0][column]': 'period',
+        'sort[0][direction]': 'asc',
+    },
+    auth={'config_key': 'EIA_API_KEY', 'param': 'api_key'},
+    parser=parse_eia,
+    cursor_field='period',
+    frequency='daily',
+    initial=timedelta(days=7),
+    page_size=5000,  # Maximum de l'API v2
+    lookback=1,  # Les lignes d'un jour (une par opérateur) arrivent sur plusieurs jours
+))
+
+register_source(SourceDefinition(
+    name='unemployment_france',
+    url='https://api.emploi-store.fr/partenaire/indicateur-mensuel/v1/indicateurs',
+    params={
+        'codeZoneGeographique': 'FRANCE',
+        'codeIndicateur': 'T3',  # Taux de chômage au sens du BIT
+        'dateDebut': '{since}',
+        'dateFin': '{today}',
+    },
+    auth={'config_key': 'EMPLOI_STORE_TOKEN', 'header': 'Authorization', 'scheme': 'Bearer'},
+    parser=parse_emploi_store,
+    frequency='monthly',
+    initial='2010-01-01',
+))
@@ -0,0 +1,311 @@
+"""
+File de tâches durable adossée à la table ``task_jobs``.
+
+Les tâches enregistrées avec ``@task`` sont mises en file par ``enqueue`` et
+exécutées par un processus dédié (``flask worker``), hors des workers web.
+Chaque worker réserve des tâches pour un délai de visibilité, prolongé tant
+qu'elles s'exécutent : si le worker disparaît, la réservation expire et la
+tâche est reprise par un autre. Une tâche qui lève une exception est
+réessayée avec un délai exponentiel, jusqu'à ``max_attempts`` essais.
+
+Sous PostgreSQL, la réservation utilise ``FOR UPDATE SKIP LOCKED`` : des
+workers concurrents ne s'attendent pas. Sous les autres dialectes, elle
+repose sur une mise à jour conditionnelle par tâche.
+
+Avec ``TASK_QUEUE_BACKEND = 'local'``, ``enqueue`` exécute les tâches dans un
+thread du processus courant (une à la fois), sans table ni worker.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from ..extensions import db
+from ..models.task_queue import TaskJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_VISIBILITY_TIMEOUT = 300  # secondes
+DEFAULT_RETRY_BACKOFF = 30  # secondes, doublé à chaque échec
+DEFAULT_RETRY_BACKOFF_MAX = 3600  # secondes
+
+# Tâches exécutables, par nom
+TASKS = {}
+
+# Exécuteur de repli du backend 'local' (créé à la première tâche)
+_local_executor = None
+_local_lock = threading.Lock()
+
+
+def task(func):
+    """Enregistre une fonction comme tâche exécutable par la file, sous son nom."""
+    TASKS[func.__name__] = func
+    return func
+
+
+def retry_delay(attempts, base=DEFAULT_RETRY_BACKOFF, maximum=DEFAULT_RETRY_BACKOFF_MAX):
+    """Délai avant un nouvel essai après ``attempts`` échecs, en secondes."""
+    return min(base * 2 ** max(attempts - 1, 0), maximum)
+
+
+def enqueue(name, args=(), kwargs=None, delay=0, max_attempts=None):
+    """Met une tâche en file.
+
+    Args:
+        name (str): Nom d'une tâche enregistrée avec ``@task``.
+        args (Iterable, optional): Arguments positionnels (sérialisables en JSON).
+        kwargs (dict, optional): Arguments nommés (sérialisables en JSON).
+        delay (float, optional): Délai avant la première exécution, en secondes.
+        max_attempts (int, optional): Nombre maximal d'essais (par défaut
+            TASK_QUEUE_MAX_ATTEMPTS).
+
+    Returns:
+        int: ID de la tâche, ou None avec le backend 'local'.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Tâche inconnue: {name}")
+    config = current_app.config
+    max_attempts = max_attempts or config.get('TASK_QUEUE_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+
+    if config.get('TASK_QUEUE_BACKEND', 'local') == 'local':
+        _run_local(current_app._get_current_object(), name, list(args), dict(kwargs or {}),
+                   max_attempts, delay)
+        return None
+
+    job = TaskJob(
+        name=name,
+        args=list(args),
+        kwargs=dict(kwargs or {}),
+        status='queued',
+        attempts=0,
+        max_attempts=max_attempts,
+        available_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    try:
+        db.session.add(job)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info(f"Tâche {name} mise en file (ID: {job.id})")
+    return job.id
+
+
+def _run_local(app, name, args, kwargs, max_attempts, delay=0, attempt=1):
+    """Exécute une tâche dans le thread de repli, avec ses essais suivants."""
+    global _local_executor
+    if delay:
+        timer = threading.Timer(delay, _run_local,
+                                args=(app, name, args, kwargs, max_attempts, 0, attempt))
+        timer.daemon = True
+        timer.start()
+        return
+
+    def execute():
+        with app.app_context():
+            try:
+                TASKS[name](*args, **kwargs)
+            except Exception as e:
+                db.session.rollback()
+                if attempt >= max_attempts:
+                    logger.error(f"Tâche {name} abandonnée après {attempt} essais: {e}")
+                    return
+                wait_for = retry_delay(attempt, app.config.get('TASK_QUEUE_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF),
+                                       app.config.get('TASK_QUEUE_RETRY_BACKOFF_MAX', DEFAULT_RETRY_BACKOFF_MAX))
+                logger.warning(f"Tâche {name} en échec (essai {attempt}), nouvel essai dans {wait_for}s: {e}")
+                _run_local(app, name, args, kwargs, max_attempts, wait_for, attempt + 1)
+
+    with _local_lock:
+        if _local_executor is None:
+            _local_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='task-local')
+    _local_executor.submit(execute)
+
+
+def claim_jobs(worker_id, limit, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """Réserve des tâches disponibles pour un worker.
+
+    Une tâche est disponible si elle est en file et que son heure est venue,
+    ou si la réservation d'un autre worker a expiré.
+
+    Args:
+        worker_id (str): Identifiant du worker.
+        limit (int): Nombre maximal de tâches réservées.
+        visibility_timeout (float, optional): Durée de la réservation, en secondes.
+
+    Returns:
+        list[tuple]: (id, nom, args, kwargs) des tâches réservées.
+    """
+    now = datetime.utcnow()
+    table = TaskJob.__table__
+    expired = db.and_(table.c.status == 'running', table.c.locked_until < now)
+    ready = db.or_(db.and_(table.c.status == 'queued', table.c.available_at <= now), expired)
+
+    try:
+        # Réservation expirée sur le dernier essai : le worker a disparu
+        db.session.execute(table.update().where(
+            expired, table.c.attempts >= table.c.max_attempts
+        ).values(status='failed', finished_at=now, locked_until=None,
+                 last_error='Délai de visibilité dépassé'))
+
+        query = db.select(table.c.id).where(ready)\
+            .order_by(table.c.available_at, table.c.id).limit(limit)
+        if db.session.connection().dialect.name == 'postgresql':
+            query = query.with_for_update(skip_locked=True)
+
+        claimed = []
+        for job_id in db.session.execute(query).scalars().all():
+            # La condition est vérifiée de nouveau : un autre worker a pu la réserver
+            result = db.session.execute(table.update().where(table.c.id == job_id, ready).values(
+                status='running',
+                attempts=table.c.attempts + 1,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=visibility_timeout),
+                started_at=now
+            ))
+            if result.rowcount:
+                claimed.append(job_id)
+
+        jobs = db.session.execute(
+            db.select(table.c.id, table.c.name, table.c.args, table.c.kwargs)
+            .where(table.c.id.in_(claimed))
+        ).all() if claimed else []
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [tuple(job) for job in jobs]
+
+
+def extend_leases(worker_id, job_ids, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """Prolonge la réservation des tâches en cours d'un worker."""
+    table = TaskJob.__table__
+    try:
+        db.session.execute(table.update().where(
+            table.c.id.in_(list(job_ids)), table.c.locked_by == worker_id,
+            table.c.status == 'running'
+        ).values(locked_until=datetime.utcnow() + timedelta(seconds=visibility_timeout)))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def complete_job(job_id, worker_id):
+    """Marque une tâche réservée par ce worker comme réussie."""
+    table = TaskJob.__table__
+    db.session.execute(table.update().where(
+        table.c.id == job_id, table.c.locked_by == worker_id, table.c.status == 'running'
+    ).values(status='succeeded', finished_at=datetime.utcnow(), locked_until=None, last_error=None))
+    db.session.commit()
+
+
+def fail_job(job_id, worker_id, error, backoff=DEFAULT_RETRY_BACKOFF,
+             backoff_max=DEFAULT_RETRY_BACKOFF_MAX):
+    """Replanifie une tâche en échec, ou la marque 'failed' après son dernier essai.
+
+    Returns:
+        bool: True si la tâche sera réessayée.
+    """
+    job = db.session.get(TaskJob, job_id)
+    if job is None or job.locked_by != worker_id or job.status != 'running':
+        # La réservation a expiré et la tâche a été reprise ailleurs
+        db.session.rollback()
+        return False
+
+    now = datetime.utcnow()
+    job.last_error = error
+    job.locked_until = None
+    retry = job.attempts < job.max_attempts
+    if retry:
+        job.status = 'queued'
+        job.available_at = now + timedelta(seconds=retry_delay(job.attempts, backoff, backoff_max))
+    else:
+        job.status = 'failed'
+        job.finished_at = now
+    db.session.commit()
+    return retry
+
+
+class Worker:
+    """Processus d'exécution des tâches de la file.
+
+    Args:
+        app: L'application Flask.
+        concurrency (int, optional): Nombre de tâches exécutées simultanément.
+        poll_interval (float, optional): Attente entre deux consultations de la file vide.
+        visibility_timeout (float, optional): Durée d'une réservation, en secondes.
+    """
+
+    def __init__(self, app, concurrency=None, poll_interval=None, visibility_timeout=None):
+        config = app.config
+        self.app = app
+        self.concurrency = concurrency or config.get('TASK_QUEUE_CONCURRENCY', 2)
+        self.poll_interval = poll_interval or config.get('TASK_QUEUE_POLL_INTERVAL', 2)
+        self.visibility_timeout = visibility_timeout or config.get(
+            'TASK_QUEUE_VISIBILITY_TIMEOUT', DEFAULT_VISIBILITY_TIMEOUT)
+        self.backoff = config.get('TASK_QUEUE_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF)
+        self.backoff_max = config.get('TASK_QUEUE_RETRY_BACKOFF_MAX', DEFAULT_RETRY_BACKOFF_MAX)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopped = threading.Event()
+
+    def stop(self):
+        """Demande l'arrêt du worker après les tâches en cours."""
+        self._stopped.set()
+
+    def run(self, burst=False):
+        """Exécute les tâches jusqu'à ``stop()``.
+
+        Args:
+            burst (bool, optional): S'arrêter dès que la file est vide.
+        """
+        logger.info(f"Worker {self.worker_id} démarré ({self.concurrency} tâches simultanées)")
+        running = {}
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix='task-worker') as executor:
+            while not self._stopped.is_set():
+                running = {future: job_id for future, job_id in running.items() if not future.done()}
+                try:
+                    with self.app.app_context():
+                        if running:
+                            extend_leases(self.worker_id, running.values(), self.visibility_timeout)
+                        free = self.concurrency - len(running)
+                        jobs = claim_jobs(self.worker_id, free, self.visibility_timeout) if free else []
+                except Exception as e:
+                    logger.error(f"Erreur lors de la consultation de la file: {e}")
+                    jobs = []
+
+                for job_id, name, args, kwargs in jobs:
+                    running[executor.submit(self._execute, job_id, name, args, kwargs)] = job_id
+
+                if running:
+                    # Attendre qu'une place se libère ; les réservations sont
+                    # prolongées au moins à chaque intervalle
+                    wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                elif burst:
+                    break
+                else:
+                    self._stopped.wait(self.poll_interval)
+        logger.info(f"Worker {self.worker_id} arrêté")
+
+    def _execute(self, job_id, name, args, kwargs):
+        """Exécute une tâche réservée et enregistre son résultat."""
+        with self.app.app_context():
+            func = TASKS.get(name)
+            try:
+                if func is None:
+                    raise LookupError(f"Tâche inconnue: {name}")
+                func(*(args or []), **(kwargs or {}))
+            except Exception as e:
+                db.session.rollback()
+                retry = fail_job(job_id, self.worker_id, f"{type(e).__name__}: {e}",
+                                 self.backoff, self.backoff_max)
+                logger.warning(f"Tâche {name} (ID: {job_id}) en échec"
+                               f"{', nouvel essai planifié' if retry else ''}: {e}")
+                return
+            complete_job(job_id, self.worker_id)
+            logger.info(f"Tâche {name} (ID: {job_id}) terminée")
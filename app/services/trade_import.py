@@ -0,0 +1,226 @@
+"""
+Import en masse de transactions (TradeData) depuis un flux CSV ou NDJSON.
+
+Le flux est lu par blocs avec pandas ; chaque bloc est validé de façon
+vectorisée (types, valeurs autorisées), ``total`` est recalculé côté
+serveur, puis les lignes valides sont chargées par ``COPY`` sous PostgreSQL
+(``executemany`` sous les autres dialectes). Chaque bloc est validé dans sa
+propre transaction avec la mise à jour de ses bougies OHLCV.
+
+``COPY`` ne passe pas par la session : les positions de portefeuille des
+couples (utilisateur, actif) importés sont recalculées à la fin de l'import.
+"""
+import csv
+import io
+import logging
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from ..extensions import db
+from ..models.trade import TradeData
+from .candles import compute_candles, merge_candles
+from .portfolio import refresh_positions
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_CHUNK_SIZE = 50000
+# Nombre maximal de rejets détaillés par bloc dans le rapport
+MAX_REJECTS_REPORTED = 100
+
+TRADE_SIDES = ('buy', 'sell')
+TRADE_STATUSES = ('pending', 'completed', 'failed')
+REQUIRED_COLUMNS = ('asset', 'side', 'amount', 'price')
+
+# Colonnes chargées, dans l'ordre du COPY
+_COLUMNS = ['timestamp', 'asset', 'side', 'amount', 'price', 'total', 'fee', 'status',
+            'exchange', 'notes', 'user_id', 'created_at', 'updated_at']
+
+
+def iter_chunks(stream, fmt='csv', chunk_size=IMPORT_CHUNK_SIZE):
+    """Lit un flux CSV ou NDJSON par blocs de lignes.
+
+    Args:
+        stream: Fichier ou flux (texte ou binaire).
+        fmt (str, optional): 'csv' ou 'ndjson'.
+        chunk_size (int, optional): Nombre de lignes par bloc.
+
+    Yields:
+        pandas.DataFrame: Blocs de lignes, toutes les valeurs lues comme texte.
+    """
+    if fmt == 'csv':
+        reader = pd.read_csv(stream, chunksize=chunk_size, dtype=str, skipinitialspace=True)
+    elif fmt == 'ndjson':
+        reader = pd.read_json(stream, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        raise ValueError(f"Format d'import non pris en charge: {fmt}")
+    with reader:
+        yield from reader
+
+
+def validate_chunk(frame, user_id=None, default_user_id=None):
+    """Valide et normalise un bloc de transactions.
+
+    Les lignes sans utilisateur (ni ``user_id`` imposé, ni colonne, ni
+    ``default_user_id``) sont rejetées : aucun portefeuille ne les verrait.
+
+    Args:
+        frame (pandas.DataFrame): Bloc lu par ``iter_chunks``.
+        user_id (int, optional): Si fourni, impose l'utilisateur de toutes les lignes.
+        default_user_id (int, optional): Utilisateur des lignes sans user_id.
+
+    Returns:
+        tuple: (DataFrame des lignes valides avec les colonnes de ``trade_data``,
+            liste des rejets ``{'row': numéro, 'reason': motif}``, les
+            enregistrements étant numérotés à partir de 1, en-tête exclu).
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Colonnes obligatoires manquantes: {', '.join(missing)}")
+
+    now = datetime.utcnow()
+    rows = pd.DataFrame(index=frame.index)
+    rows['asset'] = frame['asset'].astype('string').str.strip()
+    rows['side'] = frame['side'].astype('string').str.strip().str.lower()
+    rows['amount'] = pd.to_numeric(frame['amount'], errors='coerce')
+    rows['price'] = pd.to_numeric(frame['price'], errors='coerce')
+    rows['fee'] = pd.to_numeric(frame.get('fee', pd.Series(0.0, index=frame.index)),
+                                errors='coerce').fillna(0.0)
+    raw_timestamps = frame.get('timestamp', pd.Series(None, index=frame.index, dtype=object))
+    timestamps = pd.to_datetime(raw_timestamps, errors='coerce', utc=True, format='mixed')
+    rows['status'] = frame.get('status', pd.Series(None, index=frame.index, dtype=object))\
+        .astype('string').str.strip().str.lower().fillna('completed')
+    for column in ('exchange', 'notes'):
+        rows[column] = frame.get(column, pd.Series(None, index=frame.index, dtype=object))\
+            .astype('string')
+    if user_id is not None:
+        rows['user_id'] = pd.Series(user_id, index=frame.index, dtype='Int64')
+    else:
+        rows['user_id'] = pd.to_numeric(
+            frame.get('user_id', pd.Series(None, index=frame.index, dtype=object)), errors='coerce'
+        ).astype('Int64')
+        if default_user_id is not None:
+            rows['user_id'] = rows['user_id'].fillna(default_user_id)
+
+    # Une règle par motif de rejet ; seule la première règle violée est retenue
+    checks = [
+        (rows['user_id'].isna(), 'user_id manquant'),
+        (rows['asset'].isna() | (rows['asset'].str.len() == 0), 'asset manquant'),
+        (rows['asset'].str.len() > 50, 'asset trop long (50 caractères maximum)'),
+        (~rows['side'].isin(TRADE_SIDES), "side doit valoir 'buy' ou 'sell'"),
+        (rows['amount'].isna() | (rows['amount'] <= 0), 'amount doit être un nombre positif'),
+        (rows['price'].isna() | (rows['price'] < 0), 'price doit être un nombre positif ou nul'),
+        (rows['fee'] < 0, 'fee ne peut pas être négatif'),
+        (~rows['status'].isin(TRADE_STATUSES), 'status non reconnu'),
+        (raw_timestamps.notna() & timestamps.isna(), 'timestamp invalide'),
+    ]
+    reasons = pd.Series(None, index=frame.index, dtype=object)
+    for mask, reason in checks:
+        mask = mask.astype('boolean').fillna(True).astype(bool)
+        reasons = reasons.where(reasons.notna() | ~mask, reason)
+
+    rejected = reasons.notna()
+    rejects = [{'row': int(index) + 1, 'reason': reason} for index, reason in reasons[rejected].items()]
+
+    rows = rows[~rejected].copy()
+    rows['timestamp'] = timestamps[~rejected].dt.tz_convert(None).fillna(pd.Timestamp(now))
+    rows['total'] = (rows['amount'] * rows['price']).round(8)
+    rows['created_at'] = now
+    rows['updated_at'] = now
+    return rows[_COLUMNS], rejects
+
+
+def _copy_rows(rows):
+    """Charge des lignes validées par COPY (PostgreSQL) ou executemany."""
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        rows.to_csv(buffer, header=False, index=False, quoting=csv.QUOTE_MINIMAL,
+                    date_format='%Y-%m-%d %H:%M:%S.%f')
+        buffer.seek(0)
+        cursor = connection.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY trade_data ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+        return
+
+    records = rows.astype(object).where(rows.notna(), None).to_dict('records')
+    for record in records:
+        record['timestamp'] = record['timestamp'].to_pydatetime()
+        if record['user_id'] is not None:
+            record['user_id'] = int(record['user_id'])
+    db.session.execute(db.insert(TradeData.__table__), records)
+
+
+def import_trades(stream, fmt='csv', chunk_size=IMPORT_CHUNK_SIZE, user_id=None,
+                  default_user_id=None, progress=None):
+    """Importe des transactions depuis un flux CSV ou NDJSON.
+
+    Args:
+        stream: Fichier ou flux (texte ou binaire).
+        fmt (str, optional): 'csv' ou 'ndjson'.
+        chunk_size (int, optional): Nombre de lignes par bloc.
+        user_id (int, optional): Si fourni, impose l'utilisateur de toutes les lignes.
+        default_user_id (int, optional): Utilisateur des lignes sans user_id ;
+            sans lui, ces lignes sont rejetées.
+        progress (callable, optional): Appelée avec le rapport de chaque bloc.
+
+    Returns:
+        dict: Rapport d'import : 'inserted', 'rejected', 'seconds',
+            'rows_per_second' et le détail par bloc ('chunks').
+
+    Raises:
+        Exception: L'erreur d'un bloc, après la mise à jour des positions des
+            blocs déjà validés (chaque bloc est validé séparément).
+    """
+    started = time.monotonic()
+    report = {'inserted': 0, 'rejected': 0, 'chunks': []}
+    pairs = set()
+
+    try:
+        for number, frame in enumerate(iter_chunks(stream, fmt, chunk_size)):
+            chunk_started = time.monotonic()
+            rows, rejects = validate_chunk(frame, user_id, default_user_id)
+            try:
+                if not rows.empty:
+                    _copy_rows(rows)
+                    completed = rows[rows['status'] == 'completed']
+                    merge_candles(compute_candles(completed[['asset', 'timestamp', 'price', 'amount']]))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            owned = rows[rows['status'] == 'completed']
+            pairs.update(zip(owned['user_id'].astype(int), owned['asset']))
+
+            chunk = {
+                'chunk': number,
+                'rows': len(frame),
+                'inserted': len(rows),
+                'rejected': len(rejects),
+                'rejects': rejects[:MAX_REJECTS_REPORTED],
+                'seconds': round(time.monotonic() - chunk_started, 3),
+            }
+            report['chunks'].append(chunk)
+            report['inserted'] += chunk['inserted']
+            report['rejected'] += chunk['rejected']
+            logger.info(f"Import de transactions, bloc {number}: {chunk['inserted']} insérées, "
+                        f"{chunk['rejected']} rejetées en {chunk['seconds']}s")
+            if progress:
+                progress(chunk)
+    finally:
+        # Les blocs déjà validés restent en base même si un bloc suivant
+        # échoue : leurs positions sont recalculées dans tous les cas
+        if pairs:
+            refresh_positions(pairs)
+
+    report['seconds'] = round(time.monotonic() - started, 3)
+    report['rows_per_second'] = round(report['inserted'] / report['seconds'], 1) \
+        if report['seconds'] else None
+    return report
@@ -0,0 +1,50 @@
+/*
+ * Tableau de bord de l'économie marocaine : suivi de la version des données.
+ *
+ * La version courante est attendue sur /ma-economy/version (long-poll). La
+ * requête porte l'ETag de la dernière version reçue : le serveur la tient en
+ * attente et répond dès que les données changent, ou par un 304 sans corps
+ * à l'expiration du délai ; la requête suivante part aussitôt. La version est
+ * exposée dans window.maEconomyVersion, lue par un callback côté client qui
+ * ne déclenche les callbacks serveur qu'en cas de changement.
+ *
+ * Si le serveur n'attend pas (wait à 0) ou en cas d'erreur, la requête
+ * suivante part après retry_interval secondes.
+ *
+ * XMLHttpRequest est disponible dans tous les navigateurs, y compris ceux
+ * sans EventSource ni fetch.
+ */
+(function () {
+    var etag = null;
+    var wait = 0;  // remplacés par les valeurs renvoyées par le serveur
+    var retryInterval = 30000;
+
+    function poll() {
+        var request = new XMLHttpRequest();
+        request.open('GET', '/ma-economy/version');
+        if (etag) {
+            request.setRequestHeader('If-None-Match', etag);
+        }
+        request.onload = function () {
+            if (request.status === 200) {
+                var data = JSON.parse(request.responseText);
+                etag = request.getResponseHeader('ETag');
+                window.maEconomyVersion = data.version;
+                wait = data.wait || 0;
+                if (data.retry_interval) {
+                    retryInterval = data.retry_interval * 1000;
+                }
+            } else if (request.status !== 304) {
+                setTimeout(poll, retryInterval);
+                return;
+            }
+            setTimeout(poll, wait ? 0 : retryInterval);
+        };
+        request.onerror = function () {
+            setTimeout(poll, retryInterval);
+        };
+        request.send();
+    }
+
+    poll();
+})();
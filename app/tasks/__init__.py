@@ -1,12 +1,23 @@
 """
 Initialisation des tâches planifiées.
+
+Chaque processus démarre le planificateur en pause ; seul le processus élu
+(voir ``leader``) le reprend et met les tâches en file (voir
+``services.task_queue``), où ``flask worker`` les exécute. Avec
+``SCHEDULER_MODE = 'standalone'``, les processus web ne démarrent pas de
+planificateur : les tâches sont mises en file par ``flask run-scheduler``.
 """
+from functools import wraps
+import logging
+import signal
+import threading
+
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-import logging
 from ..extensions import db
+from ..services.task_queue import enqueue
 from . import data_collection_tasks
-from .ma_economic_tasks import init_scheduler as init_ma_economic_scheduler
+from .leader import DEFAULT_RETRY_INTERVAL, LeaderElector, create_lock
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
@@ -14,23 +25,45 @@ logger = logging.getLogger(__name__)
 # Créer le planificateur
 scheduler = BackgroundScheduler()
 
+# Élection du processus qui exécute les tâches (une par processus)
+_elector = None
+
+def _enqueue_task(app, func):
+    """Met une tâche en file au lieu de l'exécuter dans le thread du planificateur."""
+    @wraps(func)
+    def wrapper():
+        with app.app_context():
+            enqueue(func.__name__)
+    return wrapper
+
 def init_scheduler(app):
-    """Initialise le planificateur de tâches."""
+    """Initialise le planificateur de tâches et l'élection de son leader.
+    
+    L'appel est idempotent : un processus n'a qu'un planificateur.
+    
+    Returns:
+        BackgroundScheduler: Le planificateur (en pause tant que ce processus n'est pas élu).
+    """
+    global _elector
+    if _elector is not None:
+        return scheduler
+    
     with app.app_context():
         try:
             # Planifier la collecte des données énergétiques toutes les heures
             scheduler.add_job(
                 id='collect_energy_data',
-                func=data_collection_tasks.collect_energy_data,
+                func=_enqueue_task(app, data_collection_tasks.collect_energy_data),
                 trigger=IntervalTrigger(hours=1),
                 max_instances=1,
                 replace_existing=True
             )
             
-            # Planifier la collecte des indicateurs économiques tous les jours à minuit
+            # Planifier la collecte de toutes les sources (indicateurs marocains
+            # HCP/BAM, inflation, chômage, énergie) en parallèle tous les jours à minuit
             scheduler.add_job(
-                id='collect_economic_indicators',
-                func=data_collection_tasks.collect_economic_indicators,
+                id='collect_all_sources',
+                func=_enqueue_task(app, data_collection_tasks.collect_all_sources),
                 trigger='cron',
                 hour=0,
                 minute=0,
@@ -41,29 +74,65 @@ def init_scheduler(app):
             # Planifier le nettoyage des anciennes données tous les dimanches à 1h du matin
             scheduler.add_job(
                 id='cleanup_old_data',
-                func=data_collection_tasks.cleanup_old_data,
+                func=_enqueue_task(app, data_collection_tasks.cleanup_old_data),
                 trigger='cron',
                 day_of_week='sun',
                 hour=1,
                 minute=0,
                 max_instances=1,
-                replace_existing=True,
-                kwargs={'days_to_keep': 30}
+                replace_existing=True
             )
             
-            # Initialiser les tâches économiques marocaines
-            init_ma_economic_scheduler(app)
+            # Planifier la création des partitions mensuelles à venir le 1er de chaque mois
+            scheduler.add_job(
+                id='maintain_partitions',
+                func=_enqueue_task(app, data_collection_tasks.maintain_partitions),
+                trigger='cron',
+                day=1,
+                hour=2,
+                minute=0,
+                max_instances=1,
+                replace_existing=True
+            )
             
-            # Démarrer le planificateur
+            # Démarrer le planificateur en pause : il n'est repris que par le leader
             if not scheduler.running:
-                scheduler.start()
-                logger.info("Planificateur de tâches démarré")
+                scheduler.start(paused=True)
+            
+            _elector = LeaderElector(
+                create_lock(app, db.engine),
+                on_elected=scheduler.resume,
+                on_demoted=scheduler.pause,
+                interval=app.config.get('SCHEDULER_LOCK_RETRY', DEFAULT_RETRY_INTERVAL)
+            )
+            _elector.start()
+            logger.info("Planificateur de tâches démarré, en attente de l'élection")
                 
         except Exception as e:
             logger.error(f"Erreur lors de l'initialisation du planificateur: {e}")
+    
+    return scheduler
+
+def run_scheduler(app):
+    """Exécute le planificateur au premier plan jusqu'à SIGINT ou SIGTERM.
+    
+    Utilisé par ``flask run-scheduler`` : plusieurs instances peuvent tourner,
+    une seule exécute les tâches et les autres prennent le relais si elle s'arrête.
+    """
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stopped.set())
+    
+    init_scheduler(app)
+    stopped.wait()
+    shutdown_scheduler()
 
 def shutdown_scheduler():
-    """Arrête le planificateur de tâches."""
+    """Arrête le planificateur de tâches et libère le verrou d'élection."""
+    global _elector
+    if _elector is not None:
+        _elector.stop()
+        _elector = None
     if scheduler.running:
         scheduler.shutdown()
         logger.info("Planificateur de tâches arrêté")
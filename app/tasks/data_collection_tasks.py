@@ -1,17 +1,26 @@
 """
 Tâches planifiées pour la collecte automatique de données.
+
+Les tâches sont enregistrées dans la file (``services.task_queue``) : le
+planificateur les met en file et ``flask worker`` les exécute. Elles lèvent
+leurs exceptions après les avoir journalisées, pour être réessayées.
 """
 import logging
-from datetime import datetime, timedelta
 from flask import current_app
 from ..extensions import db
-from ..models.data_collection import DataCollectionRun, CollectedData
-from ..services.data_collector import DataCollector
+from ..models.data_collection import DataCollectionRun, CollectedData, HttpValidator, SourceCursor
+from ..services.data_collector import DataCollector, NOT_MODIFIED
+from ..services.collection_orchestrator import default_sources, run_collection
+from ..services.retention import apply_retention
+from ..services.partitioning import ensure_partitions
+from ..services.source_registry import get_source
+from ..services.task_queue import task
 from ..config.settings import Config
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
 
+@task
 def collect_energy_data():
     """Tâche pour collecter les données énergétiques."""
     try:
@@ -29,26 +38,25 @@ def collect_energy_data():
         db.session.commit()
         
         # Initialiser le collecteur de données en mode simulation
+        known_validators = HttpValidator.load()
         collector = DataCollector(
             config={
                 'ELECTRICITY_MAP_API_KEY': current_app.config.get('ELECTRICITY_MAP_API_KEY', '')
             },
-            simulation_mode=True
+            simulation_mode=True,
+            validators=dict(known_validators)
         )
         
         # Collecter les données
         energy_data = collector.collect_energy_data('electricity_map', zone='FR')
+        HttpValidator.store(HttpValidator.changed(known_validators, collector.validators))
         
-        if energy_data:
-            # Enregistrer les données collectées
-            collected_data = CollectedData(
-                run_id=run.id,
-                data_type='energy_production',
-                source_id='electricity_map_FR',
-                data_date=datetime.utcnow(),
-                raw_data=energy_data
-            )
-            db.session.add(collected_data)
+        if energy_data is NOT_MODIFIED:
+            run.mark_unchanged()
+            logger.info(f"Données énergétiques inchangées depuis la dernière collecte. Run ID: {run.id}")
+        elif energy_data:
+            # Enregistrer les données collectées (une seule fois si inchangées)
+            CollectedData.store(run, 'energy_production', 'electricity_map_FR', energy_data)
             run.mark_completed(count=1)
             logger.info(f"Données énergétiques collectées avec succès. Run ID: {run.id}")
         else:
@@ -60,15 +68,25 @@ def collect_energy_data():
         if 'run' in locals():
             run.mark_failed(str(e))
         logger.error(f"Erreur lors de la collecte des données énergétiques: {e}", exc_info=True)
+        raise
     finally:
         db.session.commit()
 
+@task
 def collect_economic_indicators():
-    """Tâche pour collecter les indicateurs économiques."""
+    """Tâche pour collecter les indicateurs économiques.
+    
+    Chaque indicateur est collecté même si un autre échoue ; la tâche lève
+    ensuite une erreur pour être réessayée.
+    """
     indicators = [
         ('inflation', 'france'),
         ('unemployment', 'france')
     ]
+    # Sources incrémentales : curseur avancé avec les données enregistrées
+    incremental = {'unemployment': get_source('unemployment_france')}
+    cursors = SourceCursor.load()
+    failures = []
     
     for indicator_id, country in indicators:
         run = None
@@ -89,25 +107,28 @@ def collect_economic_indicators():
             # Initialiser le collecteur de données en mode simulation
             collector = DataCollector(
                 config={
-                    'EMPLOI_STORE_TOKEN': current_app.config.get('EMPLOI_STORE_TOKEN', '')
+                    'EMPLOI_STORE_TOKEN': current_app.config.get('EMPLOI_STORE_TOKEN', ''),
+                    'HTML_PARSER_BACKEND': current_app.config.get('HTML_PARSER_BACKEND')
                 },
-                simulation_mode=True
+                simulation_mode=True,
+                cursors=cursors
             )
             
             # Collecter les données
             data = collector.collect_economic_data(indicator_id, country=country)
             
-            if data:
-                # Enregistrer les données collectées
-                collected_data = CollectedData(
-                    run_id=run.id,
-                    data_type=f'economic_{indicator_id}',
-                    source_id=f'{indicator_id}_{country}',
-                    data_date=datetime.utcnow(),
-                    raw_data=data
-                )
-                db.session.add(collected_data)
+            if data is NOT_MODIFIED:
+                run.mark_unchanged()
+                logger.info(f"Aucune nouvelle donnée économique pour {indicator_id}. Run ID: {run.id}")
+            elif data:
+                # Enregistrer les données collectées (une seule fois si inchangées)
+                CollectedData.store(run, f'economic_{indicator_id}', f'{indicator_id}_{country}', data)
                 run.mark_completed(count=1)
+                definition = incremental.get(indicator_id)
+                if definition:
+                    key = definition.key()
+                    cursors[key] = definition.high_water_mark(data, cursors.get(key))
+                    SourceCursor.store({key: cursors[key]})
                 logger.info(f"Données économiques collectées pour {indicator_id}. Run ID: {run.id}")
             else:
                 run.mark_failed("Aucune donnée retournée")
@@ -117,28 +138,74 @@ def collect_economic_indicators():
             db.session.rollback()
             if run:
                 run.mark_failed(str(e))
+            failures.append(f"{indicator_id}: {e}")
             logger.error(f"Erreur lors de la collecte des indicateurs économiques: {e}", exc_info=True)
         finally:
             db.session.commit()
+    
+    if failures:
+        raise RuntimeError(f"Échec de la collecte des indicateurs économiques: {'; '.join(failures)}")
 
-def cleanup_old_data(days_to_keep=30):
-    """Nettoie les anciennes données de collecte."""
+@task
+def collect_all_sources():
+    """Tâche pour collecter toutes les sources en parallèle.
+    
+    Interroge les collecteurs marocains et les sources du DataCollector
+    simultanément, puis enregistre l'ensemble en une seule transaction.
+    """
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
-        
-        # Supprimer d'abord les données collectées
-        deleted_data = CollectedData.query.filter(
-            CollectedData.collected_at < cutoff_date
-        ).delete(synchronize_session=False)
-        
-        # Puis les exécutions sans données
-        deleted_runs = DataCollectionRun.query.filter(
-            DataCollectionRun.completed_at < cutoff_date
-        ).delete(synchronize_session=False)
-        
-        db.session.commit()
-        logger.info(f"Nettoyage des données: {deleted_data} données et {deleted_runs} exécutions supprimées")
+        validators = HttpValidator.load()
+        cursors = SourceCursor.load()
+        result = run_collection(
+            default_sources(current_app.config, simulation_mode=True, validators=validators,
+                            cursors=cursors),
+            max_workers=current_app.config.get('COLLECTION_MAX_WORKERS', 8),
+            default_timeout=current_app.config.get('COLLECTION_SOURCE_TIMEOUT', 60),
+            validators=validators,
+            cursors=cursors
+        )
+        logger.info(f"Collecte de toutes les sources terminée: {result['indicators']}")
+        return result
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erreur lors de la collecte de toutes les sources: {e}", exc_info=True)
+        raise
+
+@task
+def cleanup_old_data(days_to_keep=None):
+    """Nettoie les anciennes données de collecte, par lots.
+    
+    Args:
+        days_to_keep: Conservation par défaut en jours (par défaut
+            COLLECTION_RETENTION_DAYS) ; les types listés dans
+            COLLECTION_RETENTION_POLICIES ont leur propre durée.
+    """
+    config = current_app.config
+    try:
+        stats = apply_retention(
+            default_days=days_to_keep or config.get('COLLECTION_RETENTION_DAYS', 30),
+            policies=config.get('COLLECTION_RETENTION_POLICIES'),
+            batch_size=config.get('COLLECTION_RETENTION_BATCH_SIZE', 1000),
+            pause=config.get('COLLECTION_RETENTION_BATCH_PAUSE', 0.1),
+            archive_dir=config.get('COLLECTION_RETENTION_ARCHIVE_DIR')
+        )
+        logger.info(
+            f"Nettoyage des données: {sum(stats['collected_data'].values())} données "
+            f"et {stats['runs']} exécutions supprimées"
+        )
+        return stats
         
     except Exception as e:
         db.session.rollback()
         logger.error(f"Erreur lors du nettoyage des anciennes données: {e}", exc_info=True)
+        raise
+
+@task
+def maintain_partitions():
+    """Crée à l'avance les partitions mensuelles des tables partitionnées."""
+    try:
+        ensure_partitions(current_app.config.get('PARTITION_MONTHS_AHEAD', 3))
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erreur lors de la création des partitions: {e}", exc_info=True)
+        raise
@@ -0,0 +1,205 @@
+"""
+Élection d'un processus unique pour l'exécution des tâches planifiées.
+
+Chaque processus (worker gunicorn ou ``flask run-scheduler``) démarre son
+planificateur en pause et tente périodiquement d'obtenir un verrou partagé.
+Seul le détenteur du verrou exécute les tâches ; s'il s'arrête ou perd sa
+connexion, le verrou est libéré et un autre processus prend le relais à la
+tentative suivante.
+
+Deux verrous sont disponibles :
+
+- ``AdvisoryLock`` : verrou consultatif de session PostgreSQL, tenu par une
+  connexion dédiée (libéré par le serveur à la fin de la connexion) ;
+- ``FileLock`` : verrou ``flock`` sur un fichier local, pour SQLite, les
+  tests ou les déploiements sur une seule machine (libéré par le noyau à la
+  fin du processus).
+"""
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_KEY = 7482301  # identifiant du verrou consultatif PostgreSQL
+DEFAULT_RETRY_INTERVAL = 15  # secondes entre deux tentatives d'élection
+
+
+class FileLock:
+    """Verrou exclusif sur un fichier local (``flock``)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """Tente d'obtenir le verrou sans attendre.
+
+        Returns:
+            bool: True si le verrou est obtenu.
+        """
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def is_held(self):
+        """Indique si ce processus détient toujours le verrou."""
+        return self._file is not None
+
+    def release(self):
+        """Libère le verrou s'il est détenu."""
+        if self._file is None:
+            return
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class AdvisoryLock:
+    """Verrou consultatif de session PostgreSQL tenu par une connexion dédiée."""
+
+    def __init__(self, engine, key=DEFAULT_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self._connection = None
+
+    def acquire(self):
+        """Tente d'obtenir le verrou sans attendre.
+
+        Returns:
+            bool: True si le verrou est obtenu.
+        """
+        if self._connection is not None:
+            return True
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(
+                text('SELECT pg_try_advisory_lock(:key)'), {'key': self.key}
+            ).scalar()
+            # La connexion ne doit pas rester « idle in transaction »
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def is_held(self):
+        """Vérifie que la connexion qui tient le verrou est toujours ouverte."""
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute(text('SELECT 1'))
+            self._connection.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"Connexion du verrou de planification perdue: {e}")
+            self._discard()
+            return False
+
+    def release(self):
+        """Libère le verrou s'il est détenu."""
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': self.key})
+            self._connection.commit()
+        except Exception as e:
+            logger.warning(f"Libération du verrou de planification impossible: {e}")
+        finally:
+            self._discard()
+
+    def _discard(self):
+        try:
+            self._connection.invalidate()
+        except Exception:
+            pass
+        self._connection = None
+
+
+def create_lock(app, engine):
+    """Crée le verrou d'élection selon la configuration.
+
+    ``SCHEDULER_LOCK`` vaut 'advisory', 'file' ou 'auto' (verrou consultatif
+    sous PostgreSQL, fichier sinon).
+
+    Args:
+        app: L'application Flask.
+        engine: Moteur SQLAlchemy de l'application.
+
+    Returns:
+        FileLock | AdvisoryLock: Verrou non encore obtenu.
+    """
+    kind = app.config.get('SCHEDULER_LOCK', 'auto')
+    if kind == 'auto':
+        kind = 'advisory' if engine.dialect.name == 'postgresql' else 'file'
+    if kind == 'advisory':
+        return AdvisoryLock(engine, app.config.get('SCHEDULER_LOCK_KEY', DEFAULT_LOCK_KEY))
+    if kind == 'file':
+        return FileLock(app.config.get('SCHEDULER_LOCK_FILE')
+                        or os.path.join(tempfile.gettempdir(), 'punk-eco-scheduler.lock'))
+    raise ValueError(f"Verrou de planification non pris en charge: {kind}")
+
+
+class LeaderElector(threading.Thread):
+    """Thread qui obtient et surveille le verrou, et signale les changements de rôle.
+
+    Args:
+        lock: Verrou (``FileLock`` ou ``AdvisoryLock``).
+        on_elected (callable): Appelée quand ce processus devient le leader.
+        on_demoted (callable): Appelée quand ce processus perd le verrou.
+        interval (float, optional): Secondes entre deux tentatives ou vérifications.
+    """
+
+    def __init__(self, lock, on_elected, on_demoted, interval=DEFAULT_RETRY_INTERVAL):
+        super().__init__(name='scheduler-leader', daemon=True)
+        self.lock = lock
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self.is_leader = False
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                if not self.is_leader:
+                    if self.lock.acquire():
+                        self.is_leader = True
+                        logger.info(f"Processus {os.getpid()} élu pour exécuter les tâches planifiées")
+                        self.on_elected()
+                elif not self.lock.is_held():
+                    self.is_leader = False
+                    logger.warning(f"Processus {os.getpid()} n'exécute plus les tâches planifiées")
+                    self.on_demoted()
+            except Exception as e:
+                logger.error(f"Erreur lors de l'élection du planificateur: {e}")
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        """Arrête l'élection et libère le verrou."""
+        self._stopped.set()
+        if self.is_leader:
+            self.is_leader = False
+            self.on_demoted()
+        self.lock.release()
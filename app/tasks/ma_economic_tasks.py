@@ -1,39 +1,11 @@
-from datetime import datetime, timedelta
 import logging
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
 from app import db
 from app.models.ma_economy import EconomicIndicator
 from app.services.ma_data_collectors.hcp_collector import HCPCollector
 from app.services.ma_data_collectors.bam_collector import BAMCollector
+from app.services.task_queue import task
 
-def init_scheduler(app):
-    """Initialise le planificateur de tâches."""
-    scheduler = BackgroundScheduler(daemon=True)
-    
-    with app.app_context():
-        # Planifier la collecte des données HCP (tous les jours à minuit)
-        scheduler.add_job(
-            collect_hcp_data,
-            trigger=IntervalTrigger(days=1, start_date=datetime.now() + timedelta(seconds=10)),
-            id='collect_hcp_data',
-            name='Collecte des données HCP (PIB, inflation, chômage)',
-            replace_existing=True
-        )
-        
-        # Planifier la collecte des données BAM (tous les jours à 1h du matin)
-        scheduler.add_job(
-            collect_bam_data,
-            trigger=IntervalTrigger(days=1, start_date=datetime.now() + timedelta(hours=1, seconds=10)),
-            id='collect_bam_data',
-            name='Collecte des données BAM (TMM)',
-            replace_existing=True
-        )
-        
-        # Démarrer le planificateur
-        scheduler.start()
-        logging.info("Planificateur de tâches démarré")
-
+@task
 def collect_hcp_data():
     """Collecte les données du HCP (PIB, inflation, chômage)."""
     try:
@@ -41,15 +13,17 @@ def collect_hcp_data():
         data = collector.collect()
         
         if data:
-            EconomicIndicator.save_from_dict(data)
-            logging.info("Données HCP collectées avec succès")
+            stats = EconomicIndicator.save_from_dict(data)
+            logging.info(f"Données HCP collectées avec succès: {stats}")
         else:
             logging.warning("Aucune donnée HCP n'a été collectée")
             
     except Exception as e:
         logging.error(f"Erreur lors de la collecte des données HCP: {str(e)}")
         db.session.rollback()
+        raise
 
+@task
 def collect_bam_data():
     """Collecte les données de la BAM (TMM)."""
     try:
@@ -57,14 +31,15 @@ def collect_bam_data():
         data = collector.collect()
         
         if data:
-            EconomicIndicator.save_from_dict(data)
-            logging.info("Données BAM collectées avec succès")
+            stats = EconomicIndicator.save_from_dict(data)
+            logging.info(f"Données BAM collectées avec succès: {stats}")
         else:
             logging.warning("Aucune donnée BAM n'a été collectée")
             
     except Exception as e:
         logging.error(f"Erreur lors de la collecte des données BAM: {str(e)}")
         db.session.rollback()
+        raise
 
 # Pour exécution manuelle si nécessaire
 if __name__ == "__main__":
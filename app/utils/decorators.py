@@ -1,7 +1,9 @@
 """Décorateurs utilitaires pour l'application."""
 
+import hashlib
+from datetime import timezone
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, make_response, request
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
 from app.models.user import User
@@ -41,3 +43,43 @@ def role_required(roles):
             return fn(*args, **kwargs)
         return wrapper
     return decorator
+
+def conditional_response(scope, key_arg=None):
+    """Gère les requêtes conditionnelles (ETag / Last-Modified) d'une route.
+    
+    L'ETag est dérivé de la version de données de la portée et de l'URL
+    demandée. Si le client possède déjà cette version, la route n'est pas
+    exécutée et une réponse 304 est retournée sans accès à la base.
+    
+    Args:
+        scope: Portée de la version (voir ``app.services.data_versions``)
+        key_arg: Nom de l'argument de la route identifiant l'indicateur ou la catégorie
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            from app.services.data_versions import get_version
+            
+            version = get_version(scope, kwargs.get(key_arg) if key_arg else None)
+            etag = hashlib.sha1(f"{version['token']}:{request.full_path}".encode()).hexdigest()
+            last_modified = version['last_modified']
+            if last_modified is not None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = bool(last_modified and request.if_modified_since
+                                    and last_modified <= request.if_modified_since)
+            
+            response = make_response('', 304) if not_modified \
+                else make_response(fn(*args, **kwargs))
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                if last_modified is not None:
+                    response.last_modified = last_modified
+                response.headers['Cache-Control'] = 'private, no-cache'
+                response.vary.add('Authorization')
+            return response
+        return wrapper
+    return decorator
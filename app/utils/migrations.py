@@ -0,0 +1,25 @@
+"""
+Utilitaires des migrations Alembic.
+
+``create_app`` appelle ``db.create_all()`` : sur une base neuve, les tables,
+index et colonnes déclarés par les modèles existent donc déjà lorsque
+``flask db upgrade`` applique les migrations qui les créent. Ces migrations
+vérifient leur présence avant de les créer.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+def has_table(table):
+    """Indique si la table existe déjà."""
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def has_index(table, name):
+    """Indique si l'index existe déjà sur la table."""
+    return sa.inspect(op.get_bind()).has_index(table, name)
+
+
+def has_column(table, name):
+    """Indique si la colonne existe déjà dans la table."""
+    return name in {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
@@ -16,9 +16,67 @@ class Config:
     
     # Configuration des tâches planifiées
     SCHEDULER_API_ENABLED = True
+    # 'web' : planificateur dans chaque processus web ; 'standalone' : uniquement flask run-scheduler
+    SCHEDULER_MODE = os.environ.get('SCHEDULER_MODE', 'web')
+    # Verrou garantissant qu'un seul processus exécute les tâches : 'auto', 'advisory' ou 'file'
+    SCHEDULER_LOCK = os.environ.get('SCHEDULER_LOCK', 'auto')
+    SCHEDULER_LOCK_KEY = 7482301  # clé du verrou consultatif PostgreSQL
+    SCHEDULER_LOCK_FILE = os.environ.get('SCHEDULER_LOCK_FILE')  # par défaut dans le répertoire temporaire
+    SCHEDULER_LOCK_RETRY = 15  # secondes entre deux tentatives d'élection
+    
+    # File de tâches : 'database' (table task_jobs, exécutée par flask worker) ou 'local' (thread du processus)
+    TASK_QUEUE_BACKEND = os.environ.get('TASK_QUEUE_BACKEND', 'local')
+    TASK_QUEUE_CONCURRENCY = int(os.environ.get('TASK_QUEUE_CONCURRENCY', 2))  # tâches simultanées par worker
+    TASK_QUEUE_POLL_INTERVAL = 2  # consultation de la file vide (secondes)
+    TASK_QUEUE_VISIBILITY_TIMEOUT = 300  # réservation d'une tâche, prolongée pendant son exécution (secondes)
+    TASK_QUEUE_MAX_ATTEMPTS = 3
+    TASK_QUEUE_RETRY_BACKOFF = 30  # délai avant le premier nouvel essai, doublé ensuite (secondes)
+    TASK_QUEUE_RETRY_BACKOFF_MAX = 3600
+    
+    # Configuration de la collecte parallèle des sources
+    COLLECTION_MAX_WORKERS = 8
+    COLLECTION_SOURCE_TIMEOUT = 60  # délai maximal par source (secondes)
+    # Résilience des appels HTTP des collecteurs (par hôte)
+    COLLECTOR_RETRY_ATTEMPTS = 3
+    COLLECTOR_RETRY_BACKOFF = 0.5  # délai maximal avant le 2e essai, doublé ensuite (secondes)
+    COLLECTOR_RETRY_BACKOFF_MAX = 8
+    COLLECTOR_RATE_LIMIT = 5.0  # requêtes par seconde et par hôte
+    COLLECTOR_RATE_LIMITS = {}  # limites spécifiques, ex. {'www.hcp.ma': 1.0}
+    COLLECTOR_MAX_CONCURRENT_PER_HOST = 6  # au-delà, les appels échouent immédiatement
+    COLLECTOR_CIRCUIT_FAILURES = 5  # échecs consécutifs qui ouvrent le disjoncteur
+    COLLECTOR_CIRCUIT_RECOVERY = 60  # ouverture avant un appel d'essai (secondes)
+    HTML_PARSER_BACKEND = os.environ.get('HTML_PARSER_BACKEND', 'lxml')  # 'lxml' ou 'bs4' (pur Python)
+    # Compression de CollectedData.raw_data : None (JSON), 'zlib' ou 'zstd'
+    COLLECTED_DATA_COMPRESSION = os.environ.get('COLLECTED_DATA_COMPRESSION') or None
+    
+    # Rétention de l'historique de collecte
+    COLLECTION_RETENTION_DAYS = 30  # conservation par défaut (jours)
+    COLLECTION_RETENTION_POLICIES = {}  # conservation par type de données, ex. {'energy_production': 90}
+    COLLECTION_RETENTION_BATCH_SIZE = 1000  # lignes supprimées par transaction
+    COLLECTION_RETENTION_BATCH_PAUSE = 0.1  # pause entre deux lots (secondes)
+    COLLECTION_RETENTION_ARCHIVE_DIR = os.environ.get('COLLECTION_RETENTION_ARCHIVE_DIR')  # archives .jsonl.gz
+    
+    # Partitionnement mensuel de collected_data et energy_data (PostgreSQL uniquement)
+    TIME_PARTITIONING = os.environ.get('TIME_PARTITIONING', 'false').lower() == 'true'
+    PARTITION_MONTHS_AHEAD = 3  # partitions futures créées à l'avance
+    ENERGY_DATA_RETENTION_DAYS = None  # conservation de energy_data (None : illimitée)
+    
+    # Import en masse des transactions (lignes validées et chargées par bloc)
+    TRADE_IMPORT_CHUNK_SIZE = int(os.environ.get('TRADE_IMPORT_CHUNK_SIZE', 50000))
+    
+    # Versions des données pour les requêtes conditionnelles (ETag), dérivées
+    # de la base et conservées en cache pendant ce délai (0 : aucun cache)
+    DATA_VERSION_CACHE_TIMEOUT = 5  # secondes
     
     # Configuration du dashboard
     DASHBOARD_REFRESH_INTERVAL = 3600  # secondes
+    DASHBOARD_CACHE_TIMEOUT = 24 * 3600  # durée de vie de l'instantané partagé (secondes)
+    # Attente bornée (long-poll) du changement de version par les navigateurs :
+    # chaque navigateur connecté occupe un thread de worker pendant l'attente
+    # (0 : réponse immédiate, le navigateur relance après RETRY_INTERVAL)
+    DASHBOARD_VERSION_WAIT = 25  # secondes
+    DASHBOARD_VERSION_CHECK_INTERVAL = 1  # vérification de la version pendant l'attente (secondes)
+    DASHBOARD_VERSION_RETRY_INTERVAL = 30  # délai avant nouvelle requête si WAIT vaut 0 ou après une erreur (secondes)
 
 
 class DevelopmentConfig(Config):
@@ -0,0 +1,57 @@
+"""economic_indicators composite indexes
+
+Ajoute l'index unique (indicator_id, date) et l'index couvrant
+(category, date DESC) sur economic_indicators.
+
+Revision ID: 3f9a1c2b7d10
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_index
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Supprimer les doublons existants avant de poser la contrainte d'unicité
+    op.execute(
+        "DELETE FROM economic_indicators WHERE id NOT IN ("
+        "SELECT MAX(id) FROM economic_indicators GROUP BY indicator_id, date)"
+    )
+
+    op.drop_index('ix_economic_indicators_indicator_id', table_name='economic_indicators',
+                  if_exists=True)
+    op.drop_index('ix_economic_indicators_category', table_name='economic_indicators',
+                  if_exists=True)
+    if not has_index('economic_indicators', 'uq_economic_indicators_indicator_date'):
+        op.create_index(
+            'uq_economic_indicators_indicator_date',
+            'economic_indicators',
+            ['indicator_id', 'date'],
+            unique=True
+        )
+    if not has_index('economic_indicators', 'ix_economic_indicators_category_date'):
+        op.create_index(
+            'ix_economic_indicators_category_date',
+            'economic_indicators',
+            ['category', sa.text('date DESC')],
+            postgresql_include=['indicator_id', 'value']
+        )
+
+
+def downgrade():
+    op.drop_index('ix_economic_indicators_category_date', table_name='economic_indicators')
+    op.drop_index('uq_economic_indicators_indicator_date', table_name='economic_indicators')
+    op.create_index('ix_economic_indicators_category', 'economic_indicators', ['category'],
+                    unique=False)
+    op.create_index('ix_economic_indicators_indicator_id', 'economic_indicators',
+                    ['indicator_id'], unique=False)
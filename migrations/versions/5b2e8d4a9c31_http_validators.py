@@ -0,0 +1,39 @@
+"""http_validators
+
+Ajoute la table des validateurs HTTP (ETag / Last-Modified) utilisés pour
+les collectes conditionnelles.
+
+Revision ID: 5b2e8d4a9c31
+Revises: 3f9a1c2b7d10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e8d4a9c31'
+down_revision = '3f9a1c2b7d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('http_validators'):
+        op.create_table(
+            'http_validators',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('url', sa.String(length=2048), nullable=False),
+            sa.Column('etag', sa.String(length=255), nullable=True),
+            sa.Column('last_modified', sa.String(length=64), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('url')
+        )
+
+
+def downgrade():
+    op.drop_table('http_validators')
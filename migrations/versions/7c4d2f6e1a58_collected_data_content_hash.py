@@ -0,0 +1,86 @@
+"""collected_data content hash
+
+Ajoute l'empreinte du contenu et la date de dernière collecte à
+collected_data, ainsi que la référence des exécutions vers des données
+identiques déjà enregistrées.
+
+Revision ID: 7c4d2f6e1a58
+Revises: 5b2e8d4a9c31
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_column, has_index
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4d2f6e1a58'
+down_revision = '5b2e8d4a9c31'
+branch_labels = None
+depends_on = None
+
+
+def _hash_payload(raw_data):
+    # Même sérialisation canonique que CollectedData.hash_payload
+    canonical = json.dumps(raw_data, sort_keys=True, separators=(',', ':'),
+                           ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def upgrade():
+    if not has_column('collected_data', 'content_hash'):
+        op.add_column('collected_data', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    if not has_column('collected_data', 'last_seen_at'):
+        op.add_column('collected_data', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+    if not has_column('data_collection_runs', 'reused_data_id'):
+        with op.batch_alter_table('data_collection_runs') as batch_op:
+            batch_op.add_column(sa.Column('reused_data_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_data_collection_runs_reused_data', 'collected_data',
+                                        ['reused_data_id'], ['id'], ondelete='SET NULL')
+    if not has_index('collected_data', 'idx_collected_data_content_hash'):
+        op.create_index('idx_collected_data_content_hash', 'collected_data',
+                        ['source_id', 'data_type', 'content_hash'])
+
+    # Empreinte des lignes existantes qui n'en ont pas encore, par lots
+    collected_data = sa.table(
+        'collected_data',
+        sa.column('id', sa.Integer),
+        sa.column('raw_data', sa.JSON),
+        sa.column('content_hash', sa.String),
+        sa.column('collected_at', sa.DateTime),
+        sa.column('last_seen_at', sa.DateTime),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(collected_data.c.id, collected_data.c.raw_data)
+            .where(collected_data.c.id > last_id, collected_data.c.content_hash.is_(None))
+            .order_by(collected_data.c.id)
+            .limit(1000)
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            bind.execute(
+                collected_data.update()
+                .where(collected_data.c.id == row.id)
+                .values(content_hash=_hash_payload(row.raw_data))
+            )
+        last_id = rows[-1].id
+    bind.execute(collected_data.update().where(collected_data.c.last_seen_at.is_(None))
+                 .values(last_seen_at=collected_data.c.collected_at))
+
+
+def downgrade():
+    op.drop_index('idx_collected_data_content_hash', table_name='collected_data')
+    with op.batch_alter_table('data_collection_runs') as batch_op:
+        batch_op.drop_constraint('fk_data_collection_runs_reused_data', type_='foreignkey')
+        batch_op.drop_column('reused_data_id')
+    op.drop_column('collected_data', 'last_seen_at')
+    op.drop_column('collected_data', 'content_hash')
@@ -0,0 +1,31 @@
+"""collected_data compressed payload
+
+Ajoute la colonne raw_data_compressed (JSON canonique compressé zlib/zstd)
+à collected_data. Les lignes existantes restent en JSON ; la commande
+``flask compress-collected-data`` les convertit.
+
+Revision ID: 9a1e3b5c7d24
+Revises: 7c4d2f6e1a58
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_column
+
+
+# revision identifiers, used by Alembic.
+revision = '9a1e3b5c7d24'
+down_revision = '7c4d2f6e1a58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_column('collected_data', 'raw_data_compressed'):
+        op.add_column('collected_data', sa.Column('raw_data_compressed', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('collected_data', 'raw_data_compressed')
@@ -0,0 +1,38 @@
+"""source_cursors
+
+Ajoute la table des curseurs (dernière observation enregistrée) des sources
+collectées de façon incrémentale.
+
+Revision ID: a7d3e9b1c458
+Revises: f4a8c0e2b791
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9b1c458'
+down_revision = 'f4a8c0e2b791'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('source_cursors'):
+        op.create_table(
+            'source_cursors',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('source_id', sa.String(length=255), nullable=False),
+            sa.Column('high_water_mark', sa.String(length=64), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('source_id')
+        )
+
+
+def downgrade():
+    op.drop_table('source_cursors')
@@ -0,0 +1,141 @@
+"""monthly partitioning of collected_data and energy_data
+
+Convertit collected_data (clé data_date) et energy_data (clé timestamp) en
+tables partitionnées par mois, avec une partition par défaut. Uniquement
+sous PostgreSQL et si TIME_PARTITIONING est activé ; sinon la migration ne
+fait rien et les tables restent simples.
+
+La clé de partitionnement doit faire partie de la clé primaire : celle-ci
+devient (id, clé). La clé étrangère data_collection_runs.reused_data_id ne
+peut plus référencer collected_data ; elle est supprimée et la remise à NULL
+est faite par la rétention (voir services.partitioning).
+
+Revision ID: b6f0c2d8e413
+Revises: 9a1e3b5c7d24
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f0c2d8e413'
+down_revision = '9a1e3b5c7d24'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+# Par table : clé de partitionnement, index et clés étrangères à recréer
+TABLES = {
+    'collected_data': {
+        'key': 'data_date',
+        'indexes': [
+            ('ix_collected_data_source_id', ['source_id']),
+            ('ix_collected_data_collected_at', ['collected_at']),
+            ('ix_collected_data_data_date', ['data_date']),
+            ('idx_collected_data_type_date', ['data_type', 'data_date']),
+            ('idx_collected_data_source', ['source_id', 'data_type']),
+            ('idx_collected_data_content_hash', ['source_id', 'data_type', 'content_hash']),
+        ],
+        'foreign_keys': [
+            ('collected_data_run_id_fkey', 'run_id', 'data_collection_runs', 'id'),
+        ],
+    },
+    'energy_data': {
+        'key': 'timestamp',
+        'indexes': [
+            ('ix_energy_data_timestamp', ['timestamp']),
+        ],
+        'foreign_keys': [
+            ('energy_data_source_id_fkey', 'source_id', 'energy_sources', 'id'),
+        ],
+    },
+}
+
+
+def _enabled():
+    return (op.get_bind().dialect.name == 'postgresql'
+            and current_app.config.get('TIME_PARTITIONING', False))
+
+
+def _is_partitioned(table):
+    return op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table)"
+    ), {'table': table}).scalar()
+
+
+def _month_start(value, offset=0):
+    index = value.year * 12 + value.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _swap_table(table, spec, partitioned):
+    """Recrée une table (partitionnée ou non) et y copie les lignes existantes."""
+    key = spec['key']
+    new = f'{table}_new'
+
+    op.execute(f'CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS)'
+               + (f' PARTITION BY RANGE ("{key}")' if partitioned else ''))
+    if partitioned:
+        op.execute(f'ALTER TABLE {new} ADD PRIMARY KEY (id, "{key}")')
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {new} DEFAULT')
+
+        # Une partition par mois, des données existantes jusqu'aux mois à venir
+        oldest = op.get_bind().execute(sa.text(f'SELECT MIN("{key}") FROM {table}')).scalar()
+        month = _month_start(oldest or datetime.utcnow())
+        last = _month_start(datetime.utcnow(), MONTHS_AHEAD)
+        while month <= last:
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {new} "
+                f"FOR VALUES FROM ('{month}') TO ('{_month_start(month, 1)}')"
+            )
+            month = _month_start(month, 1)
+    else:
+        op.execute(f'ALTER TABLE {new} ADD PRIMARY KEY (id)')
+
+    op.execute(f'INSERT INTO {new} SELECT * FROM {table}')
+
+    # La séquence de l'ID est conservée et rattachée à la nouvelle table
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    op.execute(f'DROP TABLE {table} CASCADE')
+    op.execute(f'ALTER TABLE {new} RENAME TO {table}')
+    op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {new}_pkey TO {table}_pkey')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+    for name, columns in spec['indexes']:
+        op.create_index(name, table, columns)
+    for name, column, referred, referred_column in spec['foreign_keys']:
+        op.create_foreign_key(name, table, referred, [column], [referred_column])
+
+
+def upgrade():
+    if not _enabled():
+        return
+
+    # La clé de partitionnement fait partie de la clé primaire : pas de NULL
+    op.execute("UPDATE collected_data SET data_date = COALESCE(collected_at, now()) "
+               "WHERE data_date IS NULL")
+    op.execute('UPDATE energy_data SET "timestamp" = now() WHERE "timestamp" IS NULL')
+
+    for table, spec in TABLES.items():
+        if not _is_partitioned(table):
+            _swap_table(table, spec, partitioned=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, spec in TABLES.items():
+        if not _is_partitioned(table):
+            continue
+        _swap_table(table, spec, partitioned=False)
+        if table == 'collected_data':
+            op.create_foreign_key('fk_data_collection_runs_reused_data', 'data_collection_runs',
+                                  'collected_data', ['reused_data_id'], ['id'], ondelete='SET NULL')
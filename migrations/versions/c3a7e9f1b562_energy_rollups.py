@@ -0,0 +1,46 @@
+"""energy_rollups
+
+Ajoute la table des agrégats horaires, journaliers et mensuels de
+energy_data. ``flask rebuild-energy-rollups`` les calcule pour les mesures
+existantes.
+
+Revision ID: c3a7e9f1b562
+Revises: b6f0c2d8e413
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a7e9f1b562'
+down_revision = 'b6f0c2d8e413'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('energy_rollups'):
+        op.create_table(
+            'energy_rollups',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('resolution', sa.String(length=10), nullable=False),
+            sa.Column('source_id', sa.Integer(), nullable=False),
+            sa.Column('measurement_type', sa.String(length=50), nullable=False),
+            sa.Column('bucket', sa.DateTime(), nullable=False),
+            sa.Column('value_sum', sa.Float(), nullable=False),
+            sa.Column('value_count', sa.Integer(), nullable=False),
+            sa.Column('value_min', sa.Float(), nullable=True),
+            sa.Column('value_max', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['source_id'], ['energy_sources.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('resolution', 'source_id', 'measurement_type', 'bucket',
+                                name='uq_energy_rollups_bucket')
+        )
+
+
+def downgrade():
+    op.drop_table('energy_rollups')
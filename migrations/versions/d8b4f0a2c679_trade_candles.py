@@ -0,0 +1,51 @@
+"""trade_candles
+
+Ajoute la table des bougies OHLCV et l'index (asset, timestamp) de
+trade_data. ``flask backfill-candles`` calcule les bougies des transactions
+existantes.
+
+Revision ID: d8b4f0a2c679
+Revises: c3a7e9f1b562
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table, has_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b4f0a2c679'
+down_revision = 'c3a7e9f1b562'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('trade_candles'):
+        op.create_table(
+            'trade_candles',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('asset', sa.String(length=50), nullable=False),
+            sa.Column('interval', sa.String(length=5), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('open', sa.Float(), nullable=False),
+            sa.Column('high', sa.Float(), nullable=False),
+            sa.Column('low', sa.Float(), nullable=False),
+            sa.Column('close', sa.Float(), nullable=False),
+            sa.Column('volume', sa.Float(), nullable=False),
+            sa.Column('trade_count', sa.Integer(), nullable=False),
+            sa.Column('first_trade_at', sa.DateTime(), nullable=False),
+            sa.Column('last_trade_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('asset', 'interval', 'timestamp',
+                                name='uq_trade_candles_asset_interval_timestamp')
+        )
+    if not has_index('trade_data', 'ix_trade_data_asset_timestamp'):
+        op.create_index('ix_trade_data_asset_timestamp', 'trade_data', ['asset', 'timestamp'])
+
+
+def downgrade():
+    op.drop_index('ix_trade_data_asset_timestamp', table_name='trade_data')
+    op.drop_table('trade_candles')
@@ -0,0 +1,47 @@
+"""portfolio_positions
+
+Ajoute la table des positions de portefeuille matérialisées.
+``flask rebuild-positions`` les calcule à partir des transactions existantes.
+
+Revision ID: e2c6a8d0f347
+Revises: d8b4f0a2c679
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c6a8d0f347'
+down_revision = 'd8b4f0a2c679'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('portfolio_positions'):
+        op.create_table(
+            'portfolio_positions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('asset', sa.String(length=50), nullable=False),
+            sa.Column('quantity', sa.Float(), nullable=False),
+            sa.Column('cost_basis', sa.Float(), nullable=False),
+            sa.Column('realized_pnl_avg', sa.Float(), nullable=False),
+            sa.Column('realized_pnl_fifo', sa.Float(), nullable=False),
+            sa.Column('fees', sa.Float(), nullable=False),
+            sa.Column('fifo_lots', sa.JSON(), nullable=False),
+            sa.Column('trade_count', sa.Integer(), nullable=False),
+            sa.Column('last_trade_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'asset', name='uq_portfolio_positions_user_asset')
+        )
+
+
+def downgrade():
+    op.drop_table('portfolio_positions')
@@ -0,0 +1,49 @@
+"""task_jobs
+
+Ajoute la table de la file de tâches durable exécutée par ``flask worker``.
+
+Revision ID: f4a8c0e2b791
+Revises: e2c6a8d0f347
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table, has_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a8c0e2b791'
+down_revision = 'e2c6a8d0f347'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('task_jobs'):
+        op.create_table(
+            'task_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('args', sa.JSON(), nullable=True),
+            sa.Column('kwargs', sa.JSON(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('max_attempts', sa.Integer(), nullable=False),
+            sa.Column('available_at', sa.DateTime(), nullable=False),
+            sa.Column('locked_until', sa.DateTime(), nullable=True),
+            sa.Column('locked_by', sa.String(length=100), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if not has_index('task_jobs', 'idx_task_jobs_status_available'):
+        op.create_index('idx_task_jobs_status_available', 'task_jobs', ['status', 'available_at'])
+
+
+def downgrade():
+    op.drop_index('idx_task_jobs_status_available', table_name='task_jobs')
+    op.drop_table('task_jobs')
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare les moteurs d'analyse HTML de ``app.services.html_extract`` (lxml et
+bs4) sur les pages enregistrées dans ``scripts/fixtures/html``.
+
+Pour chaque page et chaque moteur, le script vérifie que les résultats sont
+identiques puis mesure le temps médian d'extraction. Le tableau volumineux
+est aussi lu ligne par ligne avec ``iter_table_rows``.
+
+Usage :
+    python scripts/benchmark_html_extract.py [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Ajouter le répertoire parent au chemin Python
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.html_extract import BACKENDS, Extractor, iter_table_rows
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'html')
+
+# Sélecteurs de chaque page enregistrée
+CASES = {
+    'insee_serie.html': {
+        'selectors': {'title': 'h1.titre', 'last_update': '.mise-a-jour'},
+        'rows': ('.tableau-nicerow', {'date': '.date', 'value': '.valeur'}),
+    },
+    'large_table.html': {
+        'selectors': {'title': 'title'},
+        'rows': ('#historique tr', {'id': 'td:nth-child(1)', 'price': 'td:nth-child(3)'}),
+    },
+}
+
+
+def measure(func, repeat):
+    """Temps médian d'exécution de ``func``, en millisecondes."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=20, help='Nombre de mesures par cas')
+    args = parser.parse_args()
+
+    print(f"{'page':<20} {'moteur':<8} {'taille':>9} {'médiane':>10} {'lignes':>7}")
+    for name, case in CASES.items():
+        path = os.path.join(FIXTURES_DIR, name)
+        with open(path, 'rb') as f:
+            html = f.read()
+
+        results = {}
+        for backend in BACKENDS:
+            # Compilation des sélecteurs hors mesure, comme avec get_extractor
+            extractor = Extractor(case['selectors'], case['rows'], backend)
+            results[backend] = extractor.extract(html)
+            elapsed = measure(lambda: extractor.extract(html), args.repeat)
+            print(f"{name:<20} {backend:<8} {len(html) // 1024:>7}Ko {elapsed:>8.1f}ms "
+                  f"{len(results[backend].get('rows', [])):>7}")
+
+        reference = results['bs4']
+        for backend, result in results.items():
+            if result != reference:
+                print(f"  ATTENTION : résultats différents entre {backend} et bs4")
+
+        def stream():
+            with open(path, 'rb') as f:
+                return sum(1 for _ in iter_table_rows(f))
+        elapsed = measure(stream, args.repeat)
+        print(f"{name:<20} {'flux':<8} {len(html) // 1024:>7}Ko {elapsed:>8.1f}ms {stream():>7}")
+
+
+if __name__ == '__main__':
+    main()